@@ -0,0 +1,143 @@
+# coding: utf-8
+#!/usr/bin/env python
+
+__author__      = "Viktor Dmitriyev"
+__license__     = "MIT"
+__version__     = "1.0.0"
+__updated__     = "18.10.2026"
+__created__     = "18.10.2026"
+__description__ = "SQLite storage of crawled citations with per-record upserts."
+
+import json
+import sqlite3
+import threading
+
+#
+import helpers as hlp
+
+class CitationStore():
+    """ Citation DB kept in an embedded SQLite database (WAL mode).
+
+    Every record is the same dictionary that is kept in the JSON citation DB, e.g.
+    {'GS': {'source': 'GS', 'value': 3}, 'CR': {'source': 'CR', 'value': 5}}, stored under its key.
+    Each upsert is committed on its own, so a crash loses at most the record in progress.
+    """
+
+    def __init__(self, path):
+        """ Initial method.
+
+        Arguments:
+            path {str} -- SQLite database file
+        """
+
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS citations (key TEXT PRIMARY KEY, record TEXT NOT NULL)')
+        self.connection.commit()
+
+    def get(self, key, default=None):
+        """ Looking up record by key.
+
+        Arguments:
+            key {str} -- key of the record (publication title)
+
+        Returns:
+            dict -- record or default if not found
+        """
+
+        with self.lock:
+            row = self.connection.execute('SELECT record FROM citations WHERE key = ?', (key,)).fetchone()
+
+        if row is None:
+            return default
+        return json.loads(row[0])
+
+    def __contains__(self, key):
+        with self.lock:
+            row = self.connection.execute('SELECT 1 FROM citations WHERE key = ?', (key,)).fetchone()
+        return row is not None
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute('SELECT COUNT(*) FROM citations').fetchone()[0]
+
+    def put(self, key, record):
+        """ Inserting or replacing single record.
+
+        Arguments:
+            key {str} -- key of the record (publication title)
+            record {dict} -- citations of the publication
+        """
+
+        with self.lock:
+            with self.connection:
+                self.connection.execute('INSERT OR REPLACE INTO citations (key, record) VALUES (?, ?)',
+                                        (key, json.dumps(record, sort_keys=True)))
+
+    def keys(self):
+        """ Listing keys of all records.
+
+        Returns:
+            list -- keys sorted
+        """
+
+        with self.lock:
+            return [row[0] for row in self.connection.execute('SELECT key FROM citations ORDER BY key')]
+
+    def items(self):
+        """ Iterating over all records sorted by key.
+
+        Returns:
+            generator of (key, record) tuples
+        """
+
+        with self.lock:
+            rows = self.connection.execute('SELECT key, record FROM citations ORDER BY key').fetchall()
+
+        for key, record in rows:
+            yield key, json.loads(record)
+
+    def import_json(self, path):
+        """ Importing records from the JSON citation DB, existing records with same keys are replaced.
+
+        Arguments:
+            path {str} -- JSON citation DB
+
+        Returns:
+            int -- amount of imported records
+        """
+
+        with open(path) as json_data:
+            citations_db = json.load(json_data)
+
+        with self.lock:
+            with self.connection:
+                self.connection.executemany('INSERT OR REPLACE INTO citations (key, record) VALUES (?, ?)',
+                                            ((key, json.dumps(record, sort_keys=True)) for key, record in citations_db.items()))
+
+        return len(citations_db)
+
+    def export_json(self, path):
+        """ Exporting all records into the JSON citation DB format.
+
+        Arguments:
+            path {str} -- JSON citation DB
+
+        Returns:
+            int -- amount of exported records
+        """
+
+        citations_db = dict(self.items())
+
+        with open(path + '.tmp', 'w') as _f_dump:
+            _f_dump.write(json.dumps(citations_db, indent=2, sort_keys=True))
+        hlp.replace_file(path + '.tmp', path)
+
+        return len(citations_db)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
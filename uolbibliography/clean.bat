@@ -3,4 +3,5 @@ REM @author Viktor Dmitriyev
 REM @about Remove '__temp__' and "generated" folders
 rmdir /s /q __temp__
 rmdir /s /q generated
-rmdir /s /q logs
\ No newline at end of file
+rmdir /s /q logs
+rmdir /s /q partitions
\ No newline at end of file
@@ -0,0 +1,163 @@
+# coding: utf-8
+#!/usr/bin/env python
+
+__author__      = "Viktor Dmitriyev"
+__license__     = "MIT"
+__version__     = "1.0.0"
+__updated__     = "18.10.2026"
+__created__     = "18.10.2026"
+__description__ = "Columnar cache of cleaned bibliography data kept next to the CSV."
+
+import os
+import re
+import json
+import pandas as pd
+
+try:
+    import pyarrow
+    from pyarrow import feather
+except ImportError:
+    feather = None
+
+#
+import helpers as hlp
+
+# settings
+COLUMNAR_CACHE_SUFFIX = '.feather'
+CATEGORICAL_COLUMNS = ['Fach', 'Typ', 'Sprache']
+INTEGER_COLUMNS = ['Jahr']
+# uncompressed Feather files and memory-mapped reading came with pyarrow 0.17, which has no release for Python 2
+FEATHER_MIN_PYARROW_VERSION = (0, 17)
+
+def is_supported():
+    """ Checking whether pyarrow is installed in a version the columnar cache can be used with. """
+
+    if feather is None:
+        return False
+    version = tuple(int(part) for part in re.findall(r'\d+', pyarrow.__version__)[:2])
+    return version >= FEATHER_MIN_PYARROW_VERSION
+
+def apply_column_types(df):
+    """ Converting 'Fach', 'Typ' and 'Sprache' to categoricals and 'Jahr' to integer.
+
+    Arguments:
+        df {pandas.DataFrame} -- cleaned data
+
+    Returns:
+        pandas.DataFrame -- the same data frame
+    """
+
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+    for column in INTEGER_COLUMNS:
+        if column in df.columns:
+            values = pd.to_numeric(df[column], errors='coerce')
+            # nullable integer only if there are missing values
+            df[column] = values.astype('Int32' if values.isnull().any() else 'int32')
+    return df
+
+class ColumnarCache():
+    """ Cleaned data set stored as an uncompressed Feather file, so it is loaded memory-mapped.
+
+    'Fach', 'Typ' and 'Sprache' are stored as categoricals and 'Jahr' as integer. Size and
+    modification time of the source CSV are kept in a small JSON file next to the cache;
+    if they differ, the hash of the CSV decides whether the cache has to be rebuilt.
+    """
+
+    def __init__(self, f_input, logger=None):
+        """ Initial method.
+
+        Arguments:
+            f_input {str} -- CSV file with cleaned data
+
+        Keyword Arguments:
+            logger {logging.Logger} -- logger (default: {None})
+        """
+
+        self.f_input = f_input
+        self.path = f_input + COLUMNAR_CACHE_SUFFIX
+        self.path_meta = self.path + '.json'
+        self.logger = logger
+
+    def _source(self):
+        stat = os.stat(self.f_input)
+        return {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+    def is_valid(self):
+        """ Checking whether the cache was built from the current content of the CSV. """
+
+        if not os.path.isfile(self.path) or not os.path.isfile(self.path_meta):
+            return False
+
+        with open(self.path_meta) as f_meta:
+            meta = json.load(f_meta)
+
+        source = self._source()
+        if source['size'] == meta['size'] and source['mtime'] == meta['mtime']:
+            return True
+
+        if source['size'] != meta['size'] or hlp.file_hash(self.f_input) != meta['hash']:
+            return False
+
+        # same content, only touched
+        meta.update(source)
+        self._save_meta(meta)
+        return True
+
+    def _save_meta(self, meta):
+        with open(self.path_meta + '.tmp', 'w') as f_meta:
+            f_meta.write(json.dumps(meta, sort_keys=True))
+        hlp.replace_file(self.path_meta + '.tmp', self.path_meta)
+
+    def read_csv(self):
+        """ Reading the CSV with column types of the cache.
+
+        Returns:
+            pandas.DataFrame -- cleaned data
+        """
+
+        return apply_column_types(pd.read_csv(self.f_input, sep=','))
+
+    def store(self, df, source):
+        """ Storing data set in the cache.
+
+        Arguments:
+            df {pandas.DataFrame} -- cleaned data
+            source {dict} -- size, modification time and hash of the CSV the data were read from
+        """
+
+        feather.write_feather(df, self.path + '.tmp', compression='uncompressed')
+        hlp.replace_file(self.path + '.tmp', self.path)
+        self._save_meta(source)
+
+    def load(self):
+        """ Loading cleaned data from the cache, the cache is rebuilt if the CSV has changed.
+
+        Without 'pyarrow' 0.17 or newer the CSV is read on every call.
+
+        Returns:
+            pandas.DataFrame -- cleaned data
+        """
+
+        if not is_supported():
+            if self.logger is not None:
+                self.logger.info('Columnar cache requires "pyarrow" 0.17 or newer, reading CSV: {0}'.format(self.f_input))
+            return self.read_csv()
+
+        if self.is_valid():
+            hlp.metrics.increment('columnar_cache_hits')
+            if self.logger is not None:
+                self.logger.info('Loading columnar cache: {0}'.format(self.path))
+            return feather.read_table(self.path, memory_map=True).to_pandas()
+
+        hlp.metrics.increment('columnar_cache_misses')
+        if self.logger is not None:
+            self.logger.info('Building columnar cache: {0}'.format(self.path))
+        # taken before reading, so a CSV changed meanwhile invalidates the cache next time
+        source = self._source()
+        source['hash'] = hlp.file_hash(self.f_input)
+
+        df = self.read_csv()
+        self.store(df, source)
+        return df
@@ -0,0 +1,142 @@
+# coding: utf-8
+#!/usr/bin/env python
+
+__author__      = "Viktor Dmitriyev"
+__license__     = "MIT"
+__version__     = "1.0.0"
+__updated__     = "18.10.2026"
+__created__     = "18.10.2026"
+__description__ = "Manifest of crawled URLs that allows to resume an interrupted crawl."
+
+import os
+import json
+import time
+import hashlib
+
+#
+import helpers as hlp
+from csv_writer import read_rows
+
+# settings
+CRAWL_MANIFEST_NAME = 'crawl-manifest.json'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+class CrawlManifest():
+    """ Status of every crawled URL, saved to disk as soon as the URL is finished.
+
+    Every entry holds status, hash of the downloaded content, amount of rows and the output CSV
+    together with its hash. The latter is used to detect output files that were changed or
+    overwritten by another URL after the entry was recorded, and identifies the rows of the URL
+    for later stages.
+    """
+
+    def __init__(self, path, resume=False):
+        """ Initial method.
+
+        Args:
+            path: manifest file
+            resume: keep entries of the previous crawl, otherwise the manifest starts empty
+        """
+
+        self.path = path
+        self.previous = {}
+
+        if os.path.isfile(self.path):
+            with open(self.path) as f_manifest:
+                self.previous = json.load(f_manifest)
+
+        self.entries = dict(self.previous) if resume else {}
+
+    def save(self):
+        """ Saving manifest atomically, so a crash never leaves a broken file behind. """
+
+        with open(self.path + '.tmp', 'w') as f_manifest:
+            f_manifest.write(json.dumps(self.entries, indent=2, sort_keys=True))
+        hlp.replace_file(self.path + '.tmp', self.path)
+
+    def is_done(self, url):
+        """ Checking whether URL was crawled and its output is still on disk unchanged.
+
+        Args:
+            url: crawled URL
+        Returns:
+            True/False
+        """
+
+        return self._is_intact(self.entries.get(url))
+
+    def _is_intact(self, entry):
+        if entry is None or entry['status'] != STATUS_DONE:
+            return False
+
+        output_file = entry['output_file']
+        return os.path.isfile(output_file) and hlp.file_hash(output_file) == entry['output_hash']
+
+    def is_unchanged(self, url, doc):
+        """ Checking whether the downloaded content is the same as in the previous crawl and its output is still on disk unchanged.
+
+        Args:
+            url: crawled URL
+            doc: downloaded HTML
+        Returns:
+            True/False
+        """
+
+        entry = self.previous.get(url)
+        if doc is None or not self._is_intact(entry):
+            return False
+
+        return entry['content_hash'] == hashlib.sha1(doc).hexdigest()
+
+    def record_unchanged(self, url):
+        """ Recording URL with unchanged content as done, its output of the previous crawl is kept.
+
+        Args:
+            url: crawled URL
+        """
+
+        self.entries[url] = dict(self.previous[url], updated=time.strftime('%Y-%m-%d %H:%M:%S'))
+        self.save()
+
+    def record_done(self, url, doc, rows, output_file):
+        """ Recording successfully crawled URL.
+
+        Args:
+            url: crawled URL
+            doc: downloaded HTML
+            rows: amount of rows written into output file
+            output_file: CSV file with extracted rows
+        """
+
+        self.entries[url] = {'status': STATUS_DONE,
+                             'content_hash': hashlib.sha1(doc).hexdigest(),
+                             'rows': rows,
+                             'output_file': output_file,
+                             'output_hash': hlp.file_hash(output_file),
+                             'updated': time.strftime('%Y-%m-%d %H:%M:%S')}
+        self.save()
+
+    def record_failed(self, url, error):
+        """ Recording URL that failed, it will be crawled again on resume.
+
+        Args:
+            url: crawled URL
+            error: exception that happened
+        """
+
+        self.entries[url] = {'status': STATUS_FAILED,
+                             'error': repr(error),
+                             'updated': time.strftime('%Y-%m-%d %H:%M:%S')}
+        self.save()
+
+    def load_rows(self, url):
+        """ Reading rows of an already crawled URL back from its output file.
+
+        Args:
+            url: crawled URL
+        Returns:
+            table as a collection of Python lists
+        """
+
+        return list(read_rows(self.entries[url]['output_file']))
@@ -0,0 +1,158 @@
+# coding: utf-8
+#!/usr/bin/env python
+
+__author__      = "Viktor Dmitriyev"
+__license__     = "MIT"
+__version__     = "1.0.0"
+__updated__     = "18.10.2026"
+__created__     = "18.10.2026"
+__description__ = "Persistent cache of Crossref search responses keyed by normalized query."
+
+import json
+import time
+import sqlite3
+import threading
+import unicodedata
+
+# settings
+CROSSREF_CACHE_NAME = 'crossref-cache.sqlite'
+CROSSREF_CACHE_TTL_DAYS = 90
+CROSSREF_CACHE_MAX_SIZE_MB = 256
+
+class CrossrefCacheMiss(Exception):
+    """ Raised in offline mode for queries that are not in the cache. """
+    pass
+
+def normalize_query(query):
+    """ Normalizing search query: unicode is composed, case is folded and whitespaces are collapsed. """
+
+    if not isinstance(query, type(u'')):
+        query = query.decode('utf-8')
+    return u' '.join(unicodedata.normalize('NFKC', query).lower().split())
+
+class CrossrefCache():
+    """ Matched work of every Crossref search kept in an embedded SQLite database.
+
+    Every entry holds DOI, title and score of the best match together with the full item,
+    searches without any match are cached as well. Entries older than the TTL are searched
+    again, least recently used entries are evicted once the cache exceeds its size cap.
+    In offline mode expired entries are still served and a missing query raises
+    'CrossrefCacheMiss', so the cache can be used as a fixture without network access.
+    """
+
+    def __init__(self, path, ttl_days=CROSSREF_CACHE_TTL_DAYS, max_size_mb=CROSSREF_CACHE_MAX_SIZE_MB, offline=False):
+        """ Initial method.
+
+        Arguments:
+            path {str} -- SQLite database file
+
+        Keyword Arguments:
+            ttl_days {float} -- age in days after which entries are searched again, None never expires (default: {90})
+            max_size_mb {float} -- size cap of all cached items in megabytes (default: {256})
+            offline {bool} -- serve responses only from the cache, never touch the network (default: {False})
+        """
+
+        self.path = path
+        self.ttl = None if ttl_days is None else ttl_days * 24 * 60 * 60
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS responses ('
+                                'query TEXT PRIMARY KEY, doi TEXT, title TEXT, score REAL, item TEXT, '
+                                'size INTEGER NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)')
+        self.connection.commit()
+
+        self.total_size = self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def lookup(self, query):
+        """ Looking up cached response of a search.
+
+        Arguments:
+            query {str} -- free text query
+
+        Returns:
+            dict -- response in the structure of 'CrossrefClient.works' or None if not cached or expired
+
+        Raises:
+            CrossrefCacheMiss -- in offline mode, if the query is not cached
+        """
+
+        key = normalize_query(query)
+        now = time.time()
+
+        with self.lock:
+            row = self.connection.execute('SELECT item, created FROM responses WHERE query = ?', (key,)).fetchone()
+
+            expired = row is not None and self.ttl is not None and now - row[1] > self.ttl
+            if row is None or (expired and not self.offline):
+                self.misses += 1
+                if self.offline:
+                    raise CrossrefCacheMiss(key)
+                return None
+
+            self.hits += 1
+            with self.connection:
+                self.connection.execute('UPDATE responses SET accessed = ? WHERE query = ?', (now, key))
+
+        items = [json.loads(row[0])] if row[0] is not None else []
+        return {'message': {'items': items}}
+
+    def store(self, query, response):
+        """ Storing best match of a search response and evicting least recently used entries if needed.
+
+        Arguments:
+            query {str} -- free text query
+            response {dict} -- response of 'CrossrefClient.works'
+        """
+
+        key = normalize_query(query)
+        items = response['message']['items']
+        item = items[0] if items else {}
+        raw_item = json.dumps(item, sort_keys=True) if items else None
+        size = len(key) + (len(raw_item) if raw_item else 0)
+        title = item.get('title') or [None]
+        now = time.time()
+
+        with self.lock:
+            row = self.connection.execute('SELECT size FROM responses WHERE query = ?', (key,)).fetchone()
+            with self.connection:
+                self.connection.execute('INSERT OR REPLACE INTO responses (query, doi, title, score, item, size, created, accessed) '
+                                        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                        (key, item.get('DOI'), title[0], item.get('score'), raw_item, size, now, now))
+
+            if row is not None:
+                self.total_size -= row[0]
+            self.total_size += size
+
+            self._evict()
+
+    def _evict(self):
+        """ Removing least recently used entries until the cache fits into the size cap. """
+
+        if self.total_size <= self.max_size:
+            return
+
+        rows = self.connection.execute('SELECT query, size FROM responses ORDER BY accessed').fetchall()
+        evicted = []
+        for key, size in rows:
+            if self.total_size <= self.max_size:
+                break
+            evicted.append((key,))
+            self.total_size -= size
+
+        with self.connection:
+            self.connection.executemany('DELETE FROM responses WHERE query = ?', evicted)
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,142 @@
+# coding: utf-8
+#!/usr/bin/env python
+
+__author__      = "Viktor Dmitriyev"
+__license__     = "MIT"
+__version__     = "1.0.0"
+__updated__     = "18.10.2026"
+__created__     = "18.10.2026"
+__description__ = "Thread-safe Crossref client that keeps to the published rate limits of the Crossref API."
+
+import re
+import threading
+
+import requests
+
+#
+import helpers as hlp
+
+# settings
+CROSSREF_API_URL = 'https://api.crossref.org'
+CROSSREF_MAX_RETRIES = 3
+# published limits of the "polite" pool (requests with 'mailto') and the "public" pool
+CROSSREF_POLITE_REQUESTS_PER_SECOND = 10
+CROSSREF_POLITE_MAX_CONCURRENCY = 3
+CROSSREF_PUBLIC_REQUESTS_PER_SECOND = 5
+CROSSREF_PUBLIC_MAX_CONCURRENCY = 1
+
+class CrossrefClient():
+    """ Minimal replacement of 'habanero.Crossref' for the 'works' search.
+
+    All threads share one token bucket and one concurrency limit. Limits announced by the API
+    in the 'X-Rate-Limit-Limit'/'X-Rate-Limit-Interval' headers lower the configured rate, and
+    'Retry-After' of a 429/503 response pauses all threads before the request is retried.
+    Searches for the best match only ('limit=1') are served from the optional 'CrossrefCache'.
+    """
+
+    def __init__(self, mailto=None, base_url=CROSSREF_API_URL, requests_per_second=None, max_concurrency=None, cache=None, logger=None):
+        """ Initial method.
+
+        Keyword Arguments:
+            mailto {str} -- contact e-mail, requests with it are served by the polite pool (default: {None})
+            base_url {str} -- URL of the Crossref API (default: {'https://api.crossref.org'})
+            requests_per_second {float} -- rate limit, default depends on the pool (default: {None})
+            max_concurrency {int} -- maximum amount of requests in flight, default depends on the pool (default: {None})
+            cache {CrossrefCache} -- cache of search responses, None disables caching (default: {None})
+            logger {logging.Logger} -- logger (default: {None})
+        """
+
+        if requests_per_second is None:
+            requests_per_second = CROSSREF_POLITE_REQUESTS_PER_SECOND if mailto else CROSSREF_PUBLIC_REQUESTS_PER_SECOND
+        if max_concurrency is None:
+            max_concurrency = CROSSREF_POLITE_MAX_CONCURRENCY if mailto else CROSSREF_PUBLIC_MAX_CONCURRENCY
+
+        self.mailto = mailto
+        self.base_url = base_url
+        self.requests_per_second = float(requests_per_second)
+        self.max_concurrency = max_concurrency
+        self.cache = cache
+        self.logger = logger
+
+        self.bucket = hlp.TokenBucket(self.requests_per_second, capacity=max(1, self.requests_per_second))
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.local = threading.local()
+
+    def _session(self):
+        """ Session of the current thread. """
+
+        if not hasattr(self.local, 'session'):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def _apply_rate_limit_headers(self, headers):
+        """ Lowering own rate to the limit announced by the API. """
+
+        limit = headers.get('X-Rate-Limit-Limit')
+        interval = headers.get('X-Rate-Limit-Interval')
+        if not limit or not interval:
+            return
+
+        try:
+            seconds = float(re.match(r'(\d+(?:\.\d+)?)', interval).group(1))
+            announced = float(limit) / seconds
+        except (AttributeError, ValueError, ZeroDivisionError):
+            return
+
+        if announced < self.bucket.rate:
+            if self.logger is not None:
+                self.logger.info('Crossref rate limit lowered to {0} requests per second'.format(announced))
+            self.bucket.set_rate(announced, capacity=max(1, announced))
+
+    def _retry_after(self, headers):
+        try:
+            return float(headers.get('Retry-After', 1))
+        except ValueError:
+            return 1.0
+
+    def works(self, query, limit=1):
+        """ Searching works, the response has the same structure as 'habanero.Crossref.works'.
+
+        Arguments:
+            query {str} -- free text query
+
+        Keyword Arguments:
+            limit {int} -- amount of items to return (default: {1})
+
+        Returns:
+            dict -- parsed JSON response
+        """
+
+        use_cache = self.cache is not None and limit == 1
+        if use_cache:
+            cached = self.cache.lookup(query)
+            if cached is not None:
+                hlp.metrics.increment('crossref_cache_hits')
+                return cached
+            hlp.metrics.increment('crossref_cache_misses')
+
+        params = {'query': query, 'rows': limit}
+        if self.mailto:
+            params['mailto'] = self.mailto
+
+        for attempt in range(CROSSREF_MAX_RETRIES + 1):
+            with self.semaphore:
+                self.bucket.acquire()
+                with hlp.metrics.timer('crossref_request_seconds'):
+                    response = self._session().get(self.base_url + '/works', params=params, timeout=60)
+
+            self._apply_rate_limit_headers(response.headers)
+
+            if response.status_code in (429, 503) and attempt < CROSSREF_MAX_RETRIES:
+                retry_after = self._retry_after(response.headers)
+                if self.logger is not None:
+                    self.logger.warning('Crossref answered {0}, retry after {1} seconds'.format(response.status_code, retry_after))
+                self.bucket.pause(retry_after)
+                hlp.metrics.increment('crossref_retries', status=response.status_code)
+                continue
+
+            response.raise_for_status()
+            result = response.json()
+            if use_cache:
+                self.cache.store(query, result)
+            return result
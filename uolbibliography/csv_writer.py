@@ -0,0 +1,97 @@
+# coding: utf-8
+#!/usr/bin/env python
+
+__author__      = "Viktor Dmitriyev"
+__license__     = "MIT"
+__version__     = "1.0.0"
+__updated__     = "18.10.2026"
+__created__     = "18.10.2026"
+__description__ = "Streaming CSV writer shared by crawler, cleaner and citator."
+
+import io
+import csv
+import sys
+
+# settings
+CSV_BUFFER_SIZE = 1024 * 1024
+
+def quote_value(value):
+    """ Quoting single CSV value, embedded quotes are doubled as the 'csv' module expects. """
+
+    return u'"' + value.replace(u'"', u'""') + u'"'
+
+class StreamingCSVWriter():
+    """ Writes rows straight into a buffered UTF-8 file, every value is quoted.
+
+    Output has the same layout as the CSV files produced so far: all values in double quotes,
+    separated by comma, rows terminated with '\\n'.
+    """
+
+    def __init__(self, f_output, header=None):
+        """ Initial method.
+
+        Arguments:
+            f_output {str} -- output file name
+
+        Keyword Arguments:
+            header {list} -- names of columns written as the first row (default: {None})
+        """
+
+        self._file = io.open(f_output, 'w', encoding='utf-8', newline='', buffering=CSV_BUFFER_SIZE)
+        self.rows_written = 0
+
+        if header is not None:
+            self._write(header)
+
+    def _write(self, row):
+        self._file.write(u','.join(quote_value(value) for value in row) + u'\n')
+
+    def write_row(self, row):
+        """ Writing single row.
+
+        Arguments:
+            row {list} -- values of the row as strings
+        """
+
+        self._write(row)
+        self.rows_written += 1
+
+    def write_rows(self, rows):
+        """ Writing all rows of the given iterable. """
+
+        for row in rows:
+            self.write_row(row)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def read_rows(f_input, skip_header=True):
+    """ Reading back rows of a CSV file written by 'StreamingCSVWriter'.
+
+    Arguments:
+        f_input {str} -- input file name
+
+    Keyword Arguments:
+        skip_header {bool} -- skip the first row (default: {True})
+
+    Returns:
+        generator of rows as lists of unicode strings
+    """
+
+    if sys.version_info[0] >= 3:
+        with io.open(f_input, 'r', encoding='utf-8', newline='') as f_in:
+            for index, row in enumerate(csv.reader(f_in)):
+                if index > 0 or not skip_header:
+                    yield row
+    else:
+        # csv.py of Python 2 doesn't do Unicode
+        with open(f_input, 'rb') as f_in:
+            for index, row in enumerate(csv.reader(f_in)):
+                if index > 0 or not skip_header:
+                    yield [cell.decode('utf-8') for cell in row]
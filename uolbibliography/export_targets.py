@@ -0,0 +1,297 @@
+# coding: utf-8
+#!/usr/bin/env python
+
+__author__      = "Viktor Dmitriyev"
+__license__     = "MIT"
+__version__     = "1.0.0"
+__updated__     = "18.10.2026"
+__created__     = "18.10.2026"
+__description__ = "Typed export targets (Parquet, Arrow, SQLite) written together with the CSV files."
+
+import os
+import math
+import sqlite3
+
+# Parquet and Arrow are optional, they require pyarrow
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+#
+import helpers as hlp
+from csv_writer import StreamingCSVWriter
+from publication import NUMBER_MIN, NUMBER_MAX
+
+# settings
+EXPORT_FORMATS = ('parquet', 'arrow', 'sqlite')
+EXPORT_SUFFIXES = {'parquet': '.parquet', 'arrow': '.arrow', 'sqlite': '.sqlite'}
+EXPORT_BATCH_SIZE = 50000
+EXPORT_SQLITE_TABLE = 'publications'
+PARQUET_COMPRESSION = 'snappy'
+# columns that are integers by construction, columns that are neither integers nor floats are
+# exported as text; 'Seiten' stays text, it is whatever the brackets at the end of a title contain
+# (e.g. page ranges or 'XII, 200')
+INTEGER_COLUMNS = ['ZahlWoerterTitel',
+                   'ZahlOldenburgerAutoren',
+                   'Jahr',
+                   'ClusterId',
+                   'GoogleScholar',
+                   'Crossref']
+# columns with fractional numbers written with a decimal comma, e.g. u'4,5' points
+FLOAT_COLUMNS = ['Punktzahl']
+
+def export_path(f_output, export_format):
+    """ File of the export target next to the CSV file, e.g. 'merged.parquet' for 'merged.csv'. """
+
+    return os.path.splitext(f_output)[0] + EXPORT_SUFFIXES[export_format]
+
+def column_names(header):
+    """ Names of columns without surrounding spaces, e.g. 'ZahlOldenburgerAutoren' of the crawler. """
+
+    return [name.strip() for name in header]
+
+def to_integer(value):
+    """ Integer of the value, None for empty values and values that are not 32 bit integers. """
+
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return None
+    return number if NUMBER_MIN <= number <= NUMBER_MAX else None
+
+def to_float(value):
+    """ Float of the value written with a decimal comma or point, None for empty values and values that are not numbers. """
+
+    try:
+        number = float(value.replace(u',', u'.'))
+    except (AttributeError, ValueError):
+        return None
+    # 'nan' and 'inf' are words, not numbers of the bibliography
+    if math.isnan(number) or math.isinf(number):
+        return None
+    return number
+
+def converter(name):
+    """ Function converting values of the column, None for text columns. """
+
+    if name in INTEGER_COLUMNS:
+        return to_integer
+    if name in FLOAT_COLUMNS:
+        return to_float
+    return None
+
+class ColumnarTarget():
+    """ Rows written as Parquet or Arrow file in record batches of 'EXPORT_BATCH_SIZE' rows.
+
+    Integer columns (see 'INTEGER_COLUMNS') are 32 bit integers and float columns (see
+    'FLOAT_COLUMNS') are doubles, values that are not numbers become missing values, as the
+    columnar cache of the plotter does. Other columns are strings, Parquet encodes repeated
+    values with dictionaries and compresses columns with snappy.
+    """
+
+    # how values that are not numbers are exported, see 'coerced'
+    coerced_as = 'missing values'
+
+    def __init__(self, path, header, export_format):
+        """ Initial method.
+
+        Arguments:
+            path {str} -- output file, written into a temporary file until the target is closed
+            header {list} -- names of columns
+            export_format {str} -- 'parquet' or 'arrow'
+        """
+
+        self.path = path
+        self.export_format = export_format
+        self.converters = [converter(name) for name in column_names(header)]
+        types = {to_integer: pa.int32(), to_float: pa.float64(), None: pa.string()}
+        self.schema = pa.schema([pa.field(name, types[convert])
+                                 for name, convert in zip(column_names(header), self.converters)])
+        self.columns = [[] for _ in header]
+        self.coerced = 0
+
+        if self.export_format == 'parquet':
+            self.writer = pq.ParquetWriter(self.path + '.tmp', self.schema, compression=PARQUET_COMPRESSION)
+        else:
+            self.writer = pa.ipc.new_file(self.path + '.tmp', self.schema)
+
+    def write_row(self, row):
+        for column, convert, value in zip(self.columns, self.converters, row):
+            if convert is not None:
+                number = convert(value)
+                if number is None and value != u'':
+                    self.coerced += 1
+                column.append(number)
+            else:
+                column.append(value)
+
+        if len(self.columns[0]) >= EXPORT_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """ Writing buffered rows as one record batch. """
+
+        if not self.columns or not self.columns[0]:
+            return
+
+        arrays = [pa.array(column, type=field.type) for column, field in zip(self.columns, self.schema)]
+        batch = pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+        if self.export_format == 'parquet':
+            self.writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            self.writer.write_batch(batch)
+        self.columns = [[] for _ in self.columns]
+
+    def close(self, completed=True):
+        """ Closing the target, the temporary file replaces the output only if all rows were written. """
+
+        if completed:
+            self.flush()
+        self.writer.close()
+        if completed:
+            hlp.replace_file(self.path + '.tmp', self.path)
+        else:
+            os.remove(self.path + '.tmp')
+
+class SQLiteTarget():
+    """ Rows written into table 'publications' of an SQLite database.
+
+    Integer columns have INTEGER and float columns REAL affinity, values that are not numbers are
+    kept as text instead of being dropped. Empty values become NULL.
+    """
+
+    # how values that are not numbers are exported, see 'coerced'
+    coerced_as = 'text'
+
+    def __init__(self, path, header):
+        """ Initial method.
+
+        Arguments:
+            path {str} -- database file, written into a temporary file until the target is closed
+            header {list} -- names of columns
+        """
+
+        self.path = path
+        self.converters = [converter(name) for name in column_names(header)]
+        self.rows = []
+        self.coerced = 0
+
+        if os.path.isfile(self.path + '.tmp'):
+            os.remove(self.path + '.tmp')
+        self.connection = sqlite3.connect(self.path + '.tmp')
+
+        types = {to_integer: 'INTEGER', to_float: 'REAL', None: 'TEXT'}
+        columns = u', '.join(u'"{0}" {1}'.format(name, types[convert])
+                             for name, convert in zip(column_names(header), self.converters))
+        self.connection.execute(u'CREATE TABLE {0} ({1})'.format(EXPORT_SQLITE_TABLE, columns))
+        self.insert = u'INSERT INTO {0} VALUES ({1})'.format(EXPORT_SQLITE_TABLE, u', '.join(u'?' for _ in header))
+
+    def write_row(self, row):
+        self.rows.append([None if value == u'' else (self._number(convert, value) if convert is not None else value)
+                          for convert, value in zip(self.converters, row)])
+
+        if len(self.rows) >= EXPORT_BATCH_SIZE:
+            self.flush()
+
+    def _number(self, convert, value):
+        number = convert(value)
+        if number is None:
+            self.coerced += 1
+            return value
+        return number
+
+    def flush(self):
+        """ Inserting buffered rows, all rows are committed at once when the target is closed. """
+
+        self.connection.executemany(self.insert, self.rows)
+        self.rows = []
+
+    def close(self, completed=True):
+        """ Closing the target, the temporary database replaces the output only if all rows were written. """
+
+        if completed:
+            self.flush()
+            self.connection.commit()
+        self.connection.close()
+        if completed:
+            hlp.replace_file(self.path + '.tmp', self.path)
+        else:
+            os.remove(self.path + '.tmp')
+
+class ExportWriter():
+    """ Writes rows into a CSV file and into the selected export targets at once.
+
+    Has the interface of 'StreamingCSVWriter', so it can be used wherever a CSV is written. Every
+    target is written into a temporary file that replaces the target when the writer is closed
+    without an exception, or is removed otherwise.
+    """
+
+    def __init__(self, f_output, header, exports=(), f_csv=None, logger=None):
+        """ Initial method.
+
+        Arguments:
+            f_output {str} -- CSV output file, the export targets are written next to it (see 'export_path')
+            header {list} -- names of columns
+
+        Keyword Arguments:
+            exports {list} -- export formats in addition to CSV, see 'EXPORT_FORMATS' (default: {()})
+            f_csv {str} -- file the CSV is written into instead of 'f_output', e.g. a temporary file (default: {None})
+            logger {logging.Logger} -- logger (default: {None})
+        """
+
+        self.logger = logger
+        self.csv = StreamingCSVWriter(f_csv or f_output, header=header)
+        self.targets = []
+
+        for export_format in exports:
+            path = export_path(f_output, export_format)
+            if export_format == 'sqlite':
+                self.targets.append(SQLiteTarget(path, header))
+            elif pa is None:
+                if self.logger is not None:
+                    self.logger.warning('[w] export to {0} is skipped, it requires "pyarrow"'.format(export_format))
+            else:
+                self.targets.append(ColumnarTarget(path, header, export_format))
+
+    @property
+    def rows_written(self):
+        return self.csv.rows_written
+
+    def write_row(self, row):
+        """ Writing single row into the CSV and all export targets. """
+
+        self.csv.write_row(row)
+        for target in self.targets:
+            target.write_row(row)
+
+    def write_rows(self, rows):
+        """ Writing all rows of the given iterable. """
+
+        for row in rows:
+            self.write_row(row)
+
+    def close(self, completed=True):
+        """ Closing the CSV and all export targets.
+
+        Keyword Arguments:
+            completed {bool} -- keep export targets, otherwise their temporary files are removed (default: {True})
+        """
+
+        self.csv.close()
+        for target in self.targets:
+            target.close(completed)
+            if not completed:
+                continue
+            hlp.metrics.increment('export_rows', self.rows_written, format=os.path.splitext(target.path)[1][1:])
+            if target.coerced and self.logger is not None:
+                self.logger.warning('[w] {0} values that are not numbers were exported as {1}: {2}'.format(target.coerced, target.coerced_as, target.path))
+            if self.logger is not None:
+                self.logger.info('Exported {0} rows: {1}'.format(self.rows_written, target.path))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(completed=exc_type is None)
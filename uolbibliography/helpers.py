@@ -1,10 +1,107 @@
 import os
+import json
+import time
+import atexit
 import socket
+import hashlib
 import logging
+import threading
+import contextlib
+import multiprocessing
+import multiprocessing.util
+
+try:
+    from urlparse import urlparse
+except ImportError:
+    from urllib.parse import urlparse
+
+# settings
+LOG_REPEAT_LIMIT = 5
+LOG_REPEAT_INTERVAL_SECONDS = 60
+LOG_REPEAT_MAX_MESSAGES = 10000
+# listeners are stopped before the queues are closed (priority 10)
+LOG_LISTENER_EXIT_PRIORITY = 100
+
+try:
+    from logging.handlers import QueueHandler, QueueListener
+except ImportError:
+    # Python 2.7, minimal versions of the handlers available since Python 3.2
+
+    class QueueHandler(logging.Handler):
+        """ Handler that only puts the formatted record into the queue. """
+
+        def __init__(self, queue):
+            logging.Handler.__init__(self)
+            self.queue = queue
+
+        def prepare(self, record):
+            # message is formatted here, so the record can be pickled without its arguments
+            record.msg = self.format(record)
+            record.message = record.msg
+            record.args = None
+            record.exc_info = None
+            record.exc_text = None
+            return record
+
+        def emit(self, record):
+            try:
+                self.queue.put_nowait(self.prepare(record))
+            except Exception:
+                self.handleError(record)
+
+    class QueueListener(object):
+        """ Thread that takes records from the queue and passes them to the handlers. """
+
+        _sentinel = None
+
+        def __init__(self, queue, *handlers, **kwargs):
+            self.queue = queue
+            self.handlers = handlers
+            self.respect_handler_level = kwargs.get('respect_handler_level', False)
+            self._thread = None
+
+        def start(self):
+            self._thread = threading.Thread(target=self._monitor)
+            self._thread.daemon = True
+            self._thread.start()
+
+        def handle(self, record):
+            for handler in self.handlers:
+                if not self.respect_handler_level or record.levelno >= handler.level:
+                    handler.handle(record)
+
+        def _monitor(self):
+            while True:
+                record = self.queue.get()
+                if record is self._sentinel:
+                    break
+                self.handle(record)
+
+        def stop(self):
+            self.queue.put_nowait(self._sentinel)
+            self._thread.join()
+            self._thread = None
+
+# listeners of loggers configured by 'custom_logger'
+_logging_listeners = {}
+_logging_lock = threading.Lock()
+
+def logs_folder():
+    """ Folder 'logs' next to this module, created if missing. """
+
+    folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    return folder
 
 def custom_logger(path_to_log_file=None, logger_name=None):
     """ Configuring logger and setting proper path to file.
 
+    Handlers are installed once per logger behind a queue, so logging only enqueues the record and
+    a listener thread writes it to the file (all levels) and the console (INFO and above).
+    The queue is shared with forked processes, their records are written by the same listener.
+    The same warning is passed at most LOG_REPEAT_LIMIT times per LOG_REPEAT_INTERVAL_SECONDS.
+
     Args:
         path_to_log_file: name of the log file in subfolder 'logs', in case None will be generated
 
@@ -15,29 +112,323 @@ def custom_logger(path_to_log_file=None, logger_name=None):
     if not logger_name:
         logger_name = 'root'
 
-    print (logger_name)
-
-    logFormatter = logging.Formatter("%(asctime)s [%(threadName)-12.12s] [%(levelname)-5.5s]  %(message)s")
     rootLogger = logging.getLogger(logger_name)
-    rootLogger.setLevel(logging.DEBUG)
-
-    if path_to_log_file is None:
-        logs_folder = 'logs'
-        if not os.path.exists(logs_folder):
-            os.makedirs(logs_folder)
-        path_to_log_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), logs_folder, '{0}-{1}'.format(socket.gethostname(), 'root'))
-        #print ('[i] will be logged in to {0}'.format(path_to_log_file))
-
-    # # take care, here is a magic string!!! configure this for own needs
-    fileHandler = logging.FileHandler("{path}.log".format(path=path_to_log_file))
-    fileHandler.setFormatter(logFormatter)
-    fileHandler.setLevel(logging.DEBUG)
-    rootLogger.addHandler(fileHandler)
-
-    consoleHandler = logging.StreamHandler()
-    consoleHandler.setFormatter(logFormatter)
-    consoleHandler.setLevel(logging.DEBUG)
-    rootLogger.addHandler(consoleHandler)
-    #rootLogger.info('\n')
+
+    with _logging_lock:
+        if logger_name in _logging_listeners:
+            return rootLogger
+
+        logFormatter = logging.Formatter("%(asctime)s [%(threadName)-12.12s] [%(levelname)-5.5s]  %(message)s")
+        rootLogger.setLevel(logging.DEBUG)
+        rootLogger.propagate = False
+
+        if path_to_log_file is None:
+            path_to_log_file = os.path.join(logs_folder(), '{0}-{1}'.format(socket.gethostname(), 'root'))
+            #print ('[i] will be logged in to {0}'.format(path_to_log_file))
+
+        # # take care, here is a magic string!!! configure this for own needs
+        fileHandler = logging.FileHandler("{path}.log".format(path=path_to_log_file))
+        fileHandler.setFormatter(logFormatter)
+        fileHandler.setLevel(logging.DEBUG)
+
+        consoleHandler = logging.StreamHandler()
+        consoleHandler.setFormatter(logFormatter)
+        consoleHandler.setLevel(logging.INFO)
+
+        queue = multiprocessing.Queue(-1)
+        queueHandler = QueueHandler(queue)
+        queueHandler.addFilter(RepeatedMessageFilter())
+        rootLogger.addHandler(queueHandler)
+
+        listener = QueueListener(queue, fileHandler, consoleHandler, respect_handler_level=True)
+        listener.start()
+        _logging_listeners[logger_name] = listener
+        # flushing the queue at exit, also at exit of a 'multiprocessing.Process'
+        multiprocessing.util.Finalize(None, listener.stop, exitpriority=LOG_LISTENER_EXIT_PRIORITY)
 
     return rootLogger
+
+class RepeatedMessageFilter(logging.Filter):
+    """ Passing the same warning (or error) at most 'limit' times per 'interval' seconds.
+
+    The amount of suppressed repeats is added to the next occurrence that is passed.
+    """
+
+    def __init__(self, limit=LOG_REPEAT_LIMIT, interval=LOG_REPEAT_INTERVAL_SECONDS):
+        logging.Filter.__init__(self)
+        self.limit = limit
+        self.interval = interval
+        self.seen = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno < logging.WARNING:
+            return True
+
+        key = (record.levelno, record.getMessage())
+        now = time.time()
+        with self.lock:
+            if len(self.seen) > LOG_REPEAT_MAX_MESSAGES:
+                self.seen.clear()
+            started, count, suppressed = self.seen.get(key, (now, 0, 0))
+            if now - started >= self.interval:
+                started, count = now, 0
+            if count >= self.limit:
+                self.seen[key] = (started, count, suppressed + 1)
+                return False
+            self.seen[key] = (started, count + 1, 0)
+
+        if suppressed:
+            record.msg = record.getMessage() + ' (suppressed {0} times)'.format(suppressed)
+            record.args = None
+        return True
+
+def replace_file(source, target):
+    """ Moving file over the existing one (os.rename does not overwrite on Windows).
+
+    Args:
+        source: file to be moved
+        target: file to be replaced
+    """
+
+    if os.path.exists(target):
+        os.remove(target)
+    os.rename(source, target)
+
+def file_hash(path):
+    """ Calculating SHA-1 of the file content. """
+
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f_in:
+        for chunk in iter(lambda: f_in.read(1024 * 1024), b''):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+class TokenBucket(object):
+    """ Thread-safe token bucket that limits the rate of some operation.
+
+    Args:
+        rate: amount of tokens added per second
+        capacity: maximum amount of tokens that can be accumulated (burst size)
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.timestamp = time.time()
+        self.paused_until = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """ Blocks until a token is available and takes it. """
+
+        while True:
+            with self.lock:
+                now = time.time()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.timestamp) * self.rate)
+                    self.timestamp = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def set_rate(self, rate, capacity=None):
+        """ Changing rate (and burst size) while the bucket is in use. """
+
+        with self.lock:
+            self.rate = float(rate)
+            if capacity is not None:
+                self.capacity = float(capacity)
+                self.tokens = min(self.tokens, self.capacity)
+
+    def pause(self, seconds):
+        """ Handing out no tokens for the given amount of seconds (e.g. after 'Retry-After'). """
+
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.time() + seconds)
+            self.tokens = 0
+            self.timestamp = self.paused_until
+
+
+class HostRateLimiter(object):
+    """ Politeness budget applied separately to every host.
+
+    Args:
+        requests_per_second: maximum rate of requests sent to a single host
+        max_concurrency: maximum amount of requests to a single host in flight
+    """
+
+    def __init__(self, requests_per_second, max_concurrency):
+        self.requests_per_second = requests_per_second
+        self.max_concurrency = max_concurrency
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    def _host_limits(self, host):
+        with self.lock:
+            if host not in self.hosts:
+                self.hosts[host] = (TokenBucket(self.requests_per_second),
+                                    threading.BoundedSemaphore(self.max_concurrency))
+            return self.hosts[host]
+
+    @contextlib.contextmanager
+    def limit(self, url):
+        """ Context manager that waits for the budget of the URL's host. """
+
+        bucket, semaphore = self._host_limits(urlparse(url).netloc)
+        with semaphore:
+            bucket.acquire()
+            yield
+
+
+class Metrics(object):
+    """ Thread-safe counters, timers and gauges of a run, optionally labelled (e.g. by URL).
+
+    Timers keep count, sum, minimum and maximum of observed durations. The summary is written
+    as JSON and, optionally, as a Prometheus textfile (e.g. for the node exporter).
+    Worker processes have their own copy, their measurements have to be sent back explicitly.
+    """
+
+    def __init__(self):
+        self.name = None
+        self.started = time.time()
+        self.counters = {}
+        self.gauges = {}
+        self.timers = {}
+        self.lock = threading.Lock()
+
+    def _key(self, name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def increment(self, name, value=1, **labels):
+        """ Adding value to the counter. """
+
+        key = self._key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        """ Setting value of the gauge. """
+
+        with self.lock:
+            self.gauges[self._key(name, labels)] = value
+
+    def observe(self, name, seconds, **labels):
+        """ Adding observed duration to the timer. """
+
+        key = self._key(name, labels)
+        with self.lock:
+            timer = self.timers.get(key)
+            if timer is None:
+                self.timers[key] = [1, seconds, seconds, seconds]
+            else:
+                timer[0] += 1
+                timer[1] += seconds
+                timer[2] = min(timer[2], seconds)
+                timer[3] = max(timer[3], seconds)
+
+    @contextlib.contextmanager
+    def timer(self, name, **labels):
+        """ Context manager that observes the duration of its block, also if it raises. """
+
+        started = time.time()
+        try:
+            yield
+        finally:
+            self.observe(name, time.time() - started, **labels)
+
+    def get(self, name, **labels):
+        """ Value of the counter, 0 if it was never incremented. """
+
+        with self.lock:
+            return self.counters.get(self._key(name, labels), 0)
+
+    def summary(self):
+        """ Summary of all metrics.
+
+        Returns:
+            dict -- counters, gauges and timers, each as a list of values with their labels
+        """
+
+        def entries(metrics, value):
+            result = {}
+            for (name, labels), metric in sorted(metrics.items()):
+                entry = {'labels': dict(labels)} if labels else {}
+                entry.update(value(metric))
+                result.setdefault(name, []).append(entry)
+            return result
+
+        with self.lock:
+            return {'name': self.name,
+                    'started': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started)),
+                    'duration_seconds': round(time.time() - self.started, 3),
+                    'counters': entries(self.counters, lambda value: {'value': value}),
+                    'gauges': entries(self.gauges, lambda value: {'value': value}),
+                    'timers': entries(self.timers, lambda timer: {'count': timer[0],
+                                                                  'sum_seconds': round(timer[1], 6),
+                                                                  'min_seconds': round(timer[2], 6),
+                                                                  'max_seconds': round(timer[3], 6),
+                                                                  'mean_seconds': round(timer[1] / timer[0], 6)})}
+
+    def prometheus(self):
+        """ Metrics in the Prometheus text format, timers are exported as summaries (count and sum). """
+
+        def sample(name, labels, value):
+            if labels:
+                escaped = ','.join('{0}="{1}"'.format(label, str(label_value).replace('\\', '\\\\').replace('"', '\\"'))
+                                   for label, label_value in labels)
+                return '{0}{{{1}}} {2}'.format(name, escaped, value)
+            return '{0} {1}'.format(name, value)
+
+        prefix = 'uolbibliography_'
+        lines = []
+        with self.lock:
+            for kind, metrics in (('counter', self.counters), ('gauge', self.gauges)):
+                for name in sorted(set(name for name, _ in metrics)):
+                    lines.append('# TYPE {0}{1} {2}'.format(prefix, name, kind))
+                    lines += [sample(prefix + name, labels, value) for (key, labels), value in sorted(metrics.items()) if key == name]
+            for name in sorted(set(name for name, _ in self.timers)):
+                lines.append('# TYPE {0}{1} summary'.format(prefix, name))
+                for (key, labels), timer in sorted(self.timers.items()):
+                    if key == name:
+                        lines.append(sample(prefix + name + '_count', labels, timer[0]))
+                        lines.append(sample(prefix + name + '_sum', labels, repr(timer[1])))
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path_json, path_prometheus=None):
+        """ Writing summary as JSON and, optionally, as Prometheus textfile, both atomically. """
+
+        with open(path_json + '.tmp', 'w') as f_json:
+            f_json.write(json.dumps(self.summary(), indent=2, sort_keys=True))
+        replace_file(path_json + '.tmp', path_json)
+
+        if path_prometheus:
+            with open(path_prometheus + '.tmp', 'w') as f_prometheus:
+                f_prometheus.write(self.prometheus())
+            replace_file(path_prometheus + '.tmp', path_prometheus)
+
+# metrics of the running entry point
+metrics = Metrics()
+
+def init_metrics(name, path_json=None, path_prometheus=None):
+    """ Naming metrics of the entry point and writing their summary at exit.
+
+    Args:
+        name: name of the entry point, e.g. 'crawler'
+        path_json: JSON summary, by default 'metrics-<name>.json' in the folder 'logs'
+        path_prometheus: Prometheus textfile, None writes no textfile
+    Returns:
+        metrics of the entry point
+    """
+
+    metrics.name = name
+    if path_json is None:
+        path_json = os.path.join(logs_folder(), 'metrics-{0}.json'.format(name))
+
+    atexit.register(metrics.write, path_json, path_prometheus)
+    return metrics
@@ -0,0 +1,158 @@
+# coding: utf-8
+#!/usr/bin/env python
+
+__author__      = "Viktor Dmitriyev"
+__license__     = "MIT"
+__version__     = "1.0.0"
+__updated__     = "18.10.2026"
+__created__     = "18.10.2026"
+__description__ = "Persistent on-disk cache of HTTP responses with conditional GET support."
+
+import os
+import json
+import time
+import hashlib
+import threading
+
+#
+import helpers as hlp
+
+# settings
+HTTP_CACHE_DIR = 'http-cache'
+HTTP_CACHE_MAX_SIZE_MB = 512
+
+class HTTPCache():
+    """ Cache of response bodies together with their 'ETag'/'Last-Modified' validators.
+
+    Every entry is stored as two files named after the SHA-1 of the URL: the raw body and
+    a small JSON file with validators. Modification time of the body file is used as the
+    last access time, which allows LRU eviction over several runs.
+    """
+
+    def __init__(self, cache_dir=HTTP_CACHE_DIR, max_size_mb=HTTP_CACHE_MAX_SIZE_MB, offline=False):
+        """ Initial method.
+
+        Args:
+            cache_dir: directory with cached responses
+            max_size_mb: size cap of all cached bodies in megabytes
+            offline: serve responses only from the cache, never touch the network
+        """
+
+        self.cache_dir = cache_dir
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.offline = offline
+        self.lock = threading.Lock()
+
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+        # index of cached entries: key -> [size, last access]
+        self.entries = {}
+        for file_name in os.listdir(self.cache_dir):
+            if file_name.endswith('.body'):
+                path = os.path.join(self.cache_dir, file_name)
+                self.entries[file_name[:-5]] = [os.path.getsize(path), os.path.getmtime(path)]
+        self.total_size = sum(entry[0] for entry in self.entries.values())
+
+    def _key(self, url):
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def _paths(self, key):
+        path = os.path.join(self.cache_dir, key)
+        return path + '.body', path + '.json'
+
+    def lookup(self, url):
+        """ Looking up cached response.
+
+        Args:
+            url: URL of the response
+        Returns:
+            tuple (body, validators) or None if the URL is not cached
+        """
+
+        key = self._key(url)
+        path_body, path_meta = self._paths(key)
+
+        with self.lock:
+            if key not in self.entries:
+                return None
+            try:
+                with open(path_meta) as f_meta:
+                    meta = json.load(f_meta)
+                with open(path_body, 'rb') as f_body:
+                    body = f_body.read()
+            except (IOError, OSError, ValueError):
+                self._remove(key)
+                return None
+
+        return body, meta
+
+    def validators(self, meta):
+        """ Building headers for a conditional GET out of cached validators. """
+
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def touch(self, url):
+        """ Marking cached response as recently used (e.g. after 304 Not Modified). """
+
+        key = self._key(url)
+        path_body, _ = self._paths(key)
+
+        with self.lock:
+            if key in self.entries:
+                now = time.time()
+                os.utime(path_body, (now, now))
+                self.entries[key][1] = now
+
+    def store(self, url, body, headers):
+        """ Storing response in the cache and evicting least recently used entries if needed.
+
+        Args:
+            url: URL of the response
+            body: raw response body
+            headers: response headers
+        """
+
+        key = self._key(url)
+        path_body, path_meta = self._paths(key)
+        meta = {'url': url,
+                'etag': headers.get('ETag'),
+                'last_modified': headers.get('Last-Modified')}
+
+        with self.lock:
+            with open(path_body + '.tmp', 'wb') as f_body:
+                f_body.write(body)
+            with open(path_meta + '.tmp', 'w') as f_meta:
+                f_meta.write(json.dumps(meta))
+            hlp.replace_file(path_body + '.tmp', path_body)
+            hlp.replace_file(path_meta + '.tmp', path_meta)
+
+            if key in self.entries:
+                self.total_size -= self.entries[key][0]
+            self.entries[key] = [len(body), time.time()]
+            self.total_size += len(body)
+
+            self._evict()
+
+    def _remove(self, key):
+        for path in self._paths(key):
+            if os.path.exists(path):
+                os.remove(path)
+        if key in self.entries:
+            self.total_size -= self.entries.pop(key)[0]
+
+    def _evict(self):
+        """ Removing least recently used entries until the cache fits into the size cap. """
+
+        if self.total_size <= self.max_size:
+            return
+
+        for key in sorted(self.entries, key=lambda k: self.entries[k][1]):
+            if self.total_size <= self.max_size:
+                break
+            self._remove(key)
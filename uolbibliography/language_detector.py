@@ -0,0 +1,162 @@
+# coding: utf-8
+#!/usr/bin/env python
+
+__author__      = "Viktor Dmitriyev"
+__license__     = "MIT"
+__version__     = "1.0.0"
+__updated__     = "18.10.2026"
+__created__     = "18.10.2026"
+__description__ = "Deterministic language detection of publication titles with a persistent cache."
+
+import os
+import json
+
+#
+import helpers as hlp
+
+# settings
+LANGUAGE_CACHE_NAME = 'language-cache.json'
+LANGUAGE_DETECTION_SEED = 0
+UNKNOWN_LANGUAGE = 'Unknown'
+
+def normalize_title(title):
+    """ Normalizing title for the cache: whitespaces are collapsed, case is kept. """
+
+    return u' '.join(title.split())
+
+class LanguageDetector():
+    """ Language detection with 'langdetect' loaded once and seeded, so results do not change between runs.
+
+    Detected ISO 639-1 codes are memoized by normalized title and can be kept in a JSON file,
+    so re-cleaning a dataset only detects titles that were never seen before.
+    """
+
+    def __init__(self, cache_path=None, seed=LANGUAGE_DETECTION_SEED, logger=None):
+        """ Initial method.
+
+        Keyword Arguments:
+            cache_path {str} -- JSON file with detected languages, None keeps the cache in memory only (default: {None})
+            seed {int} -- seed of the randomized detector (default: {0})
+            logger {logging.Logger} -- logger for detection warnings (default: {None})
+        """
+
+        from langdetect import DetectorFactory
+        from langdetect.detector_factory import init_factory
+
+        DetectorFactory.seed = seed
+        init_factory()
+
+        self.cache_path = cache_path
+        self.logger = logger
+        self.cache = {}
+        self.detected = {}
+        self.names = {}
+        self.hits = 0
+        self.misses = 0
+
+        if self.cache_path and os.path.isfile(self.cache_path):
+            with open(self.cache_path) as f_cache:
+                self.cache = json.load(f_cache)
+
+    def _detect(self, text):
+        from langdetect import detect
+
+        try:
+            return detect(text)
+        except Exception as ex:
+            if self.logger is not None:
+                self.logger.warning('Exception with language detection: {0}'.format(str(ex)))
+        return None
+
+    def detect(self, title):
+        """ Detecting language of a single title.
+
+        Arguments:
+            title {str} -- publication title
+
+        Returns:
+            str -- ISO 639-1 code or None if language could not be detected
+        """
+
+        key = normalize_title(title)
+        if key in self.cache:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.cache[key] = self.detected[key] = self._detect(key)
+
+        return self.cache[key]
+
+    def detect_batch(self, titles):
+        """ Detecting languages of many titles, each distinct title is detected once.
+
+        Arguments:
+            titles {list} -- publication titles
+
+        Returns:
+            list -- ISO 639-1 codes in the order of given titles
+        """
+
+        return [self.detect(title) for title in titles]
+
+    def pop_detected(self):
+        """ Taking languages detected since the last call, e.g. to send them from a worker process.
+
+        Returns:
+            dict -- normalized title -> ISO 639-1 code
+        """
+
+        detected, self.detected = self.detected, {}
+        return detected
+
+    def update(self, detected, hits=0, misses=0):
+        """ Adding languages detected by another detector (e.g. in a worker process).
+
+        Arguments:
+            detected {dict} -- normalized title -> ISO 639-1 code
+
+        Keyword Arguments:
+            hits {int} -- cache hits of the other detector (default: {0})
+            misses {int} -- cache misses of the other detector (default: {0})
+        """
+
+        self.cache.update(detected)
+        self.hits += hits
+        self.misses += misses
+
+    def decode(self, code):
+        """ Decoding ISO 639-1 code into the name of language.
+
+        Arguments:
+            code {str} -- ISO 639-1 code
+
+        Returns:
+            str -- name of the language or 'Unknown'
+        """
+
+        if code not in self.names:
+            self.names[code] = self._decode(code)
+        return self.names[code]
+
+    def _decode(self, code):
+        try:
+            from pycountry import languages
+            try:
+                return languages.get(alpha_2=code).name
+            except (KeyError, AttributeError):
+                # older versions of pycountry
+                return languages.get(iso639_1_code=code).name
+        except Exception as ex:
+            if self.logger is not None:
+                self.logger.warning('Exception with language decoding according to ISO 693-1: {0}'.format(str(ex)))
+        return UNKNOWN_LANGUAGE
+
+    def save(self):
+        """ Saving detected languages into the cache file. """
+
+        if not self.cache_path:
+            return
+
+        with open(self.cache_path + '.tmp', 'w') as f_cache:
+            f_cache.write(json.dumps(self.cache, sort_keys=True))
+        hlp.replace_file(self.cache_path + '.tmp', self.cache_path)
@@ -0,0 +1,196 @@
+# coding: utf-8
+#!/usr/bin/env python
+
+__author__      = "Viktor Dmitriyev"
+__license__     = "MIT"
+__version__     = "1.0.0"
+__updated__     = "18.10.2026"
+__created__     = "18.10.2026"
+__description__ = "Near-duplicate publications found by MinHash signatures and locality-sensitive hashing."
+
+import re
+import struct
+import difflib
+import hashlib
+
+#
+from title_index import normalize_title, author_surnames, TITLE_SIMILARITY_THRESHOLD
+
+# settings
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+LSH_MAX_BUCKET_SIZE = 50
+AUTHORS_SIMILARITY_THRESHOLD = 0.5
+# 16 bit hash values, one SHA-512 digest is enough for 32 permutations
+MINHASH_DIGEST_VALUES = 32
+# page notes within normalized titles, e.g. 's 12 15' or 'pp 3'
+PAGE_NOTE = re.compile(r'\b(?:s|seiten|p|pp|pages?)\s+\d+(?:\s+\d+)?\b', re.UNICODE)
+
+def normalize_publication(title, authors):
+    """ Normalized title without page notes and sorted surnames of all authors.
+
+    Arguments:
+        title {str} -- publication title
+        authors {str} -- authors as in the bibliography
+
+    Returns:
+        tuple -- e.g. (u'ueber daten', (u'mueller', u'schmidt')) for u'Über Daten, S. 1-9' by u'Schmidt, P.; Müller, H.'
+    """
+
+    title = u' '.join(PAGE_NOTE.sub(u' ', normalize_title(title)).split())
+    return title, tuple(sorted(set(author_surnames(authors))))
+
+def shingles(title, surnames):
+    """ Words of the normalized title and surnames of authors, author order is ignored. """
+
+    tokens = set(title.split())
+    tokens.update(u'@' + surname for surname in surnames)
+    return tokens
+
+def token_hashes(token, permutations):
+    """ Values of the token under every permutation, taken from salted SHA-512 digests.
+
+    Hashes don't depend on the Python version or on hash randomization of strings.
+    """
+
+    data = token.encode('utf-8')
+    digests = b''.join(hashlib.sha512(struct.pack('<I', salt) + data).digest()
+                       for salt in range(-(-permutations // MINHASH_DIGEST_VALUES)))
+    return struct.unpack('<{0}H'.format(permutations), digests[:2 * permutations])
+
+class NearDuplicateDetector():
+    """ Clusters of publications with similar titles and authors.
+
+    Publications are added one by one. The same normalized title and authors are joined at once
+    (the fast path), other publications get a MinHash signature over the words of the title and
+    surnames of the authors. Signatures are split into bands, publications sharing a band are
+    candidates, so only candidates are compared instead of all pairs. Candidates are joined if
+    the titles are similar (typos, page notes), have the same numbers (e.g. 'Band 1' is never
+    joined with 'Band 2') and share most authors, whatever their order is.
+    """
+
+    def __init__(self, permutations=MINHASH_PERMUTATIONS, bands=LSH_BANDS, threshold=TITLE_SIMILARITY_THRESHOLD,
+                 max_bucket_size=LSH_MAX_BUCKET_SIZE):
+        """ Initial method.
+
+        Keyword Arguments:
+            permutations {int} -- length of MinHash signatures (default: {64})
+            bands {int} -- amount of LSH bands, has to divide the amount of permutations (default: {16})
+            threshold {float} -- minimal similarity of normalized titles (default: {0.9})
+            max_bucket_size {int} -- publications kept per LSH bucket, bounds comparisons of frequent titles (default: {50})
+        """
+
+        if permutations % bands != 0:
+            raise ValueError('Amount of permutations ({0}) has to be a multiple of bands ({1})'.format(permutations, bands))
+
+        self.permutations = permutations
+        self.rows = permutations // bands
+        self.threshold = threshold
+        self.max_bucket_size = max_bucket_size
+
+        # normalized publication of every added row
+        self.publications = []
+        # normalized publication -> index of its first row
+        self.exact = {}
+        # (band, hash of band) -> indexes of rows
+        self.buckets = {}
+        # union-find forest over indexes of rows
+        self.parents = []
+        self.comparisons = 0
+        self.capped = 0
+
+    def signature(self, tokens):
+        """ MinHash signature of the given shingles, the minimal value of every permutation. """
+
+        if not tokens:
+            return ()
+        return tuple(map(min, zip(*[token_hashes(token, self.permutations) for token in tokens])))
+
+    def _find(self, index):
+        parents = self.parents
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    def _union(self, index, other):
+        index, other = self._find(index), self._find(other)
+        # the first row of a cluster stays its root
+        if index != other:
+            self.parents[max(index, other)] = min(index, other)
+
+    def _numbers(self, title):
+        return sorted(token for token in title.split() if token.isdigit())
+
+    def is_similar(self, publication, other):
+        """ Checking whether two normalized publications are near-duplicates. """
+
+        (title, surnames), (other_title, other_surnames) = publication, other
+
+        if surnames and other_surnames:
+            common = len(set(surnames) & set(other_surnames))
+            if float(common) / len(set(surnames) | set(other_surnames)) < AUTHORS_SIMILARITY_THRESHOLD:
+                return False
+
+        if self._numbers(title) != self._numbers(other_title):
+            return False
+
+        matcher = difflib.SequenceMatcher(None, title, other_title)
+        return (matcher.real_quick_ratio() >= self.threshold and matcher.quick_ratio() >= self.threshold and
+                matcher.ratio() >= self.threshold)
+
+    def add(self, title, authors):
+        """ Adding publication and joining it with near-duplicates added so far.
+
+        Arguments:
+            title {str} -- publication title
+            authors {str} -- authors of the publication
+
+        Returns:
+            int -- index of the publication
+        """
+
+        index = len(self.publications)
+        publication = normalize_publication(title, authors)
+        self.publications.append(publication)
+        self.parents.append(index)
+
+        if publication in self.exact:
+            self._union(index, self.exact[publication])
+            return index
+        self.exact[publication] = index
+
+        candidates = set()
+        signature = self.signature(shingles(*publication))
+        for band in range(0, len(signature), self.rows):
+            bucket = self.buckets.setdefault((band, hash(signature[band:band + self.rows])), [])
+            candidates.update(bucket)
+            if len(bucket) < self.max_bucket_size:
+                bucket.append(index)
+            else:
+                self.capped += 1
+
+        for candidate in sorted(candidates):
+            if self._find(candidate) == self._find(index):
+                continue
+            self.comparisons += 1
+            if self.is_similar(publication, self.publications[candidate]):
+                self._union(index, candidate)
+
+        return index
+
+    def cluster_ids(self):
+        """ Cluster of every added publication.
+
+        Returns:
+            list -- cluster ids numbered from 1 in order of the first publication of every cluster
+        """
+
+        ids = {}
+        clusters = []
+        for index in range(len(self.parents)):
+            root = self._find(index)
+            if root not in ids:
+                ids[root] = len(ids) + 1
+            clusters.append(ids[root])
+        return clusters
@@ -0,0 +1,133 @@
+# coding: utf-8
+#!/usr/bin/env python
+
+__author__      = "Viktor Dmitriyev"
+__license__     = "MIT"
+__version__     = "1.0.0"
+__updated__     = "18.10.2026"
+__created__     = "18.10.2026"
+__description__ = "Results of pipeline stages kept per crawled page and keyed by content hashes."
+
+import os
+import json
+import hashlib
+
+#
+import helpers as hlp
+from csv_writer import StreamingCSVWriter, read_rows
+
+# settings
+PARTITIONS_DIR = 'partitions'
+PARTITIONS_STATE_NAME = 'partitions-state.json'
+PARTITION_SUFFIX = '.csv'
+
+def rows_hash(rows, sha1=None):
+    """ SHA-1 of rows as they are written into CSV.
+
+    Arguments:
+        rows {iterable} -- rows as lists of strings
+
+    Keyword Arguments:
+        sha1 {hashlib.sha1} -- hash to be updated (default: {None})
+
+    Returns:
+        hashlib.sha1 -- updated hash
+    """
+
+    if sha1 is None:
+        sha1 = hashlib.sha1()
+    for row in rows:
+        sha1.update(u'\x1f'.join(row).encode('utf-8'))
+        sha1.update(b'\x1e')
+    return sha1
+
+class PartitionStore():
+    """ Cleaned rows of every crawled page, one CSV file per partition.
+
+    A partition is keyed by the hash of the crawled rows of the page (see 'CrawlManifest') and
+    the version of the stage that produced it, so a partition is computed again only if its
+    input or the stage changed. Besides partitions, hashes of the previous run are kept in
+    a small state file.
+    """
+
+    def __init__(self, path=PARTITIONS_DIR, version=None):
+        """ Initial method.
+
+        Keyword Arguments:
+            path {str} -- directory of partitions (default: {'partitions'})
+            version {str} -- version of the stage that produces partitions (default: {None})
+        """
+
+        self.path = path
+        self.version = version
+        self.path_state = os.path.join(self.path, PARTITIONS_STATE_NAME)
+        self.used = set()
+        self.hits = 0
+        self.misses = 0
+
+        if not os.path.exists(self.path):
+            os.makedirs(self.path)
+
+    def key(self, partition_hash):
+        """ Key of the partition with the given hash of input rows. """
+
+        return hashlib.sha1('{0}:{1}'.format(self.version, partition_hash).encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.path, key + PARTITION_SUFFIX)
+
+    def load(self, key):
+        """ Loading rows of the partition.
+
+        Arguments:
+            key {str} -- key of the partition
+
+        Returns:
+            list -- rows, None if the partition was not stored yet
+        """
+
+        self.used.add(key)
+        if not os.path.isfile(self._path(key)):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return list(read_rows(self._path(key), skip_header=False))
+
+    def store(self, key, rows):
+        """ Storing rows of the partition atomically. """
+
+        self.used.add(key)
+        with StreamingCSVWriter(self._path(key) + '.tmp') as writer:
+            writer.write_rows(rows)
+        hlp.replace_file(self._path(key) + '.tmp', self._path(key))
+
+    def prune(self):
+        """ Removing partitions that were neither loaded nor stored since the store was opened.
+
+        Returns:
+            int -- amount of removed partitions
+        """
+
+        removed = 0
+        for file_name in os.listdir(self.path):
+            if file_name.endswith(PARTITION_SUFFIX) and file_name[:-len(PARTITION_SUFFIX)] not in self.used:
+                os.remove(os.path.join(self.path, file_name))
+                removed += 1
+        return removed
+
+    def load_state(self):
+        """ Hashes of the previous run, empty if there was none. """
+
+        if not os.path.isfile(self.path_state):
+            return {}
+
+        with open(self.path_state) as f_state:
+            return json.load(f_state)
+
+    def save_state(self, state):
+        """ Saving hashes of the current run. """
+
+        with open(self.path_state + '.tmp', 'w') as f_state:
+            f_state.write(json.dumps(state, indent=2, sort_keys=True))
+        hlp.replace_file(self.path_state + '.tmp', self.path_state)
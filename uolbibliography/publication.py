@@ -0,0 +1,210 @@
+# coding: utf-8
+#!/usr/bin/env python
+
+__author__      = "Viktor Dmitriyev"
+__license__     = "MIT"
+__version__     = "1.0.0"
+__updated__     = "18.10.2026"
+__created__     = "18.10.2026"
+__description__ = "Shared values of low-cardinality fields and an array-backed batch of publications."
+
+import re
+import array
+import collections
+
+try:
+    from itertools import izip as zip
+except ImportError:
+    pass
+
+# settings
+CODE_TYPECODE = 'H'
+WIDE_CODE_TYPECODE = 'I'
+NUMBER_TYPECODE = 'i'
+NUMBER_MIN = -2 ** 31
+NUMBER_MAX = 2 ** 31 - 1
+# up to 9 ASCII digits without leading zeros always fit
+SHORT_NUMBER = re.compile(r'(?:[1-9][0-9]{0,8}|0)\Z')
+
+def to_number(value):
+    """ Integer of a value written as such, e.g. 2015 for u'2015', otherwise the value itself.
+
+    Values that would not be written back the same way (u'07', u' 5', u'4,5') or don't fit into
+    4 bytes are kept as text.
+    """
+
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return value
+    if NUMBER_MIN <= number <= NUMBER_MAX and u'{0}'.format(number) == value:
+        return int(number)
+    return value
+
+class Categories():
+    """ Codes of the values of a low-cardinality field, every value is kept only once. """
+
+    def __init__(self):
+        """ Initial method. """
+
+        self.values = []
+        self.codes = {}
+
+    def code(self, value):
+        """ Code of the value, a new code is assigned to a value that was not seen yet. """
+
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+    def intern(self, value):
+        """ Shared instance of the value. """
+
+        return self.values[self.code(value)]
+
+    def __len__(self):
+        return len(self.values)
+
+# shared by all rows of the process
+FIELDS = Categories()
+TYPES = Categories()
+LANGUAGES = Categories()
+DATES = Categories()
+# short values of crawled rows, e.g. points, amount of authors and year
+VALUES = Categories()
+
+# columns of crawled rows (see 'MERGED_HEADER' of the crawler) with few distinct values
+RAW_CATEGORIES = ((0, FIELDS), (3, TYPES), (4, DATES), (5, VALUES), (6, VALUES), (7, VALUES))
+
+def intern_raw_row(row):
+    """ Replacing low-cardinality values of a crawled row by their shared instances.
+
+    Arguments:
+        row {list} -- crawled row
+
+    Returns:
+        list -- the same row
+    """
+
+    for index, categories in RAW_CATEGORIES:
+        row[index] = categories.intern(row[index])
+    return row
+
+class NumberColumn():
+    """ Integers in an array, values that are not written as integers are kept aside as text. """
+
+    def __init__(self):
+        self.values = array.array(NUMBER_TYPECODE)
+        self.texts = {}
+
+    def append(self, value):
+        # short digits without leading zeros are the common case
+        if SHORT_NUMBER.match(value):
+            self.values.append(int(value))
+            return
+
+        number = to_number(value)
+        if isinstance(number, int):
+            self.values.append(number)
+        else:
+            self.texts[len(self.values)] = value
+            self.values.append(0)
+
+    def __iter__(self):
+        """ Generator of values as written into CSV. """
+
+        texts = self.texts
+        for index, value in enumerate(self.values):
+            yield texts[index] if index in texts else u'{0}'.format(value)
+
+class CategoryColumn():
+    """ Codes of shared categories in an array. """
+
+    def __init__(self, categories):
+        self.categories = categories
+        self.codes = array.array(CODE_TYPECODE)
+
+    def append(self, value):
+        code = self.categories.code(value)
+        try:
+            self.codes.append(code)
+        except OverflowError:
+            self.codes = array.array(WIDE_CODE_TYPECODE, self.codes)
+            self.codes.append(code)
+
+    def __iter__(self):
+        values = self.categories.values
+        for code in self.codes:
+            yield values[code]
+
+class PublicationBatch():
+    """ Cleaned rows (see 'CLEAN_HEADER' of the cleaner) stored column by column.
+
+    Field, type, language and date are arrays of 2 byte codes, numbers are arrays of 4 byte
+    integers, only authors and titles are kept as strings. All publications of a batch have the
+    same amount of extra columns. Iterating a batch yields cleaned rows, so a batch can be passed
+    wherever a list of rows is expected, and it can be iterated any number of times.
+    """
+
+    def __init__(self, rows=()):
+        """ Initial method.
+
+        Keyword Arguments:
+            rows {iterable} -- cleaned rows to be added (default: {()})
+        """
+
+        self.columns = collections.OrderedDict([('field', CategoryColumn(FIELDS)),
+                                                ('authors', []),
+                                                ('title', []),
+                                                ('pages', NumberColumn()),
+                                                ('language', CategoryColumn(LANGUAGES)),
+                                                ('title_words', NumberColumn()),
+                                                ('type', CategoryColumn(TYPES)),
+                                                ('reported', CategoryColumn(DATES)),
+                                                ('points', NumberColumn()),
+                                                ('local_authors', NumberColumn()),
+                                                ('year', NumberColumn())])
+        self.extra = None
+        self.size = 0
+        self._appends = [column.append for column in self.columns.values()]
+
+        self.extend(rows)
+
+    def append(self, row):
+        """ Adding cleaned row.
+
+        Raises:
+            ValueError -- if the row has a different amount of columns than the rows added so far
+        """
+
+        width = len(self.columns)
+        if self.extra is None:
+            if len(row) < width:
+                raise ValueError('Wrong amount of elements. Expected at least {0}, actual - {1}'.format(width, len(row)))
+            self.extra = [NumberColumn() for _ in range(len(row) - width)]
+            self._appends.extend(column.append for column in self.extra)
+        if len(row) != len(self._appends):
+            raise ValueError('Wrong amount of elements. Expected - {0}, actual - {1}'.format(len(self._appends), len(row)))
+
+        for append, value in zip(self._appends, row):
+            append(value)
+        self.size += 1
+
+    def extend(self, rows):
+        """ Adding all rows of the given iterable. """
+
+        for row in rows:
+            self.append(row)
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        """ Generator of cleaned rows, built column by column. """
+
+        columns = list(self.columns.values()) + (self.extra or [])
+        for row in zip(*columns):
+            yield list(row)
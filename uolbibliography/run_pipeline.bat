@@ -0,0 +1,6 @@
+@echo off
+REM @author Viktor Dmitriyev
+call D:\tmp\python\globvenv\Scripts\activate.bat
+REM python uolbibliography_pipeline.py --urlfile=uolbibliography-test.txt --tap-dir=generated
+python uolbibliography_pipeline.py --urlfile=uolbibliography-full.txt --tap-dir=generated
+pause
\ No newline at end of file
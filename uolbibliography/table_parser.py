@@ -0,0 +1,112 @@
+# coding: utf-8
+#!/usr/bin/env python
+
+__author__      = "Viktor Dmitriyev"
+__license__     = "MIT"
+__version__     = "1.0.0"
+__updated__     = "18.10.2026"
+__created__     = "18.10.2026"
+__description__ = "Fast lxml-based extraction of tables from pages of the 'Hochschulbibliografie' of UOL."
+
+import lxml.html
+from bs4.dammit import UnicodeDammit
+
+# settings
+XPATH_TITLE = '//div[@id="inhalt" and contains(concat(" ", normalize-space(@class), " "), " floatbox ")]//h1'
+XPATH_BIBLIOGRAPHY_TABLE = '//table[contains(concat(" ", normalize-space(@class), " "), " infotabelle ")]'
+XPATH_GRADUATED_PHDS_TABLE = '//table[@class="farbe_lichtblau breite100"]'
+
+class TableParserError(Exception):
+    """ Raised if the page can not be handled by the fast parser. """
+    pass
+
+def parse_document(doc):
+    """ Parsing downloaded HTML with lxml.
+
+    Encoding is detected the same way as BeautifulSoup does it (declared encoding first).
+
+    Args:
+        doc: downloaded HTML
+    Returns:
+        root element of the document
+    """
+
+    if doc is None:
+        raise TableParserError('Empty document')
+
+    markup = UnicodeDammit(doc, is_html=True).unicode_markup
+    if markup is None:
+        raise TableParserError('Encoding of the document could not be detected')
+
+    return lxml.html.document_fromstring(markup)
+
+def element_text(element):
+    """ Text of the element including all descendants, as unicode.
+
+    lxml returns byte strings for ASCII-only text under Python 2, concatenation makes it unicode.
+    """
+
+    return u'' + element.text_content()
+
+def find_title(root):
+    """ Getting text of the 'h1' heading inside of 'div#inhalt'.
+
+    Returns:
+        heading joined by spaces (as 'get_text(separator=u' ')' does) or None
+    """
+
+    h1_tags = root.xpath(XPATH_TITLE)
+    if not h1_tags:
+        return None
+
+    return u' '.join(u'' + text for text in h1_tags[0].itertext())
+
+def find_table_rows(root, xpath):
+    """ Getting data from the first table matching given XPath.
+
+    Rows are extracted exactly as 'BSCrawler.get_data_from_table' does it.
+
+    Args:
+        root: root element of the document
+        xpath: XPath of the table
+    Returns:
+        table as a collection of Python lists
+    """
+
+    tables = root.xpath(xpath)
+    if not tables:
+        raise TableParserError('Table not found: {0}'.format(xpath))
+
+    # html5lib always inserts 'tbody', lxml keeps the markup as it is
+    table_body = tables[0].find('.//tbody')
+    if table_body is None:
+        raise TableParserError('Table without "tbody": {0}'.format(xpath))
+
+    data = []
+    for row in table_body.iter('tr'):
+        data.append([element_text(ele).strip() for ele in row.iter('td')])
+
+    return data
+
+def extract_bibliography_tbl(doc):
+    """ Extracting title and publication table of the UOL's Hochschulbibliografie page.
+
+    Args:
+        doc: downloaded HTML
+    Returns:
+        tuple (title of the page or None, table as a collection of Python lists)
+    """
+
+    root = parse_document(doc)
+    return find_title(root), find_table_rows(root, XPATH_BIBLIOGRAPHY_TABLE)
+
+def extract_graduated_phds(doc):
+    """ Extracting table of graduated PhDs.
+
+    Args:
+        doc: downloaded HTML
+    Returns:
+        table as a collection of Python lists
+    """
+
+    return find_table_rows(parse_document(doc), XPATH_GRADUATED_PHDS_TABLE)
@@ -0,0 +1,190 @@
+# coding: utf-8
+#!/usr/bin/env python
+
+__author__      = "Viktor Dmitriyev"
+__license__     = "MIT"
+__version__     = "1.0.0"
+__updated__     = "18.10.2026"
+__created__     = "18.10.2026"
+__description__ = "Normalized publication titles and an index of citation keys with fuzzy lookup."
+
+import re
+import difflib
+import unicodedata
+
+# settings
+KEY_SEPARATOR = u'\t'
+TITLE_SIMILARITY_THRESHOLD = 0.9
+BLOCKING_TOKENS = 3
+UMLAUTS = {u'ä': u'ae', u'ö': u'oe', u'ü': u'ue', u'ß': u'ss'}
+
+def to_unicode(value):
+    if not isinstance(value, type(u'')):
+        value = value.decode('utf-8')
+    return value
+
+def normalize_title(title):
+    """ Normalizing title: case is folded, umlauts are transcribed, accents and punctuation are removed.
+
+    Arguments:
+        title {str} -- publication title
+
+    Returns:
+        str -- e.g. u'ueber daten und titel' for u'Über Daten und  Titel.'
+    """
+
+    title = to_unicode(title).lower()
+    for umlaut, transcription in UMLAUTS.items():
+        title = title.replace(umlaut, transcription)
+    title = u''.join(c for c in unicodedata.normalize('NFKD', title) if not unicodedata.combining(c))
+    title = re.sub(r'[\W_]+', u' ', title, flags=re.UNICODE)
+    return u' '.join(title.split())
+
+def first_author_surname(authors):
+    """ Extracting normalized surname of the first author.
+
+    Arguments:
+        authors {str} -- authors as in the bibliography, e.g. u'Müller, Hans; Schmidt, P.'
+
+    Returns:
+        str -- e.g. u'mueller', empty string if there are no authors
+    """
+
+    return normalize_surname(re.split(r'[;/]', to_unicode(authors))[0])
+
+def author_surnames(authors):
+    """ Extracting normalized surnames of all authors.
+
+    Arguments:
+        authors {str} -- authors as in the bibliography, e.g. u'Müller, Hans; Schmidt, P.'
+
+    Returns:
+        list -- e.g. [u'mueller', u'schmidt'], empty list if there are no authors
+    """
+
+    return [normalize_surname(author) for author in re.split(r'[;/]', to_unicode(authors)) if author.strip()]
+
+def normalize_surname(author):
+    """ Normalized surname of a single author, given as 'Surname, Name' or 'Name Surname'. """
+
+    return normalize_title(author.split(u',')[0] if u',' in author else (author.split() or [u''])[-1])
+
+def citation_key(title, authors):
+    """ Building key of the citation DB out of normalized title and surname of the first author. """
+
+    return normalize_title(title) + KEY_SEPARATOR + first_author_surname(authors)
+
+def split_key(key):
+    """ Splitting key of the citation DB into normalized title and surname.
+
+    Keys of older citation DBs are raw titles, they are normalized and have no surname.
+
+    Returns:
+        tuple -- (normalized title, surname)
+    """
+
+    title, separator, surname = key.partition(KEY_SEPARATOR)
+    if separator and normalize_title(title) == title and KEY_SEPARATOR not in surname:
+        return title, surname
+    return normalize_title(key), u''
+
+class TitleIndex():
+    """ Index of citation keys by normalized title and first-author surname.
+
+    Publications with the same normalized title but different first authors are kept apart.
+    Titles without an exact match are looked up fuzzily: candidates are taken from blocks of
+    the longest title words and compared by similarity of the whole normalized title. Numbers
+    (parts, volumes, years) have to be the same, e.g. 'Band 1' never matches 'Band 2'.
+    """
+
+    def __init__(self, keys=(), threshold=TITLE_SIMILARITY_THRESHOLD):
+        """ Initial method.
+
+        Keyword Arguments:
+            keys {iterable} -- existing keys of the citation DB (default: {()})
+            threshold {float} -- minimal similarity of titles for a fuzzy match, 1 disables fuzzy lookup (default: {0.9})
+        """
+
+        self.threshold = threshold
+        # (normalized title, surname) -> key
+        self.keys = {}
+        # title word -> set of (normalized title, surname)
+        self.blocks = {}
+
+        for key in keys:
+            self.add(key)
+
+    def _block_tokens(self, title):
+        return sorted(set(title.split()), key=lambda token: (-len(token), token))[:BLOCKING_TOKENS]
+
+    def add(self, key):
+        """ Adding key of the citation DB to the index. """
+
+        entry = split_key(key)
+        if entry in self.keys:
+            return
+
+        self.keys[entry] = key
+        for token in self._block_tokens(entry[0]):
+            self.blocks.setdefault(token, set()).add(entry)
+
+    def _same_author(self, surname, other):
+        return not surname or not other or surname == other
+
+    def _numbers(self, title):
+        return sorted(token for token in title.split() if token.isdigit())
+
+    def lookup(self, title, authors):
+        """ Looking up key of the citation DB for a publication.
+
+        Exact match of title and first author is preferred, then keys of older DBs with the same
+        title, then the most similar title of the same first author above the threshold.
+
+        Arguments:
+            title {str} -- publication title
+            authors {str} -- authors of the publication
+
+        Returns:
+            str -- existing key or None if there is no match
+        """
+
+        title, surname = normalize_title(title), first_author_surname(authors)
+
+        for entry in ((title, surname), (title, u'')):
+            if entry in self.keys:
+                return self.keys[entry]
+
+        if self.threshold >= 1:
+            return None
+
+        candidates = set()
+        for token in self._block_tokens(title):
+            candidates.update(self.blocks.get(token, ()))
+
+        best, best_ratio = None, self.threshold
+        numbers = self._numbers(title)
+        matcher = difflib.SequenceMatcher(None, b=title)
+        for entry in sorted(candidates):
+            if not self._same_author(surname, entry[1]) or self._numbers(entry[0]) != numbers:
+                continue
+            matcher.set_seq1(entry[0])
+            if matcher.real_quick_ratio() < best_ratio or matcher.quick_ratio() < best_ratio:
+                continue
+            ratio = matcher.ratio()
+            if ratio >= best_ratio and (best is None or ratio > best_ratio):
+                best, best_ratio = entry, ratio
+
+        return self.keys[best] if best is not None else None
+
+    def resolve(self, title, authors):
+        """ Looking up key of a publication, a new key is added to the index if there is no match.
+
+        Returns:
+            str -- key of the citation DB
+        """
+
+        key = self.lookup(title, authors)
+        if key is None:
+            key = citation_key(title, authors)
+            self.add(key)
+        return key
@@ -17,12 +17,25 @@ import string
 import urllib2
 import argparse
 import collections
-from time import sleep
+import multiprocessing
+from time import sleep, time
 from pprint import pprint
 from bs4 import BeautifulSoup
+from multiprocessing.pool import ThreadPool
 
 #
 import helpers as hlp
+from csv_writer import StreamingCSVWriter
+from publication import intern_raw_row
+from export_targets import ExportWriter, EXPORT_FORMATS
+from crawl_manifest import CrawlManifest, CRAWL_MANIFEST_NAME
+from http_cache import HTTPCache, HTTP_CACHE_DIR, HTTP_CACHE_MAX_SIZE_MB
+
+# fast parser is optional, html5lib is used without lxml
+try:
+    import table_parser as tp
+except ImportError:
+    tp = None
 
 # importing custom libraries
 try:
@@ -40,19 +53,35 @@ finally:
 
 # settings
 SLEEP_TIME_IN_SECONDS = 4
+URL_GRADUATED_PHDS = 'http://www.uni-oldenburg.de/informatik/studium-lehre/promotion/promotionen/'
+DEFAULT_REQUESTS_PER_SECOND = 1.0
+DEFAULT_MAX_CONCURRENCY_PER_HOST = 4
+MERGED_HEADER = ['Fach', 'Autor/in', 'Titel', 'Typ', 'Meldetag', 'Punktzahl', ' ZahlOldenburgerAutoren', 'Jahr']
+MERGED_FILE_NAME = 'uolbibliography-merged.csv'
 
 class BSCrawler():
     """ Crawling the HTML page and fetching data into table forms."""
 
     UA = 'Mozilla/5.0 (X11; U; FreeBSD i386; WOW64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/51.0.2704.103 Safari/537.36'
 
-    def __init__(self):
+    def __init__(self, http_cache=None, parser='lxml', exports=()):
         """  Initial method that:
 
             - initiates helper class;
             - checks the temp directory existence;
+
+        Args:
+            http_cache: HTTPCache used by 'download_document', None disables caching
+            parser: 'lxml' for the fast table parser or 'html5lib' for the whole-document parse
+            exports: formats the merged data are exported to in addition to CSV, see 'EXPORT_FORMATS'
         """
         self.logger = hlp.custom_logger()
+        self.http_cache = http_cache
+        self.parser = parser
+        self.exports = exports
+
+        if self.parser == 'lxml' and tp is None:
+            self.logger.warning('[w] lxml is not installed, html5lib will be used for parsing')
         self.helper = DirectoryHelper()
         #self.helper.prepare_working_directory()
         try:
@@ -65,64 +94,296 @@ class BSCrawler():
 
         self.logger.info('[i] files will be saved into folder "{0}"'.format(self.work_dir))
 
-    def crawl(self, mergedata, urlfile=None):
+    def crawl(self, mergedata, urlfile=None, workers=1, requests_per_second=DEFAULT_REQUESTS_PER_SECOND,
+              max_per_host=DEFAULT_MAX_CONCURRENCY_PER_HOST, resume=False, parse_processes=0):
         """Method that extracts URLs from given file and process them.
 
+        Args:
+            mergedata: merge rows of all URLs into a single CSV
+            for other arguments see 'crawl_rows'
+        """
+
+        rows = self.crawl_rows(urlfile=urlfile, workers=workers, requests_per_second=requests_per_second,
+                               max_per_host=max_per_host, resume=resume, parse_processes=parse_processes)
+
+        # merging together all processed data
+        if mergedata:
+            self.data_as_csv(rows, os.path.join(self.work_dir, MERGED_FILE_NAME), exports=self.exports)
+        else:
+            for _ in rows:
+                pass
+
+    def crawl_rows(self, urlfile=None, workers=1, requests_per_second=DEFAULT_REQUESTS_PER_SECOND,
+                   max_per_host=DEFAULT_MAX_CONCURRENCY_PER_HOST, resume=False, parse_processes=0):
+        """Extracting URLs from given file and processing them, see 'crawl_partitions'.
+
+        Returns:
+            generator of rows of all URLs as they are merged into a single CSV (see 'valid_rows')
+        """
+
+        partitions = self.crawl_partitions(urlfile=urlfile, workers=workers, requests_per_second=requests_per_second,
+                                           max_per_host=max_per_host, resume=resume, parse_processes=parse_processes)
+        for _, _, rows in partitions:
+            for row in rows:
+                yield row
+
+    def crawl_partitions(self, urlfile=None, workers=1, requests_per_second=DEFAULT_REQUESTS_PER_SECOND,
+                         max_per_host=DEFAULT_MAX_CONCURRENCY_PER_HOST, resume=False, parse_processes=0):
+        """Extracting URLs from given file and processing them, every URL is saved into its own CSV.
+
+        Every finished URL is recorded in the crawl manifest. On resume, URLs that were already
+        crawled are skipped and their rows are read back from the CSV files on disk. Pages whose
+        content didn't change since the previous crawl are not parsed again either.
+
         Args:
             urlfile: file that contains URLS to be processed
+            workers: amount of concurrent downloads, 1 keeps the sequential crawl
+            requests_per_second: politeness budget per host in concurrent mode
+            max_per_host: maximum amount of requests per host in flight in concurrent mode
+            resume: skip URLs completed by the previous crawl
+            parse_processes: amount of processes parsing downloaded pages, 0 parses in the main process
+        Returns:
+            generator of (url, hash of the CSV of the URL, rows) tuples in the order of the URL file,
+            the graduated PhDs are not included
         """
 
         self.logger.info('[i] given URls will be processed')
 
-        # data buffer for all processed URLs
-        data = []
+        # processing graduated PhDs of Computer Science
+        url_graduated = URL_GRADUATED_PHDS
+
+        urls = self.read_urls(urlfile) if urlfile else []
+        urls.append(url_graduated)
+
+        manifest = CrawlManifest(os.path.join(self.work_dir, CRAWL_MANIFEST_NAME), resume=resume)
+        completed = set(url for url in urls if manifest.is_done(url))
+        if completed:
+            self.logger.info('[i] resuming crawl, URLs already completed: {0}'.format(len(completed)))
+
+        pending = [url for url in urls if url not in completed]
+        if workers > 1:
+            limiter = hlp.HostRateLimiter(requests_per_second, max_per_host)
+            documents = self.download_concurrently(pending, workers, limiter)
+        else:
+            documents = self.download_sequentially(pending)
+
+        documents = ((url, doc, manifest.is_unchanged(url, doc)) for url, doc in documents)
+        if parse_processes > 0:
+            documents = self.parse_concurrently(documents, parse_processes)
+        else:
+            documents = ((url, doc, unchanged, None) for url, doc, unchanged in documents)
+
+        # documents arrive in the order of the URL file, so output stays the same in all modes
+        for url in urls:
+            if url in completed:
+                if url != url_graduated:
+                    yield url, manifest.entries[url]['output_hash'], list(self.valid_rows(manifest.load_rows(url)))
+                continue
+
+            _, doc, unchanged, extraction = next(documents)
+
+            # output file may have been overwritten meanwhile by a page of the same name
+            if unchanged and manifest.is_unchanged(url, doc):
+                self.logger.info('[i] content is unchanged, rows of the previous crawl are used: {0}'.format(url))
+                hlp.metrics.increment('crawler_pages_unchanged')
+                manifest.record_unchanged(url)
+                if url != url_graduated:
+                    yield url, manifest.entries[url]['output_hash'], list(self.valid_rows(manifest.load_rows(url)))
+                continue
+
+            if url == url_graduated:
+                extracted = self.wait_for_extraction(url, extraction)
+                if extracted is None:
+                    with hlp.metrics.timer('crawler_parse_seconds', url=url):
+                        target_file = self.process_uol_graduated_phds(doc=doc, output_file_name='cs-graduated-phds')
+                else:
+                    target_file = self.process_uol_graduated_phds(doc=doc, output_file_name='cs-graduated-phds', extracted=extracted)
+                manifest.record_done(url, doc, None, target_file)
+                continue
+
+            try:
+                extracted = self.wait_for_extraction(url, extraction)
+                if extracted is None:
+                    with hlp.metrics.timer('crawler_parse_seconds', url=url):
+                        target_file, cleaned_data = self.parse_uol_bibliography_tbl(doc)
+                else:
+                    target_file, cleaned_data = self.parse_uol_bibliography_tbl(doc, extracted=extracted)
+                rows = self.data_as_csv(cleaned_data, target_file)
+                manifest.record_done(url, doc, rows, target_file)
+                hlp.metrics.increment('crawler_rows', rows)
+            except Exception as ex:
+                self.logger.error('[e] exception: {0}, arguments: {1}'.format(ex.message, ex.args))
+                hlp.metrics.increment('crawler_errors', stage='parse')
+                manifest.record_failed(url, ex)
+                continue
+
+            yield url, manifest.entries[url]['output_hash'], list(self.valid_rows(cleaned_data))
 
-        if urlfile:
-             with codecs.open(urlfile, 'r', encoding='utf8') as f_urls:
-                for line in f_urls:
-                    stripped = line.strip()
-                    if not stripped.startswith('#') and not len(stripped) == 0 and stripped.startswith('http'):
-                        self.logger.info('[i] following URL is going to be parsed:\n {0}'.format(stripped))
+        self.logger.info('[i] given URls were processed')
 
-                        try:
-                            doc = self.download_document(stripped)
-                            data += self.process_uol_bibliography_tbl(doc)
-                            sleep(SLEEP_TIME_IN_SECONDS)
-                        except Exception as ex:
-                            self.logger.error('[e] exception: {0}, arguments: {1}'.format(ex.message, ex.args))
+    def read_urls(self, urlfile):
+        """ Reading URLs to be processed from the given file.
 
-                    # else:
-                    #     self.logger.info('[i] following URL was ignored:\n {0}'.format(stripped))
+        Args:
+            urlfile: file that contains URLS to be processed
+        Returns:
+            list of URLs, comments and empty lines are skipped
+        """
 
-        # processing graduated PhDs of Computer Science
-        url_graduated = 'http://www.uni-oldenburg.de/informatik/studium-lehre/promotion/promotionen/'
-        sleep(SLEEP_TIME_IN_SECONDS)
-        doc_gradauted = self.download_document(url_graduated)
-        self.process_uol_graduated_phds(doc=doc_gradauted, output_file_name='cs-graduated-phds')
+        urls = []
+        with codecs.open(urlfile, 'r', encoding='utf8') as f_urls:
+            for line in f_urls:
+                stripped = line.strip()
+                if not stripped.startswith('#') and not len(stripped) == 0 and stripped.startswith('http'):
+                    urls.append(stripped)
 
-        # merging together all processed data
-        if mergedata:
-            csv = self.data_as_csv(data)
-            self.helper.save_file(os.path.join(self.work_dir, 'uolbibliography-merged.csv'), csv)
+        return urls
 
-        self.logger.info('[i] given URls were processed')
+    def download_sequentially(self, urls):
+        """ Downloading URLs one by one with a fixed sleep between them.
+
+        Args:
+            urls: URLs to be downloaded
+        Returns:
+            generator of (url, downloaded HTML) tuples
+        """
+
+        for index, url in enumerate(urls):
+            if index > 0:
+                sleep(SLEEP_TIME_IN_SECONDS)
+            self.logger.info('[i] following URL is going to be parsed:\n {0}'.format(url))
+            yield url, self.download_document(url)
+
+    def download_concurrently(self, urls, workers, limiter):
+        """ Downloading URLs with several requests in flight.
+
+        Args:
+            urls: URLs to be downloaded
+            workers: amount of download threads
+            limiter: politeness budget applied per host
+        Returns:
+            generator of (url, downloaded HTML) tuples in the order of given URLs
+        """
+
+        def download(url):
+            with limiter.limit(url):
+                self.logger.info('[i] following URL is going to be parsed:\n {0}'.format(url))
+                return url, self.download_document(url)
+
+        # at most 2 pages per thread are kept in memory, the rest waits until the consumer catches up
+        pool = ThreadPool(workers)
+        pending = collections.deque()
+        try:
+            for url in urls:
+                pending.append(pool.apply_async(download, (url,)))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().get()
+            while pending:
+                yield pending.popleft().get()
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def parse_concurrently(self, documents, processes):
+        """ Parsing downloaded pages in a process pool while downloading continues.
+
+        The amount of pages waiting for parsing is bounded, so the downloading side is slowed down
+        if parsing can't keep up.
+
+        Args:
+            documents: generator of (url, downloaded HTML, content is unchanged) tuples
+            processes: amount of parsing processes
+        Returns:
+            generator of (url, downloaded HTML, content is unchanged, AsyncResult of extraction) tuples
+            in the order of given documents, unchanged documents are not parsed
+        """
+
+        pool = multiprocessing.Pool(processes, initializer=init_parse_worker, initargs=(self.parser,))
+        pending = collections.deque()
+        try:
+            for url, doc, unchanged in documents:
+                kind = 'graduated' if url == URL_GRADUATED_PHDS else 'bibliography'
+                extraction = None if unchanged else pool.apply_async(parse_in_worker, (doc, kind))
+                pending.append((url, doc, unchanged, extraction))
+                if len(pending) >= 2 * processes:
+                    yield pending.popleft()
+            while pending:
+                yield pending.popleft()
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def wait_for_extraction(self, url, extraction):
+        """ Waiting for the table extracted by the parsing process and recording its parse time.
+
+        Args:
+            url: URL of the parsed page
+            extraction: AsyncResult of 'parse_in_worker', None if the page is parsed in the main process
+        Returns:
+            extracted table, None if the page is parsed in the main process
+        """
+
+        if extraction is None:
+            return None
+
+        extracted, seconds = extraction.get()
+        hlp.metrics.observe('crawler_parse_seconds', seconds, url=url)
+        return extracted
 
     def download_document(self, url):
         """ Downloading HTML page and storing inside string.
 
+        Responses are revalidated against the HTTP cache (if configured) with a conditional GET,
+        so unchanged pages are served from disk after a '304 Not Modified'.
+
         Args:
             url: URL to be downloaded
         Returns:
             downloaded HTML
         """
 
+        with hlp.metrics.timer('crawler_download_seconds', url=url):
+            html = self._download_document(url)
+
+        if html is not None:
+            hlp.metrics.increment('crawler_download_bytes', len(html), url=url)
+        return html
+
+    def _download_document(self, url):
         html = None
+        cached = self.http_cache.lookup(url) if self.http_cache else None
+
+        if self.http_cache and self.http_cache.offline:
+            if cached is None:
+                self.logger.error('[e] URL is not cached, skipped in offline mode: {0}'.format(url))
+                hlp.metrics.increment('crawler_http_cache_misses')
+                return None
+            self.http_cache.touch(url)
+            hlp.metrics.increment('crawler_http_cache_hits')
+            return cached[0]
+
+        headers = {'User-Agent': self.UA}
+        if cached is not None:
+            headers.update(self.http_cache.validators(cached[1]))
+
         try:
-            req = urllib2.Request(url=url, headers={'User-Agent': self.UA})
+            req = urllib2.Request(url=url, headers=headers)
             hdl = urllib2.urlopen(req)
             html = hdl.read()
+            if self.http_cache:
+                self.http_cache.store(url, html, hdl.info())
+                hlp.metrics.increment('crawler_http_cache_misses')
+        except urllib2.HTTPError as ex:
+            if ex.code == 304 and cached is not None:
+                self.http_cache.touch(url)
+                hlp.metrics.increment('crawler_http_cache_hits')
+                html = cached[0]
+            else:
+                self.logger.error('[e] exception: {0}, arguments: {1}'.format(ex.message, ex.args))
+                hlp.metrics.increment('crawler_errors', stage='download')
         except Exception as ex:
             self.logger.error('[e] exception: {0}, arguments: {1}'.format(ex.message, ex.args))
+            hlp.metrics.increment('crawler_errors', stage='download')
 
         return html
 
@@ -189,33 +450,110 @@ class BSCrawler():
 
         return row
 
-    def data_as_csv(self, data, size = 8):
-        """ Getting data as CSV. """
+    def valid_rows(self, data, size = 8):
+        """ Rows of the table that are saved as CSV, with decoded abbreviations and shared
+        instances of repeated values (see 'intern_raw_row').
 
-        resulting_csv = ''
-        DELIMETER = '","'
-
-        # adding header
-        header_values = ['Fach', 'Autor/in', 'Titel', 'Typ', 'Meldetag', 'Punktzahl', ' ZahlOldenburgerAutoren', 'Jahr']
-        header_row = DELIMETER.join(header_values)
-        resulting_csv = '"' + header_row + '"' + '\n'
+        Args:
+            data: table as a collection of Python lists
+        Returns:
+            generator of rows
+        """
 
         for row in data:
             if len(row) == size:
-                csv_row = DELIMETER.join(value.replace('"', "") for value in self.decode_abbreviations(row))
-                resulting_csv +=  '"' + csv_row + '"' + '\n'
+                yield intern_raw_row(self.decode_abbreviations(row))
 
-        return resulting_csv
+    def data_as_csv(self, data, f_output, size = 8, exports=()):
+        """ Saving data as CSV.
 
-    def process_uol_graduated_phds(self, doc, output_file_name = None):
-        """ Processing given HTML to extract graduated PhDs.
+        Args:
+            data: table as a collection of Python lists
+            f_output: output file name
+            exports: formats the data are exported to next to the CSV, see 'EXPORT_FORMATS'
+        Returns:
+            amount of rows written
+        """
+
+        with ExportWriter(f_output, MERGED_HEADER, exports, logger=self.logger) as writer:
+            writer.write_rows(self.valid_rows(data, size))
+
+        return writer.rows_written
+
+    def use_fast_parser(self):
+        """ Checking whether the fast lxml-based parser is selected and available. """
+
+        return self.parser == 'lxml' and tp is not None
+
+    def extract_bibliography_tbl(self, doc):
+        """ Extracting title and publication table of the UOL's Hochschulbibliografie page.
+
+        The fast parser is tried first, html5lib is used for pages the fast parser can't handle.
 
         Args:
             doc:    document to be processed
+        Returns:
+            tuple (title of the page or None, table as a collection of Python lists)
         """
 
+        if self.use_fast_parser():
+            try:
+                return tp.extract_bibliography_tbl(doc)
+            except Exception as ex:
+                self.logger.warning('[w] fast parser failed, falling back to html5lib: {0}'.format(ex))
+
         bs_html = BeautifulSoup(doc, 'html5lib')
 
+        # text data for debugging, uncomment if needed
+        # prettified_html = bs_html.prettify()
+        # self.helper.save_file(os.path.join(self.work_dir, 'debug.html'), prettified_html)
+        # text_from_html = bs_html.get_text()
+        # self.helper.save_file(os.path.join(self.work_dir, 'debug.txt'), text_from_html)
+
+        title = None
+        div_tag = bs_html.find('div', attrs={'id' : 'inhalt', 'class':'floatbox'})
+        if div_tag is not None:
+            h1_tag = div_tag.find('h1')
+            if h1_tag is not None:
+                title = h1_tag.get_text(separator=u' ')
+
+        # getting data from HTML table
+        table = bs_html.find('table', attrs={'class':'infotabelle'})
+        table_body = table.find('tbody')
+
+        return title, self.get_data_from_table(table_body)
+
+    def extract_graduated_phds(self, doc):
+        """ Extracting table of graduated PhDs, see 'extract_bibliography_tbl'.
+
+        Args:
+            doc:    document to be processed
+        Returns:
+            table as a collection of Python lists
+        """
+
+        if self.use_fast_parser():
+            try:
+                return tp.extract_graduated_phds(doc)
+            except Exception as ex:
+                self.logger.warning('[w] fast parser failed, falling back to html5lib: {0}'.format(ex))
+
+        bs_html = BeautifulSoup(doc, 'html5lib')
+        table = bs_html.find('table', attrs={'class':'farbe_lichtblau breite100'})
+        table_body = table.find('tbody')
+
+        return self.get_data_from_table(table_body)
+
+    def process_uol_graduated_phds(self, doc, output_file_name = None, extracted = None):
+        """ Processing given HTML to extract graduated PhDs.
+
+        Args:
+            doc:    document to be processed
+            extracted: result of 'extract_graduated_phds' if the document was already parsed
+        Returns:
+            path to the resulting CSV file
+        """
+
         # getting name of the file from HTML
         if output_file_name is None:
             output_file_name = self.helper.gen_file_name(extention='')
@@ -224,18 +562,14 @@ class BSCrawler():
         output_file_name = self.validate_file_name(output_file_name)
 
         # getting data from HTML table
-        table = bs_html.find('table', attrs={'class':'farbe_lichtblau breite100'})
-        table_body = table.find('tbody')
-        data = self.get_data_from_table(table_body)
+        data = extracted if extracted is not None else self.extract_graduated_phds(doc)
 
         # data from list to CSV
-        csv_data = ''
-        for row in data:
-            fow_as_csv = '","'.join(row)
-            fow_as_csv = '"' + fow_as_csv + '"' + '\n'
-            csv_data += fow_as_csv
+        target_file = os.path.join(self.work_dir, output_file_name + '.csv')
+        with StreamingCSVWriter(target_file) as writer:
+            writer.write_rows(data)
 
-        self.helper.save_file(os.path.join(self.work_dir, output_file_name + '.csv'), csv_data)
+        return target_file
 
     def process_uol_bibliography_tbl(self, doc, output_file_name = None):
         """ Processing given HTML to extract publication information from UOL's Hochschulbibliografie.
@@ -246,6 +580,21 @@ class BSCrawler():
             table as a collection of Python lists
         """
 
+        target_file, cleaned_data = self.parse_uol_bibliography_tbl(doc, output_file_name)
+        self.data_as_csv(cleaned_data, target_file)
+
+        return cleaned_data
+
+    def parse_uol_bibliography_tbl(self, doc, output_file_name = None, extracted = None):
+        """ Extracting publication information from UOL's Hochschulbibliografie without saving it.
+
+        Args:
+            doc:    document to be processed
+            extracted: result of 'extract_bibliography_tbl' if the document was already parsed
+        Returns:
+            tuple (path to the resulting CSV file, table as a collection of Python lists)
+        """
+
         def is_valid_row(data_chunk):
             """ Validating any particular row given as input.
 
@@ -260,55 +609,73 @@ class BSCrawler():
             if 'Gesamtpunkte' in data_chunk[0]: return False
             return True
 
-        bs_html = BeautifulSoup(doc, 'html5lib')
+        title, data = extracted if extracted is not None else self.extract_bibliography_tbl(doc)
 
         # getting name of the file from HTML
         if output_file_name is None:
-            div_tag = bs_html.find('div', attrs={'id' : 'inhalt', 'class':'floatbox'})
-            h1_tag = div_tag.find('h1')
-            if h1_tag is not None:
-                output_file_name = h1_tag.get_text(separator=u' ')
+            if title is not None:
+                output_file_name = title
             else:
                 output_file_name = self.helper.gen_file_name(extention='')
 
         # validating file name
         output_file_name = self.validate_file_name(output_file_name)
 
-        # getting data from HTML table
-        table = bs_html.find('table', attrs={'class':'infotabelle'})
-        table_body = table.find('tbody')
-        data = self.get_data_from_table(table_body)
-
         # cleaning table data
         cleaned_data = []
         for row in data:
             if is_valid_row(row):
                 cleaned_data.append(row)
 
-        csv_data = self.data_as_csv(cleaned_data)
-
-        # text data for debugging, uncomment if needed
-        # prettified_html = bs_html.prettify()
-        # self.helper.save_file(os.path.join(self.work_dir, output_file_name + '.html'), prettified_html)
-        # text_from_html = bs_html.get_text()
-        # self.helper.save_file(os.path.join(self.work_dir, output_file_name + '.txt'), text_from_html)
-
         # get proper file name length
         target_file = os.path.join(self.work_dir, output_file_name + '.csv')
         if len(target_file) > 250:
             target_file = target_file[:250] + '.csv'
             #self.logger.info(target_file)
 
-        self.helper.save_file(target_file, csv_data)
+        return target_file, cleaned_data
 
-        return cleaned_data
+# crawler of the parsing process, see 'BSCrawler.parse_concurrently'
+_parse_worker = None
+
+def init_parse_worker(parser):
+    """ Initializing parsing process of the pool. """
+
+    global _parse_worker
+    _parse_worker = BSCrawler(parser=parser)
+
+def parse_in_worker(doc, kind):
+    """ Extracting table from the document inside of the parsing process.
 
-def main(urlfile, mergedata):
+    Args:
+        doc:    document to be processed
+        kind:   'bibliography' or 'graduated'
+    Returns:
+        tuple (extracted table, parse time in seconds), the parse time is recorded by the crawling process
+    """
 
-    crawler = BSCrawler()
+    started = time()
+    if kind == 'graduated':
+        extracted = _parse_worker.extract_graduated_phds(doc)
+    else:
+        extracted = _parse_worker.extract_bibliography_tbl(doc)
+    return extracted, time() - started
+
+def main(urlfile, mergedata, workers, requests_per_second, max_per_host, cache_dir, cache_size, offline, parser, resume, parse_processes,
+         exports=(), metrics=None, prometheus_textfile=None):
+
+    hlp.init_metrics('crawler', metrics, prometheus_textfile)
+
+    http_cache = None
+    if cache_dir:
+        http_cache = HTTPCache(cache_dir=cache_dir, max_size_mb=cache_size, offline=offline)
+
+    crawler = BSCrawler(http_cache=http_cache, parser=parser, exports=exports)
 
     if file is not None:
-        crawler.crawl(urlfile=urlfile, mergedata=mergedata)
+        crawler.crawl(urlfile=urlfile, mergedata=mergedata, workers=workers,
+                      requests_per_second=requests_per_second, max_per_host=max_per_host, resume=resume,
+                      parse_processes=parse_processes)
 
 if __name__ == '__main__':
 
@@ -329,7 +696,107 @@ if __name__ == '__main__':
         help='setting this option starts merging all CSV into one')
     parser.set_defaults(mergedata=False)
 
+    # concurrent crawling
+    parser.add_argument(
+        '--workers',
+        type=int,
+        help='amount of concurrent downloads, 1 crawls sequentially with a fixed sleep (default 1)')
+    parser.set_defaults(workers=1)
+
+    parser.add_argument(
+        '--rate',
+        dest='requests_per_second',
+        type=float,
+        help='maximum requests per second sent to a single host in concurrent mode (default {0})'.format(DEFAULT_REQUESTS_PER_SECOND))
+    parser.set_defaults(requests_per_second=DEFAULT_REQUESTS_PER_SECOND)
+
+    parser.add_argument(
+        '--max-per-host',
+        dest='max_per_host',
+        type=int,
+        help='maximum requests to a single host in flight in concurrent mode (default {0})'.format(DEFAULT_MAX_CONCURRENCY_PER_HOST))
+    parser.set_defaults(max_per_host=DEFAULT_MAX_CONCURRENCY_PER_HOST)
+
+    # HTTP cache
+    parser.add_argument(
+        '--cache-dir',
+        dest='cache_dir',
+        help='directory of the persistent HTTP cache (default "{0}")'.format(HTTP_CACHE_DIR))
+    parser.set_defaults(cache_dir=HTTP_CACHE_DIR)
+
+    parser.add_argument(
+        '--no-cache',
+        dest='cache_dir',
+        action='store_const',
+        const=None,
+        help='disables the HTTP cache, every page is downloaded in full')
+
+    parser.add_argument(
+        '--cache-size',
+        dest='cache_size',
+        type=int,
+        help='size cap of the HTTP cache in MB, least recently used pages are evicted (default {0})'.format(HTTP_CACHE_MAX_SIZE_MB))
+    parser.set_defaults(cache_size=HTTP_CACHE_MAX_SIZE_MB)
+
+    parser.add_argument(
+        '--offline',
+        dest='offline',
+        action='store_true',
+        help='serves pages only from the HTTP cache without network access')
+    parser.set_defaults(offline=False)
+
+    # HTML parser
+    parsers = ('lxml', 'html5lib')
+    parser.add_argument(
+        '--parser',
+        choices=parsers,
+        help='fast "lxml" table parser, falls back to "html5lib" for pages it can\'t handle (default "lxml")')
+    parser.set_defaults(parser='lxml')
+
+    parser.add_argument(
+        '--parse-processes',
+        dest='parse_processes',
+        type=int,
+        help='amount of processes parsing downloaded pages while downloading continues, 0 parses in the main process (default 0)')
+    parser.set_defaults(parse_processes=0)
+
+    # resuming
+    parser.add_argument(
+        '--resume',
+        dest='resume',
+        action='store_true',
+        help='skips URLs completed by the previous crawl (see "{0}") and rebuilds merged CSV from files on disk'.format(CRAWL_MANIFEST_NAME))
+    parser.set_defaults(resume=False)
+
+    # export targets
+    parser.add_argument(
+        '--export-to',
+        dest='exports',
+        nargs='+',
+        choices=EXPORT_FORMATS,
+        help='exports merged data also to the given formats next to the merged CSV, Parquet and Arrow require "pyarrow"')
+    parser.set_defaults(exports=[])
+
+    # instrumentation
+    parser.add_argument(
+        '--metrics',
+        dest='metrics',
+        help='JSON file with timings and counters of the run, written at exit (default "logs/metrics-crawler.json")')
+    parser.set_defaults(metrics=None)
+
+    parser.add_argument(
+        '--prometheus-textfile',
+        dest='prometheus_textfile',
+        help='additionally writes timings and counters in the Prometheus text format into this file')
+    parser.set_defaults(prometheus_textfile=None)
+
     # parse input parameters
     args = parser.parse_args()
 
-    main(args.urlfile, args.mergedata)
+    if args.offline and not args.cache_dir:
+        print('[x] offline mode requires the HTTP cache')
+        exit(0)
+
+    main(args.urlfile, args.mergedata, args.workers, args.requests_per_second, args.max_per_host,
+         args.cache_dir, args.cache_size, args.offline, args.parser, args.resume, args.parse_processes,
+         args.exports, args.metrics, args.prometheus_textfile)
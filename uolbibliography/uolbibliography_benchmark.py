@@ -0,0 +1,552 @@
+# coding: utf-8
+#!/usr/bin/env python
+
+__author__      = "Viktor Dmitriyev"
+__license__     = "MIT"
+__version__     = "1.0.0"
+__updated__     = "18.10.2026"
+__created__     = "18.10.2026"
+__description__ = "Benchmark of crawler, cleaner, citator and plotter on synthetic data of 'Hochschulbibliografie' (Universities Publication Bibliography) of UOL."
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import hashlib
+import argparse
+import platform
+import threading
+import multiprocessing
+
+# peak memory is not measured without 'resource' (Windows)
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlparse, parse_qs
+except ImportError:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlparse, parse_qs
+
+#
+import helpers as hlp
+from csv_writer import read_rows
+
+# settings
+BENCHMARK_DIR = 'benchmark'
+BENCHMARK_RESULTS_NAME = 'benchmark-results.json'
+BENCHMARK_SEED = 0
+DEFAULT_ROWS = [1000]
+DEFAULT_ROWS_PER_PAGE = 1000
+DEFAULT_CITE_ROWS = 100
+# stage is reported as regression if its throughput drops below this share of the previous run
+REGRESSION_THRESHOLD = 0.8
+STAGES = ['download', 'parse', 'clean', 'cite', 'merge', 'plot']
+
+FACHS = ['Informatik', 'Mathematik', 'Physik', 'Chemie', 'Biologie', 'Psychologie', 'Geschichte',
+         'Germanistik', 'Anglistik', 'Wirtschaftswissenschaften', 'Sozialwissenschaften', 'Sportwissenschaft']
+TYPES = ['AU', 'MO', 'ZS', 'SW']
+SURNAMES = [u'Müller', u'Schmidt', u'Schneider', u'Fischer', u'Weber', u'Meyer', u'Wagner', u'Becker', u'Schulz',
+            u'Hoffmann', u'Schäfer', u'Koch', u'Bauer', u'Richter', u'Klein', u'Wolf', u'Schröder', u'Neumann']
+FIRST_NAMES = [u'Anna', u'Hans', u'Jürgen', u'Maria', u'Peter', u'Sabine', u'Thomas', u'Ute', u'Viktor', u'Jan']
+WORDS = {'de': [u'Analyse', u'der', u'die', u'und', u'Entwicklung', u'von', u'Daten', u'im', u'Unterricht', u'Schule',
+                u'Geschichte', u'zur', u'Bedeutung', u'Systeme', u'für', u'Forschung', u'Untersuchung', u'über',
+                u'Wirkung', u'Gesellschaft', u'Sprache', u'Nordwestdeutschland', u'Beiträge', u'Oldenburg'],
+         'en': [u'analysis', u'of', u'the', u'and', u'development', u'data', u'in', u'learning', u'systems', u'for',
+                u'research', u'on', u'effects', u'society', u'language', u'a', u'study', u'evaluation', u'model',
+                u'networks', u'energy', u'towards', u'approach', u'with']}
+
+def escape_html(text):
+    return text.replace(u'&', u'&amp;').replace(u'<', u'&lt;').replace(u'>', u'&gt;').replace(u'"', u'&quot;')
+
+def synthetic_row(rnd, fach):
+    """ Generating values of one publication as the crawler extracts them from the table. """
+
+    authors = u'; '.join(u'{0}, {1}'.format(rnd.choice(SURNAMES), rnd.choice(FIRST_NAMES))
+                         for _ in range(rnd.randint(1, 4)))
+    words = WORDS[rnd.choice(['de', 'en'])]
+    title = u' '.join(rnd.choice(words) for _ in range(rnd.randint(3, 12)))
+    title = u'{0}{1} ({2} S.)'.format(title[0].upper(), title[1:], rnd.randint(1, 400))
+    year = rnd.randint(2008, 2016)
+
+    return [fach, authors, title, rnd.choice(TYPES), u'{0:02d}.{1:02d}.{2}'.format(rnd.randint(1, 28), rnd.randint(1, 12), year),
+            u'{0}'.format(rnd.randint(0, 10)), u'{0}'.format(rnd.randint(1, 5)), u'{0}'.format(year)]
+
+def generate_page(index, rows, seed=BENCHMARK_SEED):
+    """ Generating page shaped like the 'table.infotabelle' markup of the Hochschulbibliografie.
+
+    Arguments:
+        index {int} -- index of the page, pages with same index and seed are identical
+        rows {int} -- amount of publications on the page
+
+    Keyword Arguments:
+        seed {int} -- seed of the generator (default: {0})
+
+    Returns:
+        bytes -- UTF-8 encoded HTML
+    """
+
+    rnd = random.Random(seed * 1000003 + index)
+    fach = FACHS[index % len(FACHS)]
+
+    html_rows = []
+    # the cleaner expects the '%fach%' row at the top of merged data
+    if index == 0:
+        html_rows.append(u'<tr><td>%fach%</td><td>%autor%</td><td>%titel%</td><td>%typ%</td><td>%meldetag%</td><td>%punkte%</td><td>%zahl%</td><td>%jahr%</td></tr>')
+
+    points = 0
+    for _ in range(rows):
+        row = synthetic_row(rnd, fach)
+        points += int(row[5])
+        html_rows.append(u'<tr>' + u''.join(u'<td>{0}</td>'.format(escape_html(value)) for value in row) + u'</tr>')
+    html_rows.append(u'<tr><td colspan="8">Gesamtpunkte: {0}</td></tr>'.format(points))
+
+    page = (u'<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>Hochschulbibliografie</title></head><body>'
+            u'<div id="inhalt" class="floatbox"><h1>Hochschulbibliografie {0} - Seite {1}</h1>'
+            u'<table class="infotabelle"><thead><tr><th>Fach</th><th>Autor/in</th><th>Titel</th><th>Typ</th>'
+            u'<th>Meldetag</th><th>Punktzahl</th><th>Oldenburger Autoren</th><th>Jahr</th></tr></thead>'
+            u'<tbody>{2}</tbody></table></div></body></html>').format(fach, index, u'\n'.join(html_rows))
+
+    return page.encode('utf-8')
+
+def crossref_response(query):
+    """ Response of the Crossref stand-in, derived from the query only. """
+
+    if isinstance(query, bytes):
+        query = query.decode('utf-8')
+
+    digest = hashlib.sha1(query.encode('utf-8')).hexdigest()
+    return {'status': 'ok',
+            'message': {'items': [{'DOI': '10.5555/{0}'.format(digest[:12]),
+                                   'title': [query[:80]],
+                                   'score': 50.0,
+                                   'is-referenced-by-count': int(digest[:4], 16) % 500}]}}
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+class BenchmarkRequestHandler(BaseHTTPRequestHandler):
+    """ Serving generated pages under '/page/<index>' and a Crossref stand-in under '/works'. """
+
+    def _send(self, body, content_type):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+
+        if url.path.startswith('/page/') and url.path[len('/page/'):].isdigit():
+            path = os.path.join(self.server.pages_dir, 'page-{0}.html'.format(url.path[len('/page/'):]))
+            if os.path.isfile(path):
+                with open(path, 'rb') as f_page:
+                    self._send(f_page.read(), 'text/html; charset=utf-8')
+                return
+
+        if url.path == '/works':
+            query = parse_qs(url.query).get('query', [''])[0]
+            self._send(json.dumps(crossref_response(query)).encode('utf-8'), 'application/json')
+            return
+
+        self.send_error(404)
+
+    def log_message(self, format, *args):
+        pass
+
+def peak_memory_mb():
+    """ Peak resident memory of the current process in MB, None if it can't be measured. """
+
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024.0 * 1024 if sys.platform == 'darwin' else 1024.0), 1)
+
+def count_rows(f_input):
+    return sum(1 for _ in read_rows(f_input))
+
+def stage_download(urls):
+    """ Downloading all pages with 'BSCrawler.download_document'. """
+
+    from uolbibliography import BSCrawler
+
+    crawler = BSCrawler()
+    total_bytes = 0
+    for url in urls:
+        doc = crawler.download_document(url)
+        if doc is None:
+            raise IOError('Page was not downloaded: {0}'.format(url))
+        total_bytes += len(doc)
+
+    return {'items': len(urls), 'unit': 'pages', 'bytes': total_bytes}
+
+def stage_parse(page_files, f_merged):
+    """ Extracting publications of every page with 'BSCrawler.process_uol_bibliography_tbl' and merging them. """
+
+    from uolbibliography import BSCrawler
+
+    crawler = BSCrawler()
+    crawler.work_dir = os.path.join(os.path.dirname(f_merged), 'pages-csv')
+    if not os.path.exists(crawler.work_dir):
+        os.makedirs(crawler.work_dir)
+
+    data = []
+    total_bytes = 0
+    for index, page_file in enumerate(page_files):
+        with open(page_file, 'rb') as f_page:
+            doc = f_page.read()
+        total_bytes += len(doc)
+        data += crawler.process_uol_bibliography_tbl(doc, output_file_name='page-{0}'.format(index))
+
+    rows = crawler.data_as_csv(data, f_merged)
+    return {'items': rows, 'unit': 'rows', 'bytes': total_bytes}
+
+def stage_clean(f_merged, f_clean, workers):
+    """ Cleaning merged data with a fresh language cache. """
+
+    from uolbibliography_cleaner import UOLBibliographyDataCleaner
+
+    cleaner = UOLBibliographyDataCleaner(language_cache=None, workers=workers)
+    cleaner.clean(f_input=f_merged, f_output=f_clean)
+    if not os.path.isfile(f_clean):
+        raise IOError('Cleaned data were not written: {0}'.format(f_clean))
+
+    return {'items': count_rows(f_merged), 'unit': 'rows', 'bytes': os.path.getsize(f_merged)}
+
+def stage_cite(f_sample, crossref_url, workers):
+    """ Crawling Crossref citations of sampled publications from the local Crossref stand-in. """
+
+    from uolbibliography_citator import UOLBibliographyCitator
+
+    citator = UOLBibliographyCitator(mailto='benchmark@example.org', workers=workers, crossref_cache=None,
+                                     sources=['CR'], crossref_url=crossref_url)
+    citator.crawl_citations(f_input=f_sample)
+
+    return {'items': count_rows(f_sample), 'unit': 'rows', 'bytes': os.path.getsize(f_sample)}
+
+def stage_merge(f_clean):
+    """ Merging cleaned data with the citation DB. """
+
+    from uolbibliography_citator import UOLBibliographyCitator
+
+    citator = UOLBibliographyCitator(crossref_cache=None)
+    citator.merge_citations(f_input=f_clean)
+
+    return {'items': count_rows(f_clean), 'unit': 'rows', 'bytes': os.path.getsize(f_clean)}
+
+def stage_plot(f_clean, workers):
+    """ Rendering all figures of cleaned data. """
+
+    import uolbibliography_plotter as plotter
+
+    plotter.UOLBibliographyDataPlotter(workers=workers, columnar_cache=False, force=True).plotter(f_input=f_clean)
+    figures = [file_name for file_name in os.listdir(plotter.PLOTS_DIR) if file_name.endswith('.png')]
+
+    return {'items': len(figures), 'unit': 'figures', 'bytes': os.path.getsize(f_clean)}
+
+STAGE_FUNCTIONS = {'download': stage_download,
+                   'parse': stage_parse,
+                   'clean': stage_clean,
+                   'cite': stage_cite,
+                   'merge': stage_merge,
+                   'plot': stage_plot}
+
+def run_stage_in_process(queue, name, args):
+    """ Running stage inside of a child process, so peak memory is measured for this stage only. """
+
+    try:
+        started = time.time()
+        result = STAGE_FUNCTIONS[name](*args)
+        result['seconds'] = round(time.time() - started, 3)
+        result['peak_memory_mb'] = peak_memory_mb()
+        result['status'] = 'ok'
+    except Exception as ex:
+        result = {'status': 'failed', 'error': repr(ex)}
+
+    queue.put(result)
+
+class UOLBibliographyBenchmark():
+    """ Benchmark of all stages on synthetic pages served from a local HTTP server.
+
+    Every stage runs in its own process and reports its duration, throughput and peak memory.
+    Runs are appended to a JSON file and compared with the previous run of the same size.
+    """
+
+    def __init__(self, work_dir=BENCHMARK_DIR, rows_per_page=DEFAULT_ROWS_PER_PAGE, cite_rows=DEFAULT_CITE_ROWS,
+                 workers=1, seed=BENCHMARK_SEED):
+        """ Initial method.
+
+        Keyword Arguments:
+            work_dir {str} -- directory of generated data and outputs of stages (default: {'benchmark'})
+            rows_per_page {int} -- amount of publications per generated page (default: {1000})
+            cite_rows {int} -- amount of publications which citations are crawled (default: {100})
+            workers {int} -- amount of workers of the cleaner, the plotter and of Crossref threads (default: {1})
+            seed {int} -- seed of the generator (default: {0})
+        """
+
+        self.logger = hlp.custom_logger(logger_name='benchmark')
+        self.work_dir = os.path.abspath(work_dir)
+        self.rows_per_page = rows_per_page
+        self.cite_rows = cite_rows
+        self.workers = workers
+        self.seed = seed
+
+    def generate_pages(self, pages_dir, rows):
+        """ Generating pages with the given amount of publications in total.
+
+        Returns:
+            list -- files of generated pages
+        """
+
+        if not os.path.exists(pages_dir):
+            os.makedirs(pages_dir)
+
+        page_files = []
+        for index, start in enumerate(range(0, rows, self.rows_per_page)):
+            page_file = os.path.join(pages_dir, 'page-{0}.html'.format(index))
+            with open(page_file, 'wb') as f_page:
+                f_page.write(generate_page(index, min(self.rows_per_page, rows - start), seed=self.seed))
+            page_files.append(page_file)
+
+        return page_files
+
+    def write_sample(self, f_clean, f_sample):
+        """ Taking first publications of cleaned data for crawling citations. """
+
+        from csv_writer import StreamingCSVWriter
+
+        rows = read_rows(f_clean, skip_header=False)
+        with StreamingCSVWriter(f_sample, header=next(rows)) as writer:
+            for index, row in enumerate(rows):
+                if index >= self.cite_rows:
+                    break
+                writer.write_row(row)
+
+    def run_stage(self, name, args):
+        """ Running single stage in a child process.
+
+        Returns:
+            dict -- measurements of the stage
+        """
+
+        self.logger.info('Running stage: {0}'.format(name))
+
+        queue = multiprocessing.Queue()
+        process = multiprocessing.Process(target=run_stage_in_process, args=(queue, name, args))
+        process.start()
+        result = queue.get()
+        process.join()
+
+        if result['status'] == 'ok':
+            result['items_per_second'] = round(result['items'] / max(result['seconds'], 1e-6), 2)
+            result['mb_per_second'] = round(result['bytes'] / (1024.0 * 1024) / max(result['seconds'], 1e-6), 3)
+            self.logger.info('Stage {0}: {1} {2} in {3} s, {4} {2}/s, peak memory {5} MB'.format(
+                             name, result['items'], result['unit'], result['seconds'], result['items_per_second'], result['peak_memory_mb']))
+        else:
+            self.logger.error('Stage {0} failed: {1}'.format(name, result['error']))
+
+        return result
+
+    def run(self, rows, stages=STAGES):
+        """ Running the benchmark on the given amount of publications.
+
+        Arguments:
+            rows {int} -- amount of publications in total
+
+        Keyword Arguments:
+            stages {list} -- stages to run, in order of 'STAGES' (default: {all stages})
+
+        Returns:
+            dict -- parameters and measurements of all stages
+        """
+
+        run_dir = os.path.join(self.work_dir, 'rows-{0}'.format(rows))
+        if os.path.exists(run_dir):
+            shutil.rmtree(run_dir)
+        os.makedirs(run_dir)
+
+        self.logger.info('Generating {0} publications on pages of {1}'.format(rows, self.rows_per_page))
+        pages_dir = os.path.join(run_dir, 'pages')
+        page_files = self.generate_pages(pages_dir, rows)
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), BenchmarkRequestHandler)
+        server.pages_dir = pages_dir
+        server_thread = threading.Thread(target=server.serve_forever)
+        server_thread.daemon = True
+        server_thread.start()
+        base_url = 'http://127.0.0.1:{0}'.format(server.server_address[1])
+
+        f_merged = os.path.join(run_dir, 'uolbibliography-merged.csv')
+        f_clean = os.path.join(run_dir, 'uolbibliography-clean.csv')
+        f_sample = os.path.join(run_dir, 'uolbibliography-clean-sample.csv')
+
+        stage_args = {'download': lambda: (['{0}/page/{1}'.format(base_url, index) for index in range(len(page_files))],),
+                      'parse': lambda: (page_files, f_merged),
+                      'clean': lambda: (f_merged, f_clean, self.workers),
+                      'cite': lambda: (f_sample, base_url, self.workers),
+                      'merge': lambda: (f_clean,),
+                      'plot': lambda: (f_clean, self.workers)}
+
+        results = {}
+        cwd = os.getcwd()
+        # outputs of stages (citations, plots, etc.) are kept in the directory of the run
+        os.chdir(run_dir)
+        try:
+            for name in STAGES:
+                if name not in stages:
+                    continue
+                if name == 'cite' and os.path.isfile(f_clean):
+                    self.write_sample(f_clean, f_sample)
+                if name == 'plot' and not self.plotter_available():
+                    results[name] = {'status': 'skipped', 'error': 'plotter requires "pandas" and "matplotlib"'}
+                    self.logger.warning('Stage plot skipped: {0}'.format(results[name]['error']))
+                    continue
+                results[name] = self.run_stage(name, stage_args[name]())
+        finally:
+            os.chdir(cwd)
+            server.shutdown()
+            server.server_close()
+
+        return {'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'rows': rows,
+                'rows_per_page': self.rows_per_page,
+                'cite_rows': self.cite_rows,
+                'workers': self.workers,
+                'seed': self.seed,
+                'stages': results}
+
+    def plotter_available(self):
+        try:
+            import pandas
+            import matplotlib
+        except ImportError:
+            return False
+        return True
+
+    def compare(self, run, previous_runs):
+        """ Comparing throughput of stages with the latest previous run of the same parameters. """
+
+        same = [previous for previous in previous_runs
+                if all(previous.get(key) == run[key] for key in ('rows', 'rows_per_page', 'cite_rows', 'workers', 'python'))]
+        if not same:
+            return
+
+        previous = same[-1]
+        for name, result in sorted(run['stages'].items()):
+            before = previous['stages'].get(name, {})
+            if result['status'] != 'ok' or before.get('status') != 'ok' or not before.get('items_per_second'):
+                continue
+
+            ratio = result['items_per_second'] / before['items_per_second']
+            message = 'Stage {0}: {1:.2f}x throughput of the run from {2}'.format(name, ratio, previous['created'])
+            if ratio < REGRESSION_THRESHOLD:
+                self.logger.warning('[w] regression - ' + message)
+            else:
+                self.logger.info(message)
+
+    def save_results(self, runs, f_output):
+        """ Appending runs to the JSON file with results of all benchmark runs. """
+
+        previous_runs = []
+        if os.path.isfile(f_output):
+            with open(f_output) as f_results:
+                previous_runs = json.load(f_results)
+
+        for run in runs:
+            self.compare(run, previous_runs)
+
+        with open(f_output + '.tmp', 'w') as f_results:
+            f_results.write(json.dumps(previous_runs + runs, indent=2, sort_keys=True))
+        hlp.replace_file(f_output + '.tmp', f_output)
+
+        self.logger.info('Results saved into {0}'.format(f_output))
+
+def main(rows, rows_per_page, cite_rows, workers, stages, work_dir, output):
+    """ Main method that starts other methods.
+
+    Arguments:
+        rows {list} -- amounts of publications, the benchmark runs once per amount
+        rows_per_page {int} -- amount of publications per generated page
+        cite_rows {int} -- amount of publications which citations are crawled
+        workers {int} -- amount of workers of the cleaner, the plotter and of Crossref threads
+        stages {list} -- stages to run
+        work_dir {str} -- directory of generated data and outputs of stages
+        output {str} -- JSON file with results
+    """
+
+    benchmark = UOLBibliographyBenchmark(work_dir=work_dir, rows_per_page=rows_per_page, cite_rows=cite_rows, workers=workers)
+    runs = [benchmark.run(amount, stages=stages) for amount in rows]
+    benchmark.save_results(runs, output)
+
+if __name__ == '__main__':
+
+    # fetching input parameters
+    parser = argparse.ArgumentParser(description='{0}\nVersion - {1}'.format(__description__, __version__))
+
+    # size of generated data
+    parser.add_argument(
+        '--rows',
+        dest='rows',
+        type=int,
+        nargs='+',
+        help='amounts of generated publications, e.g. "1000 100000 1000000" runs the benchmark three times (default {0})'.format(DEFAULT_ROWS[0]))
+    parser.set_defaults(rows=DEFAULT_ROWS)
+
+    parser.add_argument(
+        '--rows-per-page',
+        dest='rows_per_page',
+        type=int,
+        help='amount of publications per generated page (default {0})'.format(DEFAULT_ROWS_PER_PAGE))
+    parser.set_defaults(rows_per_page=DEFAULT_ROWS_PER_PAGE)
+
+    parser.add_argument(
+        '--cite-rows',
+        dest='cite_rows',
+        type=int,
+        help='amount of publications which citations are crawled from the Crossref stand-in (default {0})'.format(DEFAULT_CITE_ROWS))
+    parser.set_defaults(cite_rows=DEFAULT_CITE_ROWS)
+
+    parser.add_argument(
+        '--workers',
+        dest='workers',
+        type=int,
+        help='amount of workers of the cleaner, the plotter and of Crossref threads (default 1)')
+    parser.set_defaults(workers=1)
+
+    parser.add_argument(
+        '--stages',
+        dest='stages',
+        nargs='+',
+        choices=STAGES,
+        help='stages to run, stages after "parse" need outputs of the previous ones (default all: {0})'.format(' '.join(STAGES)))
+    parser.set_defaults(stages=STAGES)
+
+    # outputs
+    parser.add_argument(
+        '--work-dir',
+        dest='work_dir',
+        help='directory of generated data and outputs of stages, emptied on every run (default "{0}")'.format(BENCHMARK_DIR))
+    parser.set_defaults(work_dir=BENCHMARK_DIR)
+
+    parser.add_argument(
+        '--output',
+        dest='output',
+        help='JSON file the results of this run are appended to (default "{0}")'.format(BENCHMARK_RESULTS_NAME))
+    parser.set_defaults(output=BENCHMARK_RESULTS_NAME)
+
+    # parse input parameters
+    args = parser.parse_args()
+
+    main(args.rows, args.rows_per_page, args.cite_rows, args.workers, args.stages, args.work_dir, args.output)
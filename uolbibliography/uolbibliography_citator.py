@@ -21,10 +21,19 @@ import argparse
 import cStringIO
 #import pandas as pd
 
-from habanero import Crossref
+import collections
+import threading
+from multiprocessing.pool import ThreadPool
 
 # helpers
 import helpers as hlp
+from csv_writer import read_rows
+from citation_store import CitationStore
+from crossref_client import CrossrefClient, CROSSREF_API_URL, CROSSREF_POLITE_MAX_CONCURRENCY
+from title_index import TitleIndex
+from publication import PublicationBatch
+from export_targets import ExportWriter, EXPORT_FORMATS
+from crossref_cache import CrossrefCache, CrossrefCacheMiss, CROSSREF_CACHE_NAME, CROSSREF_CACHE_TTL_DAYS, CROSSREF_CACHE_MAX_SIZE_MB
 
 # importing custom libraries
 try:
@@ -45,7 +54,11 @@ finally:
 # settings
 CITATIONS_DIR = 'citations'
 CITATIONS_JSONDB_NAME = 'citations-db.json'
+CITATIONS_SQLITEDB_NAME = 'citations-db.sqlite'
 CITATIONS_MERGEDDB_NAME = 'db-merged-with-citations.csv'
+SCHOLAR_REQUESTS_PER_SECOND = 0.2
+CITATION_SOURCES = ['GS', 'CR']
+CITATION_COLUMNS = ['GoogleScholar', 'Crossref']
 
 class UTF8Recoder:
     """
@@ -82,46 +95,79 @@ class UnicodeReader:
 class UOLBibliographyCitator:
     """ Get citations for data of 'Hochschulbibliografie' ((Universities Publication Bibliography) of UOL. """
 
-    def __init__(self):
-        """ Initial method. """
+    def __init__(self, mailto=None, workers=CROSSREF_POLITE_MAX_CONCURRENCY, crossref_cache=CROSSREF_CACHE_NAME,
+                 cache_ttl=CROSSREF_CACHE_TTL_DAYS, cache_size=CROSSREF_CACHE_MAX_SIZE_MB, offline=False,
+                 sources=CITATION_SOURCES, crossref_url=CROSSREF_API_URL, exports=()):
+        """ Initial method.
+
+        Keyword Arguments:
+            mailto {str} -- contact e-mail sent to Crossref to use its polite pool (default: {None})
+            workers {int} -- amount of threads for Crossref lookups (default: {3})
+            crossref_cache {str} -- name of the Crossref response cache in the citations directory, None disables it (default: {'crossref-cache.sqlite'})
+            cache_ttl {float} -- age in days after which cached Crossref responses are searched again (default: {90})
+            cache_size {int} -- size cap of the Crossref response cache in MB (default: {256})
+            offline {bool} -- serve Crossref responses only from the cache (default: {False})
+            sources {list} -- citation sources to crawl, 'GS' and/or 'CR' (default: {['GS', 'CR']})
+            crossref_url {str} -- URL of the Crossref API, e.g. of a local stand-in (default: {'https://api.crossref.org'})
+            exports {list} -- formats merged citations are exported to in addition to CSV, see 'EXPORT_FORMATS' (default: {()})
+        """
 
         self.logger = hlp.custom_logger(logger_name='citations')
+        self.mailto = mailto
+        self.workers = workers
+        self.crossref_cache = crossref_cache
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.offline = offline
+        self.sources = sources
+        self.crossref_url = crossref_url
+        self.exports = exports
 
         if not os.path.exists(CITATIONS_DIR):
             os.makedirs(CITATIONS_DIR)
 
-    def dump_citations(self, json_content):
-        ''' Save citations from the JSON object locally'''
+    def open_citations(self):
+        """ Open the citation DB, JSON citation DB is imported on the first use.
 
-        path_citations_db = os.path.join(CITATIONS_DIR, CITATIONS_JSONDB_NAME)
+        Returns:
+            CitationStore -- citation DB
+        """
 
-        # make a copy of the existing file
-        if os.path.isfile(path_citations_db):
-            os.rename(path_citations_db, path_citations_db + '-' + str(uuid.uuid4())[:8])
+        path_citations_db = os.path.join(CITATIONS_DIR, CITATIONS_SQLITEDB_NAME)
+        is_new = not os.path.isfile(path_citations_db)
 
-        # sort by key before dumping
-        json_content_sorted = {}
-        sorted_keys = sorted(json_content.keys())
-        for key in sorted_keys:
-            json_content_sorted[key] = json_content[key]
+        store = CitationStore(path_citations_db)
 
-        # dump the content
-        with open(path_citations_db, 'w') as _f_dump:
-            _f_dump.write(json.dumps(json_content_sorted, indent=2))
+        path_citations_jsondb = os.path.join(CITATIONS_DIR, CITATIONS_JSONDB_NAME)
+        if is_new and os.path.isfile(path_citations_jsondb):
+            self.logger.info('Importing existing JSON citation DB: {0}'.format(path_citations_jsondb))
+            store.import_json(path_citations_jsondb)
 
-    def load_citations(self):
-        ''' Load citations in form of a JSON object.'''
+        return store
+
+    def dump_citations(self):
+        """ Export citations from the citation DB into the JSON citation DB. """
+
+        path_citations_db = os.path.join(CITATIONS_DIR, CITATIONS_JSONDB_NAME)
+
+        store = self.open_citations()
+        total = store.export_json(path_citations_db)
+        store.close()
 
-        citations_db = {}
+        self.logger.info('Exported {0} citations into {1}'.format(total, path_citations_db))
+
+    def load_citations(self):
+        """ Import citations from the JSON citation DB into the citation DB. """
 
         path_citations_db = os.path.join(CITATIONS_DIR, CITATIONS_JSONDB_NAME)
+
+        store = self.open_citations()
         try:
-            with open(path_citations_db) as json_data:
-                citations_db = json.load(json_data)
+            total = store.import_json(path_citations_db)
+            self.logger.info('Imported {0} citations from {1}'.format(total, path_citations_db))
         except Exception as ex:
             self.logger.error('[e] Exception happened: {0}'.format(str (ex)))
-
-        return citations_db
+        store.close()
 
     def read_csv(self, f_input):
         ''' Read data from CSV'''
@@ -129,13 +175,21 @@ class UOLBibliographyCitator:
         # the pandas way
         #data = pd.read_csv(f_input, sep=',')
 
-        # the vanilla way
-        data = []
+        # the vanilla way, cleaned rows are kept column by column, other rows (e.g. only with
+        # authors and titles) as lists
+        data = PublicationBatch()
         with open(f_input, 'rb') as csvfile:
             csv_reader = UnicodeReader(csvfile)
             for index, row in enumerate(csv_reader):
-                if index > 0:
-                    data.append(row)
+                if index == 0:
+                    continue
+                if isinstance(data, PublicationBatch):
+                    try:
+                        data.append(row)
+                        continue
+                    except ValueError:
+                        data = list(data)
+                data.append(row)
 
         return data
 
@@ -165,7 +219,8 @@ class UOLBibliographyCitator:
 
             # -> requires modified version of the scholar
             #querier.send_query(query, proxy_id) # send query
-            querier.send_query(query) # send query
+            with hlp.metrics.timer('scholar_request_seconds'):
+                querier.send_query(query) # send query
 
             # save citation as JSON
             result = {'source': 'GS',
@@ -176,6 +231,7 @@ class UOLBibliographyCitator:
         except Exception as ex:
             self.logger.error('Exception while getting number of citations (Google Scholar): {0}.\nTitle:{1}'.\
                               format(ex, row[2].encode('utf-8')))
+            hlp.metrics.increment('scholar_errors')
 
         return result
 
@@ -186,147 +242,244 @@ class UOLBibliographyCitator:
         query = row[2] + ' ' + row[1]
 
         try:
-            response = cr.works(query = query, limit = 1)
+            with hlp.metrics.timer('crossref_lookup_seconds'):
+                response = cr.works(query = query, limit = 1)
             if response['message']['items']:
+                item = response['message']['items'][0]
                 result = {'source': 'CR',
-                          'value': response['message']['items'][0]['is-referenced-by-count']}
+                          'value': item['is-referenced-by-count'],
+                          'doi': item.get('DOI')}
+        except CrossrefCacheMiss:
+            self.logger.error('[e] Query is not cached, skipped in offline mode: {0}'.format(query.encode('utf-8')))
         except Exception as ex:
             self.logger.error('Exception while getting number of citations (Crossref): {0}.\nTitle:{1}'.\
                             format(ex, row[2].encode('utf-8')))
+            hlp.metrics.increment('crossref_errors')
 
         return result
 
-    def crawl_citations(self, f_input):
+    def crawl_citations(self, f_input=None, rows=None):
         """ Crawls citations for each publication.
 
+        Crossref lookups run in a pool of worker threads limited by the Crossref client,
+        Google Scholar lookups run in a single, much slower lane. Keys are resolved first, then
+        every lane walks the rows on its own with at most 2 lookups per thread pending, and saves
+        results into the citation DB as its window fills up. Each key is looked up at most once
+        per source.
+
         Arguments:
             f_input {str} -- input file name
+            rows {iterable} -- cleaned rows without header, used instead of the input file, iterators are read into a list
+
+        Returns:
+            int -- amount of scheduled lookups, 0 if the citation DB was not changed
         """
 
         # load data
-        df_original = self.read_csv(f_input)
-        citations_db = self.load_citations()
+        df_original = self.read_csv(f_input) if rows is None else rows
+        citations_db = self.open_citations()
+        title_index = TitleIndex(citations_db.keys())
 
-        # prepare scholar crawler
-        querier = scholar.ScholarQuerier()
-        settings = scholar.ScholarSettings()
-        querier.apply_settings(settings)
+        # prepare scholar crawler, there is no cache of Google Scholar to be used in offline mode
+        crawl_scholar = 'GS' in self.sources and not self.offline
+        crawl_crossref = 'CR' in self.sources
+
+        if crawl_scholar:
+            querier = scholar.ScholarQuerier()
+            settings = scholar.ScholarSettings()
+            querier.apply_settings(settings)
+            scholar_bucket = hlp.TokenBucket(SCHOLAR_REQUESTS_PER_SECOND)
 
         # # -> requires modified version of the scholar
         # self.proxies = querier.proxies
         # self.proxies_ids = [x for x in range(len(querier.proxies))]
 
         # prepare Crossref crawler
-        cr = Crossref()
-
-        crawls_cnt = [0, 0]
-
+        crossref_cache = None
+        if self.crossref_cache:
+            crossref_cache = CrossrefCache(os.path.join(CITATIONS_DIR, self.crossref_cache), ttl_days=self.cache_ttl,
+                                           max_size_mb=self.cache_size, offline=self.offline)
+        cr = CrossrefClient(mailto=self.mailto, base_url=self.crossref_url, cache=crossref_cache, logger=self.logger)
+
+        # every lane iterates rows on its own
+        if iter(df_original) is df_original:
+            df_original = list(df_original)
+
+        # keys are resolved once in order of rows, a lane gets indexes of rows it has to look up
+        scheduled = set()
+        lookups = {'GS': [], 'CR': []}
+        lanes = [source for source, crawl in (('GS', crawl_scholar), ('CR', crawl_crossref)) if crawl]
         #for index, row in df_original.iterrows(): # pandas way
         for index, row in enumerate(df_original):
 
-            if row[2] not in citations_db:
-                citations_db[row[2]] = {}
-
-            # crawl GS
-            if 'GS' not in citations_db[row[2]]:
-                crawls_cnt[0]+=1
-                citation_gs = self.citation_via_scholar(querier, row)
-                if citation_gs is not None:
-                    citations_db[row[2]]['GS'] = citation_gs
-
-            # crawl CR
-            if 'CR' not in citations_db[row[2]]:
-                crawls_cnt[1]+=1
-                citation_cr = self.citation_via_crossref(cr, row)
-                if citation_cr is not None:
-                    citations_db[row[2]]['CR'] = citation_cr
-
-            # save crawled DB after N titles (GS and CR separate) processed and sleep
-            if     (crawls_cnt[0] % 5 == 0 and crawls_cnt[0] != 0)\
-                or (crawls_cnt[1] % 15 == 0 and crawls_cnt[1] != 0):
-                sleep_interval = random.randrange(2, 7, 1)
-                self.logger.info('Save intermediate results and sleep for {0}. Total processed so far: {1}'.format(sleep_interval, index))
-                time.sleep(sleep_interval)
-                self.dump_citations(citations_db)
-
-        self.dump_citations(citations_db)
-
-    def merge_citations(self, f_input):
+            # same or nearly same title of the same first author shares one record
+            key = title_index.resolve(row[2], row[1])
+
+            record = citations_db.get(key)
+            if record is None:
+                record = {}
+                citations_db.put(key, record)
+
+            for source in lanes:
+                if source not in record and (source, key) not in scheduled:
+                    scheduled.add((source, key))
+                    lookups[source].append((index, key))
+
+        total = len(lookups['GS']) + len(lookups['CR'])
+        self.logger.info('Lookups scheduled - Google Scholar: {0}, Crossref: {1}'.format(len(lookups['GS']), len(lookups['CR'])))
+
+        lock = threading.Lock()
+        crawls_cnt = {'done': 0}
+
+        def lookup_scholar(row):
+            scholar_bucket.acquire()
+            return self.citation_via_scholar(querier, row)
+
+        def lookup_crossref(row):
+            return self.citation_via_crossref(cr, row)
+
+        def save(pending, size):
+            """ Saving finished lookups until at most 'size' lookups of the lane are pending. """
+
+            while len(pending) > size:
+                key, source, result = pending.popleft()
+                try:
+                    citation = result.get()
+                    if citation is not None:
+                        with lock:
+                            record = citations_db.get(key, {})
+                            record[source] = citation
+                            citations_db.put(key, record)
+                except Exception as ex:
+                    self.logger.error('[e] Citation is not saved ({0}): {1}'.format(source, ex))
+                    hlp.metrics.increment('citator_errors', source=source)
+                with lock:
+                    crawls_cnt['done'] += 1
+                    if crawls_cnt['done'] % 50 == 0:
+                        self.logger.info('Saved lookups so far: {0} of {1}'.format(crawls_cnt['done'], total))
+
+        def crawl_lane(source, pool, threads, lookup):
+            """ Looking up rows of the lane, at most 2 lookups per thread of the pool are pending. """
+
+            pending = collections.deque()
+            indexes = iter(lookups[source])
+            index, key = next(indexes, (None, None))
+            for row_index, row in enumerate(df_original):
+                if index is None:
+                    break
+                if row_index != index:
+                    continue
+                pending.append((key, source, pool.apply_async(lookup, (row,))))
+                save(pending, 2 * threads)
+                index, key = next(indexes, (None, None))
+            save(pending, 0)
+
+        # lanes run in their own threads, so Crossref is never held to the pace of Google Scholar
+        scholar_pool = ThreadPool(1)
+        crossref_pool = ThreadPool(self.workers)
+        lanes_pool = ThreadPool(2)
+
+        try:
+            results = []
+            if lookups['GS']:
+                results.append(lanes_pool.apply_async(crawl_lane, ('GS', scholar_pool, 1, lookup_scholar)))
+            if lookups['CR']:
+                results.append(lanes_pool.apply_async(crawl_lane, ('CR', crossref_pool, self.workers, lookup_crossref)))
+            for result in results:
+                result.get()
+        finally:
+            for pool in (lanes_pool, crossref_pool, scholar_pool):
+                pool.terminate()
+                pool.join()
+
+        if crossref_cache is not None:
+            self.logger.info('Crossref cache - hits: {0}, misses: {1}'.format(crossref_cache.hits, crossref_cache.misses))
+            crossref_cache.close()
+
+        citations_db.close()
+
+        return total
+
+    def citation_value(self, record, source):
+        """ Citation count of the given source as string, '-1' if it is unknown. """
+
+        if record.get(source) is None:
+            return str(-1)
+        return str(record[source]['value'])
+
+    def merge_citations(self, f_input=None, rows=None, header=None):
         """ Merge citations for each publication.
 
+        Citation counts of all records are loaded into a hash table once, input rows are then
+        streamed through it straight into the output file. Every row gets both citation columns,
+        '-1' for unknown citations, so memory depends only on the size of the citation DB.
+
         Arguments:
             f_input {str} -- input file name
+            rows {iterable} -- cleaned rows without header, used instead of the input file
+            header {list} -- names of columns of the given rows
         """
 
-        # load data
-        df_original = self.read_csv(f_input)
-        citations_db = self.load_citations()
-        results = []
-        # key = "Reflexive Grounded Theory"
-        # print (citations_db[key])
-        # return
-        #for index, row in df_original.iterrows(): # pandas way
-        for index, row in enumerate(df_original):
-            key = row[2]
-            cur_row = row
-
-            #print(index, row[2])
-
-            if key in citations_db:
-
-                if 'GS' in citations_db[key]:
-                    if citations_db[key]['GS'] != None:
-                        cur_row.append(str(citations_db[key]['GS']['value']))
-                    else:
-                        cur_row.append(str(-1))
-                else:
-                    cur_row.append(str(-1))
-
-                if 'CR' in citations_db[key]:
-                    if citations_db[key]['CR'] != None:
-                        cur_row.append(str(citations_db[key]['CR']['value']))
-                    else:
-                        cur_row.append(str(-1))
-                else:
-                    cur_row.append(str(-1))
-
-            results.append(cur_row)
-
-        #DELIMETER = ';'
-        DELIMETER = '","'
+        # build index of the citation DB
+        citations_db = self.open_citations()
+        title_index = TitleIndex(citations_db.keys())
+        citation_counts = dict((key, [self.citation_value(record, source) for source in CITATION_SOURCES])
+                               for key, record in citations_db.items())
+        citations_db.close()
 
-        header_row = ['Fach', 'Autor/in', 'Titel', 'Seiten', 'Sprache',
-                     'ZahlWoerterTitel', 'Typ', 'Meldetag', 'Punktzahl', 'ZahlOldenburgerAutoren',
-                     'Jahr', 'GoogleScholar', 'Crossref']
-        header = DELIMETER.join(header_row)
-        data_csv = '"' + header + '"' + '\n'
-        #resulting_csv = header + '\n'
-
-        for row in results:
-            #csv_row = DELIMETER.join(str(value).replace('"', "") for value in row)
-            csv_row = DELIMETER.join(value.replace('"', "") for value in row)
-            data_csv +=  '"' + csv_row + '"' + '\n'
-            #resulting_csv +=   csv_row + '\n'
+        unknown = [str(-1)] * len(CITATION_SOURCES)
+        if rows is None:
+            rows = read_rows(f_input, skip_header=False)
+            header = next(rows, [])
+        header_row = list(header) + CITATION_COLUMNS
 
         # save CSV
         path_merged_citations_db = os.path.join(CITATIONS_DIR, CITATIONS_MERGEDDB_NAME)
+        path_merged_citations_db_tmp = path_merged_citations_db + '.tmp'
+
+        matched = 0
+        with ExportWriter(path_merged_citations_db, header_row, self.exports, f_csv=path_merged_citations_db_tmp, logger=self.logger) as writer:
+            for row in rows:
+                key = title_index.lookup(row[2], row[1])
+                counts = citation_counts.get(key)
+                if counts is None:
+                    counts = unknown
+                else:
+                    matched += 1
+                writer.write_row(row + counts)
 
-        # saving to file
-        _file = codecs.open(path_merged_citations_db, 'w', 'utf-8')
-        _file.write(data_csv)
-        _file.close()
+        hlp.replace_file(path_merged_citations_db_tmp, path_merged_citations_db)
+        hlp.metrics.increment('merge_rows', writer.rows_written)
+        hlp.metrics.increment('merge_rows_without_citations', writer.rows_written - matched)
 
-        # with open(path_merged_citations_db, 'w') as _f_dump:
-        #     _f_dump.write(resulting_csv)
+        self.logger.info('Merged {0} publications, {1} without citations: {2}'.format(writer.rows_written, writer.rows_written - matched,
+                                                                                    path_merged_citations_db))
 
-def main(input, action):
+def main(input, action, mailto, workers, crossref_cache, cache_ttl, cache_size, offline, sources, crossref_url,
+         exports=(), metrics=None, prometheus_textfile=None):
     """ Main method that starts other methods.
 
     Arguments:
         input {str} -- input file name
+        action {str} -- one of the actions
+        mailto {str} -- contact e-mail for Crossref
+        workers {int} -- amount of threads for Crossref lookups
+        crossref_cache {str} -- name of the Crossref response cache, None disables it
+        cache_ttl {float} -- age in days after which cached Crossref responses are searched again
+        cache_size {int} -- size cap of the Crossref response cache in MB
+        offline {bool} -- serve Crossref responses only from the cache
+        sources {list} -- citation sources to crawl
+        crossref_url {str} -- URL of the Crossref API
+        exports {list} -- formats merged citations are exported to in addition to CSV
+        metrics {str} -- JSON file with timings and counters, None writes into folder 'logs'
+        prometheus_textfile {str} -- timings and counters in the Prometheus text format, None writes no textfile
     """
 
-    uol_bib_citations = UOLBibliographyCitator()
+    hlp.init_metrics('citator', metrics, prometheus_textfile)
+
+    uol_bib_citations = UOLBibliographyCitator(mailto=mailto, workers=workers, crossref_cache=crossref_cache,
+                                               cache_ttl=cache_ttl, cache_size=cache_size, offline=offline,
+                                               sources=sources, crossref_url=crossref_url, exports=exports)
 
     if action == 'CRAWL':
         uol_bib_citations.crawl_citations(f_input=input)
@@ -334,6 +487,12 @@ def main(input, action):
     if action == 'MERGE':
         uol_bib_citations.merge_citations(f_input=input)
 
+    if action == 'IMPORT':
+        uol_bib_citations.load_citations()
+
+    if action == 'EXPORT':
+        uol_bib_citations.dump_citations()
+
 if __name__ == '__main__':
 
 
@@ -351,12 +510,98 @@ if __name__ == '__main__':
     parser.set_defaults(mergedata='uolbibliography-2008-2016-merged-cleaned-unique.csv')
 
     # mode
-    actions = ('CRAWL', 'MERGE')
+    actions = ('CRAWL', 'MERGE', 'IMPORT', 'EXPORT')
     parser.add_argument(
         '--action',
         help='specifies action type (default "CRAWL"), must one of the following {0}'.format(actions))
     parser.set_defaults(action='CRAWL')
 
+    # Crossref lookups
+    parser.add_argument(
+        '--mailto',
+        dest='mailto',
+        help='contact e-mail sent with Crossref requests to use its polite pool')
+    parser.set_defaults(mailto=None)
+
+    parser.add_argument(
+        '--workers',
+        dest='workers',
+        type=int,
+        help='amount of threads for Crossref lookups, requests are limited to the rate of the Crossref pool anyway (default {0})'.format(CROSSREF_POLITE_MAX_CONCURRENCY))
+    parser.set_defaults(workers=CROSSREF_POLITE_MAX_CONCURRENCY)
+
+    # Crossref response cache
+    parser.add_argument(
+        '--crossref-cache',
+        dest='crossref_cache',
+        help='name of the Crossref response cache in "{0}" (default "{1}")'.format(CITATIONS_DIR, CROSSREF_CACHE_NAME))
+    parser.set_defaults(crossref_cache=CROSSREF_CACHE_NAME)
+
+    parser.add_argument(
+        '--no-crossref-cache',
+        dest='crossref_cache',
+        action='store_const',
+        const=None,
+        help='disables the Crossref response cache, every search is sent to Crossref')
+
+    parser.add_argument(
+        '--cache-ttl',
+        dest='cache_ttl',
+        type=float,
+        help='age in days after which cached Crossref responses are searched again (default {0})'.format(CROSSREF_CACHE_TTL_DAYS))
+    parser.set_defaults(cache_ttl=CROSSREF_CACHE_TTL_DAYS)
+
+    parser.add_argument(
+        '--cache-size',
+        dest='cache_size',
+        type=int,
+        help='size cap of the Crossref response cache in MB, least recently used responses are evicted (default {0})'.format(CROSSREF_CACHE_MAX_SIZE_MB))
+    parser.set_defaults(cache_size=CROSSREF_CACHE_MAX_SIZE_MB)
+
+    parser.add_argument(
+        '--offline',
+        dest='offline',
+        action='store_true',
+        help='serves Crossref responses only from the cache without network access')
+    parser.set_defaults(offline=False)
+
+    # citation sources
+    parser.add_argument(
+        '--sources',
+        dest='sources',
+        nargs='+',
+        choices=CITATION_SOURCES,
+        help='citation sources to crawl, "GS" for Google Scholar and "CR" for Crossref (default {0})'.format(' '.join(CITATION_SOURCES)))
+    parser.set_defaults(sources=CITATION_SOURCES)
+
+    parser.add_argument(
+        '--crossref-url',
+        dest='crossref_url',
+        help='URL of the Crossref API, e.g. of a local stand-in (default "{0}")'.format(CROSSREF_API_URL))
+    parser.set_defaults(crossref_url=CROSSREF_API_URL)
+
+    # export targets
+    parser.add_argument(
+        '--export-to',
+        dest='exports',
+        nargs='+',
+        choices=EXPORT_FORMATS,
+        help='exports merged citations (action MERGE) also to the given formats next to the merged CSV, Parquet and Arrow require "pyarrow"')
+    parser.set_defaults(exports=[])
+
+    # instrumentation
+    parser.add_argument(
+        '--metrics',
+        dest='metrics',
+        help='JSON file with timings and counters of the run, written at exit (default "logs/metrics-citator.json")')
+    parser.set_defaults(metrics=None)
+
+    parser.add_argument(
+        '--prometheus-textfile',
+        dest='prometheus_textfile',
+        help='additionally writes timings and counters in the Prometheus text format into this file')
+    parser.set_defaults(prometheus_textfile=None)
+
     # parse input parameters
     args = parser.parse_args()
 
@@ -365,5 +610,11 @@ if __name__ == '__main__':
         print('[x] set proper launching action: {0}'.format(actions))
         exit(0)
 
-    main(args.input, args.action.upper())
+    if args.offline and not args.crossref_cache:
+        print('[x] offline mode requires the Crossref response cache')
+        exit(0)
+
+    main(args.input, args.action.upper(), args.mailto, args.workers,
+         args.crossref_cache, args.cache_ttl, args.cache_size, args.offline, args.sources, args.crossref_url,
+         args.exports, args.metrics, args.prometheus_textfile)
 
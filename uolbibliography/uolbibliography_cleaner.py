@@ -8,12 +8,45 @@ __updated__     = "03.08.2018"
 __created__     = "26.08.2016"
 __description__ = "Cleaner for data of 'Hochschulbibliografie' (Universities Publication Bibliography) of UOL."
 
+import os
 import csv
+import time
 import codecs
+import logging
 import argparse
+import itertools
+import collections
+import multiprocessing
 
 #
 import helpers as hlp
+from csv_writer import StreamingCSVWriter, read_rows
+from language_detector import LanguageDetector, LANGUAGE_CACHE_NAME
+from near_duplicates import NearDuplicateDetector
+from export_targets import ExportWriter, EXPORT_FORMATS
+from publication import PublicationBatch, intern_raw_row
+
+# settings
+CHUNK_SIZE = 1000
+EXPECTED_ELEMENTS_COUNT = 8
+CLEAN_HEADER = ['Fach',
+                'Autor/in',
+                'Titel',
+                'Seiten',
+                'Sprache',
+                'ZahlWoerterTitel',
+                'Typ',
+                'Meldetag',
+                'Punktzahl',
+                'ZahlOldenburgerAutoren',
+                'Jahr']
+CLUSTER_ID_COLUMN = 'ClusterId'
+NEAR_DUPLICATES_REPORT_NAME = 'near-duplicates.csv'
+NEAR_DUPLICATES_REPORT_HEADER = [CLUSTER_ID_COLUMN,
+                                 'Size',
+                                 'Fach',
+                                 'Autor/in',
+                                 'Titel']
 
 def unicode_csv_reader(unicode_csv_data, dialect=csv.excel, **kwargs):
     # csv.py doesn't do Unicode; encode temporarily as UTF-8:
@@ -27,13 +60,114 @@ def utf_8_encoder(unicode_csv_data):
     for line in unicode_csv_data:
         yield line.encode('utf-8')
 
+class InconsistentDataError(Exception):
+    """ Raised if a row with wrong amount of elements is found while streaming. """
+    pass
+
+def chunks(rows, size):
+    """ Splitting iterable of rows into lists of given size. """
+
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def process_publication_title(title):
+    """ Separating title and number of pages given in brackets at the end of title. """
+
+    i_begin = title.rfind('(')
+    i_end = title.rfind(')')
+
+    clean_title = title[:i_begin].strip()
+    pages_amount = title[i_begin+1:i_end-2].strip()
+
+    return clean_title, pages_amount
+
+def clean_rows(rows, detector):
+    """ Cleaning chunk of raw rows.
+
+    Arguments:
+        rows {list} -- raw rows as produced by the crawler
+        detector {LanguageDetector} -- language detector
+
+    Returns:
+        list -- cleaned rows
+    """
+
+    titles = [process_publication_title(row[2]) for row in rows]
+
+    # approximate language of article
+    languages = detector.detect_batch([clean_title[0] for clean_title in titles])
+
+    clean_data = []
+    for row, clean_title, language in zip(rows, titles, languages):
+        clean_row = []
+        clean_row.append(row[0])
+        clean_row.append(row[1])
+
+        # separating title and number of pages
+        clean_row.append(clean_title[0])
+        clean_row.append(clean_title[1])
+
+        clean_row.append(detector.decode(language))
+
+        # amount of words in title
+        clean_row.append(str(len(clean_title[0].split())))
+
+        # adding rest of data
+        clean_row.extend(row[3:])
+
+        clean_data.append(clean_row)
+
+    return clean_data
+
+# detector of the cleaning process, see 'UOLBibliographyDataCleaner.clean_chunks'
+_worker_detector = None
+
+def init_clean_worker(language_cache):
+    """ Initializing cleaning process of the pool. """
+
+    global _worker_detector
+    _worker_detector = LanguageDetector(cache_path=language_cache, logger=logging.getLogger('cleaner'))
+
+def clean_rows_in_worker(rows):
+    """ Cleaning chunk of rows inside of the cleaning process.
+
+    Returns:
+        tuple -- cleaned rows, newly detected languages, cache hits, cache misses
+    """
+
+    hits, misses = _worker_detector.hits, _worker_detector.misses
+    clean_data = clean_rows(rows, _worker_detector)
+
+    return (clean_data, _worker_detector.pop_detected(),
+            _worker_detector.hits - hits, _worker_detector.misses - misses)
+
 class UOLBibliographyDataCleaner:
     """ Cleaner for data of 'Hochschulbibliografie' ((Universities Publication Bibliography) of UOL. """
 
-    def __init__(self):
-        """ Initial method. """
+    def __init__(self, language_cache=LANGUAGE_CACHE_NAME, workers=1, near_duplicates_report=None, merge_near_duplicates=False,
+                 exports=()):
+        """ Initial method.
+
+        Keyword Arguments:
+            language_cache {str} -- JSON file with detected languages, None disables it (default: {'language-cache.json'})
+            workers {int} -- amount of processes cleaning rows, 1 cleans in the main process (default: {1})
+            near_duplicates_report {str} -- CSV report of near-duplicate groups, None disables detection of near-duplicates (default: {None})
+            merge_near_duplicates {bool} -- keep only the first publication of every near-duplicate group (default: {False})
+            exports {list} -- formats cleaned data are exported to in addition to CSV, see 'EXPORT_FORMATS' (default: {()})
+        """
 
         self.logger = hlp.custom_logger(logger_name='cleaner')
+        self.language_cache = language_cache
+        self.workers = workers
+        self.near_duplicates_report = near_duplicates_report
+        self.merge_near_duplicates = merge_near_duplicates
+        self.exports = exports
         #self.helper = DirectoryHelper()
 
     def is_consistent(self, data):
@@ -43,8 +177,6 @@ class UOLBibliographyDataCleaner:
             data {list} -- list of objects
         """
 
-        EXPECTED_ELEMENTS_COUNT = 8
-
         for row in data:
             if len(row) != EXPECTED_ELEMENTS_COUNT:
                 self.logger.error('Wrong amount of elements. Expected - {1}, actual - {1}'.format(len(row), EXPECTED_ELEMENTS_COUNT))
@@ -53,8 +185,24 @@ class UOLBibliographyDataCleaner:
         self.logger.info('Right amount of elements found')
         return True
 
-    def data_as_csv(self, data, only_unique=False):
-        """ Getting data as CSV. """
+    def header(self):
+        """ Names of columns of cleaned data, with cluster ids if near-duplicates are detected. """
+
+        if self.near_duplicates_report:
+            return CLEAN_HEADER + [CLUSTER_ID_COLUMN]
+        return CLEAN_HEADER
+
+    def data_as_csv(self, data, f_output, only_unique=False, header=CLEAN_HEADER):
+        """ Saving data as CSV and into the export targets of the cleaner.
+
+        Arguments:
+            data {list} -- cleaned data
+            f_output {str} -- output file name
+
+        Keyword Arguments:
+            only_unique {bool} -- keep only first occurrence of each publication (default: {False})
+            header {list} -- names of columns (default: {CLEAN_HEADER})
+        """
 
         unique_data = []
 
@@ -68,38 +216,19 @@ class UOLBibliographyDataCleaner:
                     uniques.add(next_publication)
                     unique_data.append(row)
 
-
-        resulting_csv = ''
-        DELIMETER = '","'
-
         # adding header
-        header_values = ['Fach',
-                         'Autor/in',
-                         'Titel',
-                         'Seiten',
-                         'Sprache',
-                         'ZahlWoerterTitel',
-                         'Typ',
-                         'Meldetag',
-                         'Punktzahl',
-                         'ZahlOldenburgerAutoren',
-                         'Jahr']
-
-        header_row = DELIMETER.join(header_values)
-        resulting_csv = '"' + header_row + '"' + '\n'
+        header_values = header
 
         if len(unique_data) > 1:
             data = unique_data
 
         required_size = len(header_values)
-        for row in data:
-            if len(row) == required_size:
-                csv_row = DELIMETER.join(value.replace('"', "") for value in row)
-                resulting_csv +=  '"' + csv_row + '"' + '\n'
-            else:
-                self.logger.warning('Length of rows are not equal. Expected - {0}, actual {1}'.format(required_size, len(row)))
-
-        return resulting_csv
+        with ExportWriter(f_output, header_values, self.exports, logger=self.logger) as writer:
+            for row in data:
+                if len(row) == required_size:
+                    writer.write_row(row)
+                else:
+                    self.logger.warning('Length of rows are not equal. Expected - {0}, actual {1}'.format(required_size, len(row)))
 
     def save_to_file(self, f_output, data):
         """ Save data to CSV file.
@@ -109,12 +238,240 @@ class UOLBibliographyDataCleaner:
             data {list} -- data to be saved into CSV
         """
 
-        data_csv = self.data_as_csv(data, only_unique=True)
+        self.data_as_csv(data, f_output, only_unique=True)
+
+    def read_raw_rows(self, f_input):
+        """ Reading raw rows one by one.
+
+        Arguments:
+            f_input {str} -- input file name
+        """
+
+        with codecs.open(f_input, 'r', encoding='utf8') as f_in:
+            for row in unicode_csv_reader(f_in, delimiter=',', quotechar='"'):
+                yield row
+
+    def validate_rows(self, rows):
+        """ Checking rows for consistency while they are streamed, see 'is_consistent'.
+
+        Arguments:
+            rows {iterable} -- raw rows
+
+        Raises:
+            InconsistentDataError -- if row with wrong amount of elements is found
+        """
+
+        for row in rows:
+            if len(row) != EXPECTED_ELEMENTS_COUNT:
+                raise InconsistentDataError('Wrong amount of elements. Expected - {0}, actual - {1}'.format(EXPECTED_ELEMENTS_COUNT, len(row)))
+            yield row
+
+    def clean_chunks(self, rows, detector):
+        """ Cleaning rows chunk by chunk, see 'clean_rows'.
+
+        With more than one worker chunks are cleaned in a process pool. Results are taken in the
+        order of chunks, and at most two chunks per worker are pending at once.
+
+        Arguments:
+            rows {iterable} -- raw rows without header
+            detector {LanguageDetector} -- language detector
+        """
+
+        processed = 2
+
+        if self.workers <= 1:
+            for chunk in chunks(rows, CHUNK_SIZE):
+                for clean_row in clean_rows(chunk, detector):
+                    yield clean_row
+                processed += len(chunk)
+                hlp.metrics.increment('cleaner_rows', len(chunk))
+                self.logger.info('Processed total lines: {0}'.format(processed))
+            return
+
+        pool = multiprocessing.Pool(self.workers, initializer=init_clean_worker, initargs=(self.language_cache,))
+        pending = collections.deque()
+
+        try:
+            remaining = chunks(rows, CHUNK_SIZE)
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) < 2 * self.workers:
+                    chunk = next(remaining, None)
+                    if chunk is None:
+                        exhausted = True
+                    else:
+                        pending.append((len(chunk), pool.apply_async(clean_rows_in_worker, (chunk,))))
+
+                if not pending:
+                    break
+
+                chunk_size, result = pending.popleft()
+                clean_data, detected, hits, misses = result.get()
+                detector.update(detected, hits, misses)
+                for clean_row in clean_data:
+                    yield clean_row
+                processed += chunk_size
+                hlp.metrics.increment('cleaner_rows', chunk_size)
+                self.logger.info('Processed total lines: {0}'.format(processed))
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def record_metrics(self, detector, seconds):
+        """ Recording duration of cleaning, rows per second and hit ratio of the language cache.
+
+        Arguments:
+            detector {LanguageDetector} -- language detector used for cleaning
+            seconds {float} -- duration of cleaning
+        """
+
+        hlp.metrics.observe('cleaner_clean_seconds', seconds)
+        hlp.metrics.increment('cleaner_language_cache_hits', detector.hits)
+        hlp.metrics.increment('cleaner_language_cache_misses', detector.misses)
+
+        rows = hlp.metrics.get('cleaner_rows')
+        hlp.metrics.set('cleaner_rows_per_second', round(rows / seconds, 1) if seconds > 0 else 0)
+        if detector.hits + detector.misses > 0:
+            hlp.metrics.set('cleaner_language_cache_hit_ratio', round(float(detector.hits) / (detector.hits + detector.misses), 4))
+
+    def unique_rows(self, rows):
+        """ Filtering out only first occurrence of each publication (Author + Publication).
+
+        Arguments:
+            rows {iterable} -- cleaned rows
+        """
+
+        uniques = set()
+        for row in rows:
+            next_publication = u'{0}:{1}'.format(row[1], row[2])
+            if next_publication not in uniques and row[0] != u'%fach%':
+                uniques.add(next_publication)
+                yield row
+
+    def near_duplicate_clusters(self, rows):
+        """ Detecting near-duplicate publications, see 'NearDuplicateDetector'.
+
+        Arguments:
+            rows {iterable} -- cleaned rows without exact duplicates
+
+        Returns:
+            list -- cluster id of every row
+        """
+
+        self.logger.info('Detecting near-duplicates')
+
+        with hlp.metrics.timer('cleaner_near_duplicates_seconds'):
+            detector = NearDuplicateDetector()
+            for row in rows:
+                detector.add(row[2], row[1])
+            clusters = detector.cluster_ids()
+
+        sizes = collections.Counter(clusters)
+        groups = sum(1 for size in sizes.values() if size > 1)
+        duplicates = sum(size for size in sizes.values() if size > 1)
+        hlp.metrics.increment('cleaner_near_duplicate_groups', groups)
+        hlp.metrics.increment('cleaner_near_duplicate_rows', duplicates)
+        hlp.metrics.increment('cleaner_near_duplicate_comparisons', detector.comparisons)
+        if detector.capped:
+            self.logger.warning('[w] {0} publications were not added to full LSH buckets'.format(detector.capped))
+
+        self.logger.info('Near-duplicates - groups: {0}, publications: {1}, comparisons: {2}'.format(groups, duplicates, detector.comparisons))
+        return clusters
+
+    def label_near_duplicates(self, rows, clusters):
+        """ Appending cluster ids to rows, optionally only the first row of every cluster is kept.
+
+        Rows of groups with more than one publication are written into the report of near-duplicates
+        (see 'NEAR_DUPLICATES_REPORT_HEADER') as soon as all rows are passed.
+
+        Arguments:
+            rows {iterable} -- cleaned rows as passed to 'near_duplicate_clusters'
+            clusters {list} -- cluster id of every row
+
+        Returns:
+            generator of rows with cluster ids
+        """
+
+        sizes = collections.Counter(clusters)
+        groups = collections.defaultdict(list)
+        passed = set()
+
+        for row, cluster_id in zip(rows, clusters):
+            if sizes[cluster_id] > 1:
+                groups[cluster_id].append(row)
+            if self.merge_near_duplicates and cluster_id in passed:
+                continue
+            passed.add(cluster_id)
+            yield row + [str(cluster_id)]
 
-        # saving to file
-        _file = codecs.open(f_output, 'w', 'utf-8')
-        _file.write(data_csv)
-        _file.close()
+        with StreamingCSVWriter(self.near_duplicates_report, header=NEAR_DUPLICATES_REPORT_HEADER) as report:
+            for cluster_id in sorted(groups):
+                for row in groups[cluster_id]:
+                    report.write_row([str(cluster_id), str(sizes[cluster_id]), row[0], row[1], row[2]])
+        self.logger.info('Report of near-duplicates: {0}'.format(self.near_duplicates_report))
+
+    def clean_stream(self, rows, detector):
+        """ Cleaning raw rows one by one, only the first occurrence of each publication is kept.
+
+        Arguments:
+            rows {iterable} -- raw rows without header and the '%fach%' row
+            detector {LanguageDetector} -- language detector
+
+        Returns:
+            generator of cleaned rows, see 'CLEAN_HEADER'
+        """
+
+        return self.unique_rows(self.clean_chunks(rows, detector))
+
+    def clean_streaming(self, f_input, f_output):
+        """Clean data with constant memory.
+
+        Rows flow through a generator pipeline (read, validate, split title, detect language,
+        dedupe, write), only the set of seen publications stays in memory. The output is
+        written into a temporary file that replaces 'f_output' only if all data are consistent.
+        Near-duplicates are detected in a second pass over the temporary file, keeping only
+        normalized titles and authors in memory, and cluster ids are added in a third one.
+        Export targets are written by the last pass.
+
+        Arguments:
+            f_input {str} -- input file name
+            f_output {str} -- output file name
+        """
+
+        self.logger.info("Start with cleaning (streaming). Input {0}".format(f_input))
+        started = time.time()
+
+        detector = LanguageDetector(cache_path=self.language_cache, logger=self.logger)
+
+        rows = self.validate_rows(self.read_raw_rows(f_input))
+
+        # first two rows are header and the '%fach%' row
+        rows = self.clean_stream(itertools.islice(rows, 2, None), detector)
+
+        f_output_tmp = f_output + '.tmp'
+        exports = () if self.near_duplicates_report else self.exports
+        try:
+            with ExportWriter(f_output, CLEAN_HEADER, exports, f_csv=f_output_tmp, logger=self.logger) as writer:
+                writer.write_rows(rows)
+        except InconsistentDataError as ex:
+            self.logger.error(str(ex))
+            self.logger.info("Data are not consistent.")
+            os.remove(f_output_tmp)
+            return
+
+        if self.near_duplicates_report:
+            clusters = self.near_duplicate_clusters(read_rows(f_output_tmp))
+            with ExportWriter(f_output, self.header(), self.exports, f_csv=f_output_tmp + '.tmp', logger=self.logger) as writer:
+                writer.write_rows(self.label_near_duplicates(read_rows(f_output_tmp), clusters))
+            hlp.replace_file(f_output_tmp + '.tmp', f_output_tmp)
+
+        hlp.replace_file(f_output_tmp, f_output)
+
+        self.logger.info('Language detection - titles from cache: {0}, detected: {1}'.format(detector.hits, detector.misses))
+        detector.save()
+        self.record_metrics(detector, time.time() - started)
+
+        self.logger.info("Done with cleaning. Check {0}".format(f_output))
 
     def clean(self, f_input, f_output):
         """Clean data
@@ -125,121 +482,70 @@ class UOLBibliographyDataCleaner:
         """
 
         self.logger.info("Start with cleaning. Input {0}".format(f_input))
-
-        def process_publication_title(title):
-            i_begin = title.rfind('(')
-            i_end = title.rfind(')')
-
-            clean_title = title[:i_begin].strip()
-            pages_amount = title[i_begin+1:i_end-2].strip()
-
-            return clean_title, pages_amount
-
-        def detect_language_v1(title):
-            language = None
-            try:
-                from langdetect import detect
-                language = detect(title)
-            except Exception as ex:
-                self.logger.warning('Exception with language detection: {0}'.format(str(ex)))
-
-            return language
-
-        # def detect_language_v2(title):
-        #     language = None
-        #     try:
-        #         from langid.langid import LanguageIdentifier, model
-        #         identifier = LanguageIdentifier.from_modelstring(model, norm_probs=True)
-        #         language = identifier.classify(title)[0]
-        #     except Exception as ex:
-        #         self.logger.warning('Exception with language detection: {0}'.format(str(ex)))
-
-        #     return language
-
-        def print_languages_ios_639(langauge_set):
-            try:
-                from pycountry import languages
-                result = ''
-                for lang in langauge_set:
-                    result += '{0}:{1}\n'.format(lang, languages.get(iso639_1_code=lang).name)
-                return result
-            except Exception as ex:
-                self.logger.warning('Exception with language decoding according to ISO 693-1: {0}'.format(str(ex)))
-            return None
-
-        def decode_language_ios_639(lang):
-            try:
-                from pycountry import languages
-                return languages.get(iso639_1_code=lang).name
-            except Exception as ex:
-                self.logger.warning('Exception with language decoding according to ISO 693-1: {0}'.format(str(ex)))
-            return 'Unknown'
+        started = time.time()
 
         raw_data = []
 
         with codecs.open(f_input, 'r', encoding='utf8') as f_in:
             csv_reader = unicode_csv_reader(f_in, delimiter=',', quotechar='"')
             for row in csv_reader:
+                if len(row) == EXPECTED_ELEMENTS_COUNT:
+                    row = intern_raw_row(row)
                 raw_data.append(row)
 
-        from sets import Set
-        unique_languages_v1 = Set()
+        detector = LanguageDetector(cache_path=self.language_cache, logger=self.logger)
 
         # getting
         if self.is_consistent(raw_data):
-            clean_data = []
-            for index, row in enumerate(raw_data):
-                clean_row = []
-                if index > 1:
-                    clean_row.append(row[0])
-                    clean_row.append(row[1])
-
-                    # separating title and number of pages
-                    clean_title = process_publication_title(row[2])
-                    clean_row.append(clean_title[0])
-                    clean_row.append(clean_title[1])
-
-                    # approximate language of article
-                    lang_v1 = detect_language_v1(clean_title[0])
-                    lang_v1_decoded = decode_language_ios_639(lang_v1)
-                    clean_row.append(lang_v1_decoded)
+            # first two rows are header and the '%fach%' row
+            clean_data = PublicationBatch(self.clean_chunks(itertools.islice(raw_data, 2, None), detector))
+            del raw_data[:]
 
-                    # debugging
-                    unique_languages_v1.add(lang_v1)
+            self.logger.info('Language detection - titles from cache: {0}, detected: {1}'.format(detector.hits, detector.misses))
+            detector.save()
 
-                    # amount of words in title
-                    clean_row.append(str(len(clean_title[0].split())))
-
-                    # adding rest of data
-                    clean_row.extend(row[3:])
-
-                if len(clean_row) > 0:
-                    clean_data.append(clean_row)
-
-                if (index % 1000 == 0):
-                    self.logger.info('Processed total lines: {0}'.format(index))
-
-            # unique languages - for debugging
-            # self.logger.info(unique_languages_v1)
-            # self.logger.info(print_languages_ios_639(unique_languages_v1))
-
-            self.save_to_file(f_output, clean_data)
+            if self.near_duplicates_report:
+                clean_data = PublicationBatch(self.unique_rows(clean_data))
+                clusters = self.near_duplicate_clusters(clean_data)
+                self.data_as_csv(self.label_near_duplicates(clean_data, clusters), f_output, header=self.header())
+            else:
+                self.save_to_file(f_output, clean_data)
+            self.record_metrics(detector, time.time() - started)
         else:
             self.logger.info("Data are not consistent.")
 
         self.logger.info("Done with cleaning. Check {0}".format(f_output))
 
 
-def main(input, output):
+def main(input, output, language_cache, streaming, workers, near_duplicates_report=None, merge_near_duplicates=False,
+         exports=(), metrics=None, prometheus_textfile=None):
     """ Main method that starts other methods.
 
     Arguments:
         input {str} -- input file name
         output {str} -- output file name
+        language_cache {str} -- JSON file with detected languages
+        streaming {bool} -- clean with constant memory
+        workers {int} -- amount of cleaning processes
+        near_duplicates_report {str} -- CSV report of near-duplicate groups, None disables detection of near-duplicates
+        merge_near_duplicates {bool} -- keep only the first publication of every near-duplicate group
+        exports {list} -- formats cleaned data are exported to in addition to CSV
+        metrics {str} -- JSON file with timings and counters, None writes into folder 'logs'
+        prometheus_textfile {str} -- timings and counters in the Prometheus text format, None writes no textfile
     """
 
-    cleaner = UOLBibliographyDataCleaner()
-    cleaner.clean(f_input=input, f_output=output)
+    hlp.init_metrics('cleaner', metrics, prometheus_textfile)
+
+    if merge_near_duplicates and not near_duplicates_report:
+        near_duplicates_report = NEAR_DUPLICATES_REPORT_NAME
+
+    cleaner = UOLBibliographyDataCleaner(language_cache=language_cache, workers=workers,
+                                         near_duplicates_report=near_duplicates_report, merge_near_duplicates=merge_near_duplicates,
+                                         exports=exports)
+    if streaming:
+        cleaner.clean_streaming(f_input=input, f_output=output)
+    else:
+        cleaner.clean(f_input=input, f_output=output)
 
 
 if __name__ == '__main__':
@@ -262,7 +568,81 @@ if __name__ == '__main__':
     parser.set_defaults(output='uolbibliography-clean.csv')
 
 
+    # language detection cache
+    parser.add_argument(
+        '--language-cache',
+        dest='language_cache',
+        help='JSON file with languages detected so far (default "{0}")'.format(LANGUAGE_CACHE_NAME))
+    parser.set_defaults(language_cache=LANGUAGE_CACHE_NAME)
+
+    parser.add_argument(
+        '--no-language-cache',
+        dest='language_cache',
+        action='store_const',
+        const=None,
+        help='detects language of every title again')
+
+    # streaming mode
+    parser.add_argument(
+        '--streaming',
+        dest='streaming',
+        action='store_true',
+        help='cleans row by row with constant memory instead of loading the whole input')
+    parser.set_defaults(streaming=False)
+
+    # parallel mode
+    parser.add_argument(
+        '--workers',
+        dest='workers',
+        type=int,
+        help='amount of processes cleaning chunks of rows, output stays the same (default 1)')
+    parser.set_defaults(workers=1)
+
+    # near-duplicates
+    parser.add_argument(
+        '--near-duplicates',
+        dest='near_duplicates_report',
+        action='store_const',
+        const=NEAR_DUPLICATES_REPORT_NAME,
+        help='adds column "{0}" with groups of near-duplicate publications and writes their report into "{1}"'.format(CLUSTER_ID_COLUMN, NEAR_DUPLICATES_REPORT_NAME))
+    parser.set_defaults(near_duplicates_report=None)
+
+    parser.add_argument(
+        '--near-duplicates-report',
+        dest='near_duplicates_report',
+        help='same as "--near-duplicates", the report is written into the given CSV file')
+
+    parser.add_argument(
+        '--merge-near-duplicates',
+        dest='merge_near_duplicates',
+        action='store_true',
+        help='detects near-duplicates and keeps only the first publication of every group')
+    parser.set_defaults(merge_near_duplicates=False)
+
+    # export targets
+    parser.add_argument(
+        '--export-to',
+        dest='exports',
+        nargs='+',
+        choices=EXPORT_FORMATS,
+        help='exports cleaned data also to the given formats next to the output CSV, Parquet and Arrow require "pyarrow"')
+    parser.set_defaults(exports=[])
+
+    # instrumentation
+    parser.add_argument(
+        '--metrics',
+        dest='metrics',
+        help='JSON file with timings and counters of the run, written at exit (default "logs/metrics-cleaner.json")')
+    parser.set_defaults(metrics=None)
+
+    parser.add_argument(
+        '--prometheus-textfile',
+        dest='prometheus_textfile',
+        help='additionally writes timings and counters in the Prometheus text format into this file')
+    parser.set_defaults(prometheus_textfile=None)
+
     # parse input parameters
     args = parser.parse_args()
 
-    main(args.input, args.output)
+    main(args.input, args.output, args.language_cache, args.streaming, args.workers, args.near_duplicates_report,
+         args.merge_near_duplicates, args.exports, args.metrics, args.prometheus_textfile)
@@ -0,0 +1,550 @@
+# coding: utf-8
+#!/usr/bin/env python
+
+__author__      = "Viktor Dmitriyev"
+__license__     = "MIT"
+__version__     = "1.0.0"
+__updated__     = "18.10.2026"
+__created__     = "18.10.2026"
+__description__ = "Pipeline that crawls, cleans, crawls citations and plots data of 'Hochschulbibliografie' (Universities Publication Bibliography) of UOL in one process."
+
+import os
+import argparse
+import itertools
+import collections
+from multiprocessing.pool import ThreadPool
+
+#
+import helpers as hlp
+from export_targets import ExportWriter, EXPORT_FORMATS, export_path
+from http_cache import HTTPCache, HTTP_CACHE_DIR, HTTP_CACHE_MAX_SIZE_MB
+from language_detector import LanguageDetector, LANGUAGE_CACHE_NAME
+from uolbibliography import BSCrawler, MERGED_HEADER, MERGED_FILE_NAME, DEFAULT_REQUESTS_PER_SECOND, DEFAULT_MAX_CONCURRENCY_PER_HOST
+from uolbibliography_cleaner import UOLBibliographyDataCleaner, CLEAN_HEADER, CLUSTER_ID_COLUMN, NEAR_DUPLICATES_REPORT_NAME
+from uolbibliography_citator import UOLBibliographyCitator, CITATION_SOURCES
+from crossref_client import CROSSREF_API_URL, CROSSREF_POLITE_MAX_CONCURRENCY
+from partition_store import PartitionStore, PARTITIONS_DIR, rows_hash
+from publication import PublicationBatch
+import uolbibliography_cleaner
+import uolbibliography_citator
+
+# plotting is optional, it requires pandas and matplotlib
+try:
+    import pandas as pd
+    from columnar_cache import apply_column_types
+    from uolbibliography_plotter import UOLBibliographyDataPlotter
+except ImportError:
+    UOLBibliographyDataPlotter = None
+
+# settings
+CLEAN_FILE_NAME = 'uolbibliography-clean.csv'
+
+def tap(rows, f_output, header, exports=(), logger=None):
+    """ Passing rows through while writing them into a CSV file and the given export targets.
+
+    Arguments:
+        rows {iterable} -- rows to be passed
+        f_output {str} -- output file name
+        header {list} -- names of columns
+
+    Keyword Arguments:
+        exports {list} -- export formats in addition to CSV, see 'EXPORT_FORMATS' (default: {()})
+        logger {logging.Logger} -- logger (default: {None})
+
+    Returns:
+        generator of the given rows
+    """
+
+    with ExportWriter(f_output, header, exports, logger=logger) as writer:
+        for row in rows:
+            writer.write_row(row)
+            yield row
+
+def tap_partitions(partitions, f_output, header, exports=(), logger=None):
+    """ Passing partitions through while writing their rows into a CSV file, see 'tap'. """
+
+    with ExportWriter(f_output, header, exports, logger=logger) as writer:
+        for partition in partitions:
+            writer.write_rows(partition[2])
+            yield partition
+
+def clean_data_frame(rows, header=CLEAN_HEADER):
+    """ Cleaned rows as data frame with the column types of the plotter's columnar cache.
+
+    Empty values become missing values, as if the rows were read from CSV.
+    """
+
+    df = pd.DataFrame(list(rows), columns=header).replace(u'', float('nan'))
+    return apply_column_types(df)
+
+class UOLBibliographyPipeline():
+    """ Crawler, cleaner, citator and plotter chained in one process.
+
+    Rows are passed from stage to stage as lists of unicode values, intermediate CSV files are
+    written only as optional taps. Pages are downloaded and parsed while the rows extracted so far
+    are cleaned, and citations are crawled in a background thread while figures are rendered.
+
+    With a partition store, rows of every crawled page are a partition keyed by their hash.
+    Only partitions that changed since the previous run are cleaned, and citations are merged
+    only if the cleaned data or the citation DB changed. Figures are rendered only for changed
+    data anyway (see 'plots-manifest.json').
+    """
+
+    def __init__(self, crawler, cleaner, citator=None, plotter=None, language_cache=LANGUAGE_CACHE_NAME, tap_dir=None,
+                 partitions_dir=None, exports=()):
+        """ Initial method.
+
+        Arguments:
+            crawler {BSCrawler} -- crawler of pages
+            cleaner {UOLBibliographyDataCleaner} -- cleaner of crawled rows
+
+        Keyword Arguments:
+            citator {UOLBibliographyCitator} -- citator, None skips citations (default: {None})
+            plotter {UOLBibliographyDataPlotter} -- plotter, None skips figures (default: {None})
+            language_cache {str} -- JSON file with detected languages, None disables it (default: {'language-cache.json'})
+            tap_dir {str} -- directory of merged and cleaned CSV files, None writes no intermediate files (default: {None})
+            partitions_dir {str} -- directory of cleaned partitions, None cleans and merges everything (default: {None})
+            exports {list} -- formats taps are exported to in addition to CSV, see 'EXPORT_FORMATS' (default: {()})
+        """
+
+        self.logger = hlp.custom_logger(logger_name='pipeline')
+        self.crawler = crawler
+        self.cleaner = cleaner
+        self.citator = citator
+        self.plotter = plotter
+        self.language_cache = language_cache
+        self.tap_dir = tap_dir
+        self.exports = exports
+        self.partitions = None
+        if partitions_dir:
+            self.partitions = PartitionStore(partitions_dir, version=uolbibliography_cleaner.__version__)
+
+        if self.tap_dir and not os.path.exists(self.tap_dir):
+            os.makedirs(self.tap_dir)
+
+    def tap(self, rows, file_name, header):
+        """ Writing rows into the tap directory while passing them, if taps are enabled. """
+
+        if not self.tap_dir:
+            return rows
+
+        self.logger.info('Tap: {0}'.format(os.path.join(self.tap_dir, file_name)))
+        return tap(rows, os.path.join(self.tap_dir, file_name), header, self.exports, self.logger)
+
+    def run(self, urlfile, workers=1, requests_per_second=DEFAULT_REQUESTS_PER_SECOND,
+            max_per_host=DEFAULT_MAX_CONCURRENCY_PER_HOST, resume=False, parse_processes=0):
+        """ Running all stages on the URLs of the given file.
+
+        Arguments:
+            urlfile {str} -- file that contains URLs to be processed
+            for other arguments see 'BSCrawler.crawl_rows'
+
+        Returns:
+            PublicationBatch -- cleaned rows
+        """
+
+        with hlp.metrics.timer('pipeline_seconds', stage='crawl+clean'):
+            partitions = self.crawler.crawl_partitions(urlfile=urlfile, workers=workers, requests_per_second=requests_per_second,
+                                                       max_per_host=max_per_host, resume=resume, parse_processes=parse_processes)
+            if self.tap_dir:
+                self.logger.info('Tap: {0}'.format(os.path.join(self.tap_dir, MERGED_FILE_NAME)))
+                partitions = tap_partitions(partitions, os.path.join(self.tap_dir, MERGED_FILE_NAME), MERGED_HEADER, self.exports, self.logger)
+
+            # first row is the '%fach%' row, as skipped by the cleaner
+            detector = LanguageDetector(cache_path=self.language_cache, logger=self.cleaner.logger)
+            if self.partitions is None:
+                rows = itertools.chain.from_iterable(partition[2] for partition in partitions)
+                rows = self.cleaner.clean_stream(itertools.islice(rows, 1, None), detector)
+            else:
+                rows = itertools.chain.from_iterable(self.clean_partitions(partitions, detector))
+                rows = self.cleaner.unique_rows(itertools.islice(rows, 1, None))
+            if self.cleaner.near_duplicates_report:
+                rows = PublicationBatch(rows)
+                rows = self.cleaner.label_near_duplicates(rows, self.cleaner.near_duplicate_clusters(rows))
+            clean_data = PublicationBatch(self.tap(rows, CLEAN_FILE_NAME, self.cleaner.header()))
+            detector.save()
+
+        self.logger.info('Crawled and cleaned publications: {0}'.format(len(clean_data)))
+
+        state = {}
+        if self.partitions is not None:
+            self.logger.info('Partitions - unchanged: {0}, cleaned: {1}, removed: {2}'.format(self.partitions.hits, self.partitions.misses,
+                                                                                             self.partitions.prune()))
+            previous_state = self.partitions.load_state()
+            state['clean_hash'] = rows_hash(clean_data).hexdigest()
+
+        # network-bound citations are crawled while figures are rendered, processes rendering
+        # figures are forked before any thread of the citator runs, so they can't inherit its locks
+        plot_pool = self.plotter.process_pool() if self.plotter is not None else None
+        citations = None
+        pool = ThreadPool(1)
+        try:
+            if self.citator is not None:
+                citations = pool.apply_async(self.crawl_citations, (clean_data,))
+
+            if self.plotter is not None:
+                with hlp.metrics.timer('pipeline_seconds', stage='plot'):
+                    self.plotter.plot_data(clean_data_frame(clean_data, self.cleaner.header()), plot_pool)
+
+            if citations is not None:
+                lookups = citations.get()
+                if self.partitions is not None and lookups == 0 and self.is_merged(previous_state, state):
+                    self.logger.info('Cleaned data and citations are unchanged, merged citations are kept')
+                else:
+                    with hlp.metrics.timer('pipeline_seconds', stage='merge'):
+                        self.citator.merge_citations(rows=clean_data, header=self.cleaner.header())
+                state['merged_hash'] = hlp.file_hash(self.path_merged_citations())
+        finally:
+            for running_pool in (pool, plot_pool):
+                if running_pool is not None:
+                    running_pool.terminate()
+                    running_pool.join()
+
+        if self.partitions is not None:
+            self.partitions.save_state(state)
+
+        return clean_data
+
+    def clean_partitions(self, partitions, detector):
+        """ Cleaning only partitions that are not in the partition store yet.
+
+        Rows of all changed partitions are streamed through one 'clean_chunks' pass (one row in,
+        one row out), so cleaned rows are split back into partitions by their amount. Duplicates
+        are not filtered out here, they depend on other partitions.
+
+        Arguments:
+            partitions {iterable} -- (url, hash of rows, rows) tuples, see 'BSCrawler.crawl_partitions'
+            detector {LanguageDetector} -- language detector
+
+        Returns:
+            generator of cleaned rows of every partition in the given order
+        """
+
+        # partitions waiting for their cleaned rows, cached partitions come with their rows
+        pending = collections.deque()
+
+        def changed_rows():
+            for _, partition_hash, rows in partitions:
+                key = self.partitions.key(partition_hash)
+                cached = self.partitions.load(key)
+                pending.append((key, len(rows), cached))
+                if cached is None:
+                    for row in rows:
+                        yield row
+
+        cleaned = self.cleaner.clean_chunks(changed_rows(), detector)
+        buffered = []
+        exhausted = False
+        while True:
+            # pulling cleaned rows also pulls partitions from the crawler
+            if not pending:
+                if exhausted:
+                    break
+                clean_row = next(cleaned, None)
+                if clean_row is None:
+                    exhausted = True
+                else:
+                    buffered.append(clean_row)
+                continue
+
+            key, size, cached = pending.popleft()
+            if cached is not None:
+                yield cached
+                continue
+
+            while len(buffered) < size:
+                buffered.append(next(cleaned))
+            clean_partition, buffered = buffered[:size], buffered[size:]
+            self.partitions.store(key, clean_partition)
+            yield clean_partition
+
+    def path_merged_citations(self):
+        return os.path.join(uolbibliography_citator.CITATIONS_DIR, uolbibliography_citator.CITATIONS_MERGEDDB_NAME)
+
+    def is_merged(self, previous_state, state):
+        """ Checking whether the merged citations of the previous run belong to the same cleaned data. """
+
+        path_merged = self.path_merged_citations()
+        return (previous_state.get('clean_hash') == state['clean_hash'] and os.path.isfile(path_merged) and
+                previous_state.get('merged_hash') == hlp.file_hash(path_merged) and
+                all(os.path.isfile(export_path(path_merged, export_format)) for export_format in self.exports))
+
+    def crawl_citations(self, clean_data):
+        """ Crawling citations of cleaned rows, runs in the background thread of 'run'.
+
+        Returns:
+            int -- amount of scheduled lookups
+        """
+
+        with hlp.metrics.timer('pipeline_seconds', stage='cite'):
+            return self.citator.crawl_citations(rows=clean_data)
+
+
+def main(urlfile, workers, requests_per_second, max_per_host, cache_dir, cache_size, parser, resume, parse_processes,
+         language_cache, clean_workers, citations, mailto, crossref_workers, sources, crossref_url, plots, plot_workers, tap_dir,
+         partitions_dir, near_duplicates_report=None, merge_near_duplicates=False, exports=(), metrics=None, prometheus_textfile=None):
+    """ Main method that starts other methods.
+
+    Arguments:
+        urlfile {str} -- file that contains URLs to be processed
+        workers {int} -- amount of concurrent downloads
+        requests_per_second {float} -- politeness budget per host in concurrent mode
+        max_per_host {int} -- maximum amount of requests per host in flight in concurrent mode
+        cache_dir {str} -- directory of the HTTP cache, None disables it
+        cache_size {int} -- size cap of the HTTP cache in MB
+        parser {str} -- 'lxml' or 'html5lib'
+        resume {bool} -- skip URLs completed by the previous crawl
+        parse_processes {int} -- amount of processes parsing downloaded pages
+        language_cache {str} -- JSON file with detected languages, None disables it
+        clean_workers {int} -- amount of cleaning processes
+        citations {bool} -- crawl and merge citations
+        mailto {str} -- contact e-mail for Crossref
+        crossref_workers {int} -- amount of threads for Crossref lookups
+        sources {list} -- citation sources to crawl
+        crossref_url {str} -- URL of the Crossref API
+        plots {bool} -- render figures
+        plot_workers {int} -- amount of processes rendering figures
+        tap_dir {str} -- directory of merged and cleaned CSV files, None writes no intermediate files
+        partitions_dir {str} -- directory of cleaned partitions, None cleans and merges everything
+        near_duplicates_report {str} -- CSV report of near-duplicate groups, None disables detection of near-duplicates
+        merge_near_duplicates {bool} -- keep only the first publication of every near-duplicate group
+        exports {list} -- formats taps and merged citations are exported to in addition to CSV
+        metrics {str} -- JSON file with timings and counters, None writes into folder 'logs'
+        prometheus_textfile {str} -- timings and counters in the Prometheus text format, None writes no textfile
+    """
+
+    hlp.init_metrics('pipeline', metrics, prometheus_textfile)
+
+    http_cache = None
+    if cache_dir:
+        http_cache = HTTPCache(cache_dir=cache_dir, max_size_mb=cache_size)
+
+    crawler = BSCrawler(http_cache=http_cache, parser=parser)
+    if merge_near_duplicates and not near_duplicates_report:
+        near_duplicates_report = NEAR_DUPLICATES_REPORT_NAME
+
+    cleaner = UOLBibliographyDataCleaner(language_cache=language_cache, workers=clean_workers,
+                                         near_duplicates_report=near_duplicates_report, merge_near_duplicates=merge_near_duplicates)
+
+    citator = None
+    if citations:
+        citator = UOLBibliographyCitator(mailto=mailto, workers=crossref_workers, sources=sources, crossref_url=crossref_url,
+                                         exports=exports)
+
+    plotter = None
+    if plots:
+        if UOLBibliographyDataPlotter is None:
+            crawler.logger.warning('[w] figures are skipped, plotter requires "pandas" and "matplotlib"')
+        else:
+            plotter = UOLBibliographyDataPlotter(workers=plot_workers)
+
+    pipeline = UOLBibliographyPipeline(crawler, cleaner, citator=citator, plotter=plotter,
+                                       language_cache=language_cache, tap_dir=tap_dir, partitions_dir=partitions_dir, exports=exports)
+    pipeline.run(urlfile, workers=workers, requests_per_second=requests_per_second, max_per_host=max_per_host,
+                 resume=resume, parse_processes=parse_processes)
+
+if __name__ == '__main__':
+
+    # fetching input parameters
+    parser = argparse.ArgumentParser(description='{0}\nVersion - {1}'.format(__description__, __version__))
+
+    # crawling
+    parser.add_argument(
+        '--urlfile',
+        help='specifies file with URLS to be processed')
+    parser.set_defaults(urlfile='uolbibliography-test.txt')
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        help='amount of concurrent downloads, 1 crawls sequentially with a fixed sleep (default 1)')
+    parser.set_defaults(workers=1)
+
+    parser.add_argument(
+        '--rate',
+        dest='requests_per_second',
+        type=float,
+        help='maximum requests per second sent to a single host in concurrent mode (default {0})'.format(DEFAULT_REQUESTS_PER_SECOND))
+    parser.set_defaults(requests_per_second=DEFAULT_REQUESTS_PER_SECOND)
+
+    parser.add_argument(
+        '--max-per-host',
+        dest='max_per_host',
+        type=int,
+        help='maximum requests to a single host in flight in concurrent mode (default {0})'.format(DEFAULT_MAX_CONCURRENCY_PER_HOST))
+    parser.set_defaults(max_per_host=DEFAULT_MAX_CONCURRENCY_PER_HOST)
+
+    parser.add_argument(
+        '--cache-dir',
+        dest='cache_dir',
+        help='directory of the persistent HTTP cache (default "{0}")'.format(HTTP_CACHE_DIR))
+    parser.set_defaults(cache_dir=HTTP_CACHE_DIR)
+
+    parser.add_argument(
+        '--no-cache',
+        dest='cache_dir',
+        action='store_const',
+        const=None,
+        help='disables the HTTP cache, every page is downloaded in full')
+
+    parser.add_argument(
+        '--cache-size',
+        dest='cache_size',
+        type=int,
+        help='size cap of the HTTP cache in MB, least recently used pages are evicted (default {0})'.format(HTTP_CACHE_MAX_SIZE_MB))
+    parser.set_defaults(cache_size=HTTP_CACHE_MAX_SIZE_MB)
+
+    parser.add_argument(
+        '--parser',
+        choices=('lxml', 'html5lib'),
+        help='fast "lxml" table parser, falls back to "html5lib" for pages it can\'t handle (default "lxml")')
+    parser.set_defaults(parser='lxml')
+
+    parser.add_argument(
+        '--parse-processes',
+        dest='parse_processes',
+        type=int,
+        help='amount of processes parsing downloaded pages while downloading continues, 0 parses in the main process (default 0)')
+    parser.set_defaults(parse_processes=0)
+
+    parser.add_argument(
+        '--resume',
+        dest='resume',
+        action='store_true',
+        help='skips URLs completed by the previous crawl, their rows are read from files on disk')
+    parser.set_defaults(resume=False)
+
+    # cleaning
+    parser.add_argument(
+        '--language-cache',
+        dest='language_cache',
+        help='JSON file with languages detected so far (default "{0}")'.format(LANGUAGE_CACHE_NAME))
+    parser.set_defaults(language_cache=LANGUAGE_CACHE_NAME)
+
+    parser.add_argument(
+        '--clean-workers',
+        dest='clean_workers',
+        type=int,
+        help='amount of processes cleaning chunks of rows (default 1)')
+    parser.set_defaults(clean_workers=1)
+
+    parser.add_argument(
+        '--near-duplicates',
+        dest='near_duplicates_report',
+        action='store_const',
+        const=NEAR_DUPLICATES_REPORT_NAME,
+        help='adds column "{0}" with groups of near-duplicate publications and writes their report into "{1}"'.format(CLUSTER_ID_COLUMN, NEAR_DUPLICATES_REPORT_NAME))
+    parser.set_defaults(near_duplicates_report=None)
+
+    parser.add_argument(
+        '--near-duplicates-report',
+        dest='near_duplicates_report',
+        help='same as "--near-duplicates", the report is written into the given CSV file')
+
+    parser.add_argument(
+        '--merge-near-duplicates',
+        dest='merge_near_duplicates',
+        action='store_true',
+        help='detects near-duplicates and keeps only the first publication of every group')
+    parser.set_defaults(merge_near_duplicates=False)
+
+    # citations
+    parser.add_argument(
+        '--no-citations',
+        dest='citations',
+        action='store_false',
+        help='skips crawling and merging citations')
+    parser.set_defaults(citations=True)
+
+    parser.add_argument(
+        '--mailto',
+        dest='mailto',
+        help='contact e-mail sent with Crossref requests to use its polite pool')
+    parser.set_defaults(mailto=None)
+
+    parser.add_argument(
+        '--crossref-workers',
+        dest='crossref_workers',
+        type=int,
+        help='amount of threads for Crossref lookups (default {0})'.format(CROSSREF_POLITE_MAX_CONCURRENCY))
+    parser.set_defaults(crossref_workers=CROSSREF_POLITE_MAX_CONCURRENCY)
+
+    parser.add_argument(
+        '--sources',
+        dest='sources',
+        nargs='+',
+        choices=CITATION_SOURCES,
+        help='citation sources to crawl, "GS" for Google Scholar and "CR" for Crossref (default {0})'.format(' '.join(CITATION_SOURCES)))
+    parser.set_defaults(sources=CITATION_SOURCES)
+
+    parser.add_argument(
+        '--crossref-url',
+        dest='crossref_url',
+        help='URL of the Crossref API, e.g. of a local stand-in (default "{0}")'.format(CROSSREF_API_URL))
+    parser.set_defaults(crossref_url=CROSSREF_API_URL)
+
+    # plotting
+    parser.add_argument(
+        '--no-plots',
+        dest='plots',
+        action='store_false',
+        help='skips rendering figures')
+    parser.set_defaults(plots=True)
+
+    parser.add_argument(
+        '--plot-workers',
+        dest='plot_workers',
+        type=int,
+        help='amount of processes rendering figures (default 1)')
+    parser.set_defaults(plot_workers=1)
+
+    # taps
+    parser.add_argument(
+        '--tap-dir',
+        dest='tap_dir',
+        help='writes merged ("{0}") and cleaned ("{1}") data as CSV into this directory'.format(MERGED_FILE_NAME, CLEAN_FILE_NAME))
+    parser.set_defaults(tap_dir=None)
+
+    parser.add_argument(
+        '--export-to',
+        dest='exports',
+        nargs='+',
+        choices=EXPORT_FORMATS,
+        help='exports taps and merged citations also to the given formats next to their CSV files, Parquet and Arrow require "pyarrow"')
+    parser.set_defaults(exports=[])
+
+    # incremental runs
+    parser.add_argument(
+        '--partitions-dir',
+        dest='partitions_dir',
+        help='directory of cleaned rows of every crawled page, only changed pages are cleaned again (default "{0}")'.format(PARTITIONS_DIR))
+    parser.set_defaults(partitions_dir=PARTITIONS_DIR)
+
+    parser.add_argument(
+        '--no-partitions',
+        dest='partitions_dir',
+        action='store_const',
+        const=None,
+        help='cleans all pages and merges citations on every run')
+
+    # instrumentation
+    parser.add_argument(
+        '--metrics',
+        dest='metrics',
+        help='JSON file with timings and counters of the run, written at exit (default "logs/metrics-pipeline.json")')
+    parser.set_defaults(metrics=None)
+
+    parser.add_argument(
+        '--prometheus-textfile',
+        dest='prometheus_textfile',
+        help='additionally writes timings and counters in the Prometheus text format into this file')
+    parser.set_defaults(prometheus_textfile=None)
+
+    # parse input parameters
+    args = parser.parse_args()
+
+    main(args.urlfile, args.workers, args.requests_per_second, args.max_per_host, args.cache_dir, args.cache_size,
+         args.parser, args.resume, args.parse_processes, args.language_cache, args.clean_workers, args.citations,
+         args.mailto, args.crossref_workers, args.sources, args.crossref_url, args.plots, args.plot_workers, args.tap_dir,
+         args.partitions_dir, args.near_duplicates_report, args.merge_near_duplicates, args.exports, args.metrics,
+         args.prometheus_textfile)
@@ -3,30 +3,149 @@
 
 __author__      = "Viktor Dmitriyev"
 __license__     = "MIT"
-__version__     = "1.1.0"
-__updated__     = "03.08.2018"
+__version__     = "1.2.0"
+__updated__     = "18.10.2026"
 __created__     = "26.08.2016"
 __description__ = "Plotter for data of 'Hochschulbibliografie' (Universities Publication Bibliography) of UOL."
 
 import os
+import json
+import time
+import hashlib
 import argparse
+import multiprocessing
 import pandas as pd
+import matplotlib
+# figures are only saved into files, also from worker processes without any display
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 
 #
 import helpers as hlp
+from columnar_cache import ColumnarCache, COLUMNAR_CACHE_SUFFIX
 
 # settings
 
 PLOTS_DIR = 'plots'
+PLOTS_MANIFEST_NAME = 'plots-manifest.json'
+TOP_K_AUTHORS = 300
+
+def render_bar_by_year(name, grouped, path):
+    """ Rendering publications/articles of a field by year.
+
+    Arguments:
+        name {str} -- name of the field
+        grouped {pandas.DataFrame} -- publications counted by year
+        path {str} -- output file
+    """
+
+    fig, ax = plt.subplots()
+    grouped.plot(kind='bar', title = name, ax=ax, legend=False)
+    fig.savefig(path)
+    plt.close(fig)
+
+def render_top_authors(grouped, k_authors, total_authors, path):
+    """ Rendering top K authors.
+
+    Arguments:
+        grouped {pandas.DataFrame} -- top K authors with their total publications
+        k_authors {number} -- top K authors to plot
+        total_authors {number} -- amount of all authors
+        path {str} -- output file
+    """
+
+    fig, ax = plt.subplots()
+    fig.set_size_inches((18.5 * k_authors) / 30, 12.5, forward=True)
+    grouped.plot(kind='bar', ax=ax, legend=False, edgecolor='b',
+                 title = 'Top {0} authors presented. In total there are {1} authors.'.format(k_authors, total_authors)
+                )
+
+    for p in ax.patches:
+        legend_text = str(p.get_height())
+        x_delta = 0.15
+        if len(legend_text) < 5: x_delta = 0.08
+        ax.annotate(legend_text, xy=(p.get_x() - x_delta, p.get_height() + 0.5))
+
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+def render_articles_per_author_hist(grouped, total_authors, total_publications, avg, path):
+    """ Rendering histogram of total articles per author.
+
+    Arguments:
+        grouped {pandas.DataFrame} -- authors with their total publications
+        total_authors {number} -- amount of all authors
+        total_publications {number} -- amount of all publications (not unique)
+        avg {number} -- average publications per author
+        path {str} -- output file
+    """
+
+    fig, ax = plt.subplots()
+    fig.set_size_inches(20, 12.5, forward=True)
+    grouped.plot(kind='hist', ax=ax, bins=200, legend=False, #edgecolor='b',
+                 title = 'There are authors: {0}; publications (not unique): {1}; average : {2}.'.format(total_authors, total_publications, avg)
+                 )
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+FIGURE_RENDERERS = {'bar-by-year': render_bar_by_year,
+                    'top-k-authors': render_top_authors,
+                    'articles-per-author-hist': render_articles_per_author_hist}
+
+def render_figure(job):
+    """ Rendering single figure job, also inside of a worker process.
+
+    Arguments:
+        job {tuple} -- (kind of the figure, output file, arguments of the renderer)
+
+    Returns:
+        tuple -- output file, rendering time in seconds (recorded by the main process)
+    """
+
+    started = time.time()
+    kind, path, args = job
+    FIGURE_RENDERERS[kind](*(args + (path,)))
+    return path, time.time() - started
+
+def figure_fingerprint(job):
+    """ Fingerprint of the figure job: kind of the figure and its aggregated input data.
+
+    Version of the plotter is part of the fingerprint, so a new version renders all figures again.
+
+    Arguments:
+        job {tuple} -- (kind of the figure, output file, arguments of the renderer)
+
+    Returns:
+        str -- SHA-1 as hex string
+    """
+
+    kind, path, args = job
+    digest = hashlib.sha1('{0}:{1}'.format(__version__, kind).encode('utf-8'))
+    for arg in args:
+        if isinstance(arg, (pd.DataFrame, pd.Series)):
+            arg = arg.to_csv()
+        digest.update(repr(arg).encode('utf-8'))
+    return digest.hexdigest()
 
 class UOLBibliographyDataPlotter:
     """ Plotter for data of 'Hochschulbibliografie' ((Universities Publication Bibliography) of UOL. """
 
-    def __init__(self):
-        """ Initial method. """
+    def __init__(self, workers=1, columnar_cache=True, force=False):
+        """ Initial method.
+
+        Keyword Arguments:
+            workers {int} -- amount of processes rendering figures, 1 renders in the main process (default: {1})
+            columnar_cache {bool} -- load data through the columnar cache next to the CSV (default: {True})
+            force {bool} -- render all figures, also those with unchanged input (default: {False})
+        """
 
         self.logger = hlp.custom_logger(logger_name='cleaner')
+        self.workers = workers
+        self.columnar_cache = columnar_cache
+        self.force = force
+        self.path_manifest = os.path.join(PLOTS_DIR, PLOTS_MANIFEST_NAME)
 
     def validate_file_name(self, file_name):
         """ Removes all symbols that are not file name conform.
@@ -41,127 +160,235 @@ class UOLBibliographyDataPlotter:
         file_name = ''.join(c for c in file_name if c in valid_chars)
         return file_name
 
-    def plotter(self, f_input):
-        """ Plotter of data from CSV with bibliography.
+    def jobs_by_year_and_field(self, df):
+        """ Plotting within each field publications/articles by year.
+
+        Fields that end up with the same file name get a numeric suffix in order of their names,
+        so the set of files does not depend on the order in which figures are rendered.
 
         Arguments:
-            f_input {str} -- input file name
+            df {pandas.DataFrame} -- input data set with 'Fach' and 'Jahr'
+
+        Returns:
+            list -- figure jobs
         """
 
-        if not os.path.exists(PLOTS_DIR):
-            os.makedirs(PLOTS_DIR)
+        self.logger.info(self.jobs_by_year_and_field.__doc__.split('\n')[0])
+
+        jobs = []
+        file_names = set()
+
+        for name, group in df.groupby('Fach'):
+            if name == '%fach%':
+                continue
+
+            base_name = file_name = 'bar-plot-{0}'.format(self.validate_file_name(name))
+            suffix = 1
+            while file_name in file_names:
+                suffix += 1
+                file_name = '{0}-{1}'.format(base_name, suffix)
+            file_names.add(file_name)
+
+            grouped_tmp = group.groupby(['Jahr']).count()
+            jobs.append(('bar-by-year', os.path.join(PLOTS_DIR, file_name + '.png'), (name, grouped_tmp)))
+
+        return jobs
+
+    def jobs_top_authors(self, df, k_authors = 30):
+        """Plotting within each field publications/articles by year.
+
+        One publication may have more that one author.
+
+        Arguments:
+            df {pandas.DataFrame} -- input data set
 
-        df_original = pd.read_csv(f_input, sep=',')
+        Keyword Arguments:
+            k_authors {number} -- top K authors to plot (default: {30})
 
-        def plot_by_year_and_field(df):
-            """ Plotting within each field publications/articles by year."""
+        Returns:
+            list -- figure jobs
+        """
 
-            self.logger.info(plot_by_year_and_field.__doc__)
+        self.logger.info('Executing method.\n{0}'.format(self.jobs_top_authors.__doc__))
 
-            fig, ax = plt.subplots()
-            grouped = df.groupby(['Fach'])
-            #grouped = df.groupby(['Autor/in'])
+        grouped = df.groupby(['Autor/in']).count()
 
-            for name, group in grouped:
-                self.logger.info('Plotting - {0}'.format(name))
-                if name != '%fach%':
-                    ax.cla()
-                    grouped_tmp = group.groupby(['Jahr']).count()
-                    plot_tmp = grouped_tmp.plot(kind='bar', title = name, ax=ax, legend=False)
-                    fig.savefig(os.path.join(PLOTS_DIR, 'bar-plot-{0}.png'.format(self.validate_file_name(name))))
+        grouped.columns = ['total']
+        total_authors = len(grouped) - 1    # because of field with '%'
+        self.logger.info('Total authors: {0}'.format(total_authors))
 
-            ax.cla()
-            fig.clf()
-            #fig.close()
+        grouped = grouped.sort_values(by='total', ascending=False).head(k_authors)
 
-        def plot_top_authors(df, k_authors = 30):
-            """Plotting within each field publications/articles by year.
+        return [('top-k-authors', os.path.join(PLOTS_DIR, 'top-k-authors.png'), (grouped, k_authors, total_authors))]
 
-            One publication may have more that one author.
+    def jobs_total_articles_per_authors(self, df):
+        """Plotting total articles per all authors.
 
-            Arguments:
-                df {pandas.DataFrame} -- input data set
+        One publication may have more that one author.
+
+        Arguments:
+            df {pandas.DataFrame} -- input data set
+
+        Returns:
+            list -- figure jobs
+        """
 
-            Keyword Arguments:
-                k_authors {number} -- top K authors to plot (default: {30})
-            """
+        self.logger.info('Executing method.\n{0}'.format(self.jobs_total_articles_per_authors.__doc__))
 
-            self.logger.info('Executing method.\n{0}'.format(plot_top_authors.__doc__))
+        grouped = df.groupby(['Autor/in']).count()
+        grouped.columns = ['total']
+        total_publications = int(grouped['total'].sum()) - 1 # because of field with '%'
+        total_authors = len(grouped) - 1                     # because of field with '%'
+        avg = total_publications / total_authors
 
-            grouped = df.groupby(['Autor/in']).count()
+        self.logger.info('Total authors: {0}'.format(total_authors))
+
+        grouped = grouped.sort_values(by='total', ascending=False)
+
+        return [('articles-per-author-hist', os.path.join(PLOTS_DIR, 'total-articles-per-author-hist.png'),
+                 (grouped, total_authors, total_publications, avg))]
+
+    def load_manifest(self):
+        """ Loading fingerprints of rendered figures.
+
+        Returns:
+            dict -- file name of the figure -> fingerprint of its input
+        """
 
-            grouped.columns = ['total']
-            total_authors = len(grouped) - 1    # because of field with '%'
-            self.logger.info('Total authors: {0}'.format(total_authors))
+        if not os.path.isfile(self.path_manifest):
+            return {}
 
-            grouped = grouped.sort_values(by='total', ascending=False).head(k_authors)
+        with open(self.path_manifest) as f_manifest:
+            return json.load(f_manifest)
 
-            fig, ax = plt.subplots()
-            fig.set_size_inches((18.5 * k_authors) / 30, 12.5, forward=True)
-            grouped.plot(kind='bar', ax=ax, legend=False, edgecolor='b',
-                         title = 'Top {0} authors presented. In total there are {1} authors.'.format(k_authors, total_authors)
-                        )
+    def save_manifest(self, manifest):
+        """ Saving fingerprints of rendered figures atomically. """
 
-            for p in ax.patches:
-                legend_text = str(p.get_height())
-                x_delta = 0.15
-                if len(legend_text) < 5: x_delta = 0.08
-                ax.annotate(legend_text, xy=(p.get_x() - x_delta, p.get_height() + 0.5))
+        with open(self.path_manifest + '.tmp', 'w') as f_manifest:
+            f_manifest.write(json.dumps(manifest, indent=2, sort_keys=True))
+        hlp.replace_file(self.path_manifest + '.tmp', self.path_manifest)
 
-            fig.tight_layout()
-            fig.savefig(os.path.join(PLOTS_DIR, 'top-k-authors.png'))
-            ax.cla()
-            fig.clf()
+    def process_pool(self):
+        """ Process pool rendering figures, None if figures are rendered in the main process.
 
+        The pool can be created in advance and passed to 'plot_data', e.g. before threads are
+        started whose locks must not be inherited by forked workers.
+        """
+
+        if self.workers <= 1:
+            return None
+        return multiprocessing.Pool(self.workers)
+
+    def render_figures(self, jobs, pool=None):
+        """ Rendering figure jobs, in a process pool if there is more than one worker.
+
+        Arguments:
+            jobs {list} -- figure jobs
+
+        Keyword Arguments:
+            pool {multiprocessing.Pool} -- pool created by 'process_pool', it is left open (default: {None})
+
+        Returns:
+            generator of output files in order of jobs
+        """
+
+        if pool is None and self.workers <= 1:
+            for job in jobs:
+                path, seconds = render_figure(job)
+                self.logger.info('Plotting - {0}'.format(path))
+                hlp.metrics.observe('plotter_render_seconds', seconds, kind=job[0])
+                yield path
+            return
+
+        own_pool = pool is None
+        if own_pool:
+            pool = self.process_pool()
+        try:
+            for job, (path, seconds) in zip(jobs, pool.imap(render_figure, jobs)):
+                self.logger.info('Plotting - {0}'.format(path))
+                hlp.metrics.observe('plotter_render_seconds', seconds, kind=job[0])
+                yield path
+        finally:
+            if own_pool:
+                pool.terminate()
+                pool.join()
+
+    def plotter(self, f_input):
+        """ Plotter of data from CSV with bibliography.
 
-        def plot_total_articles_per_authors(df):
-            """Plotting total articles per all authors.
+        Aggregates of every figure are computed in the main process, figures are rendered
+        afterwards, see 'render_figures'. Only figures whose aggregated input changed since
+        they were rendered last time (see 'plots-manifest.json' in the plots directory) are
+        rendered again, unless 'force' is set.
 
-            One publication may have more that one author.
+        Arguments:
+            f_input {str} -- input file name
+        """
 
-            Arguments:
-                df {pandas.DataFrame} -- input data set
-            """
+        with hlp.metrics.timer('plotter_load_seconds'):
+            if self.columnar_cache:
+                df_original = ColumnarCache(f_input, logger=self.logger).load()
+            else:
+                df_original = pd.read_csv(f_input, sep=',')
 
-            self.logger.info('Executing method.\n{0}'.format(plot_total_articles_per_authors.__doc__))
+        self.plot_data(df_original)
 
-            grouped = df.groupby(['Autor/in']).count()
-            grouped.columns = ['total']
-            total_publications = int(grouped.sum()) - 1 # because of field with '%'
-            total_authors = len(grouped) - 1            # because of field with '%'
-            avg = total_publications / total_authors
+    def plot_data(self, df_original, pool=None):
+        """ Plotting figures of already loaded data, see 'plotter'.
 
-            self.logger.info('Total authors: {0}'.format(total_authors))
+        Arguments:
+            df_original {pandas.DataFrame} -- cleaned data
 
-            grouped = grouped.sort_values(by='total', ascending=False)
+        Keyword Arguments:
+            pool {multiprocessing.Pool} -- process pool rendering figures, see 'process_pool' (default: {None})
+        """
 
-            fig, ax = plt.subplots()
-            fig.set_size_inches(20, 12.5, forward=True)
-            grouped.plot(kind='hist', ax=ax, bins=200, legend=False, #edgecolor='b',
-                         title = 'There are authors: {0}; publications (not unique): {1}; average : {2}.'.format(total_authors, total_publications, avg)
-                         )
-            fig.tight_layout()
-            fig.savefig(os.path.join(PLOTS_DIR, 'total-articles-per-author-hist.png'))
-            ax.cla()
-            fig.clf()
+        if not os.path.exists(PLOTS_DIR):
+            os.makedirs(PLOTS_DIR)
 
         df_fach = df_original[['Fach', 'Jahr']]
         #df_fach = df_original[['Autor/in', 'Jahr']]
-        #plot_by_year_and_field(df_fach)
 
         df_authors = df_original[['Autor/in', 'Jahr']]
 
-        plot_top_authors(df_authors, k_authors = 300)
-        plot_total_articles_per_authors(df_authors)
+        jobs = self.jobs_by_year_and_field(df_fach)
+        jobs += self.jobs_top_authors(df_authors, k_authors = TOP_K_AUTHORS)
+        jobs += self.jobs_total_articles_per_authors(df_authors)
+
+        fingerprints = dict((os.path.basename(job[1]), figure_fingerprint(job)) for job in jobs)
+        manifest = self.load_manifest()
+
+        if not self.force:
+            jobs = [job for job in jobs
+                    if manifest.get(os.path.basename(job[1])) != fingerprints[os.path.basename(job[1])] or not os.path.isfile(job[1])]
+        self.logger.info('Figures to render: {0} of {1}'.format(len(jobs), len(fingerprints)))
+        hlp.metrics.increment('plotter_figures_skipped', len(fingerprints) - len(jobs))
+
+        # figures that are not produced anymore are forgotten
+        manifest = dict((file_name, fingerprint) for file_name, fingerprint in manifest.items() if file_name in fingerprints)
+
+        for path in self.render_figures(jobs, pool):
+            manifest[os.path.basename(path)] = fingerprints[os.path.basename(path)]
+            self.save_manifest(manifest)
+            hlp.metrics.increment('plotter_figures_rendered')
+
+        self.save_manifest(manifest)
 
-def main(input):
+def main(input, workers, columnar_cache, force, metrics=None, prometheus_textfile=None):
     """ Main method that starts other methods.
 
     Arguments:
         input {str} -- input file name
+        workers {int} -- amount of processes rendering figures
+        columnar_cache {bool} -- load data through the columnar cache
+        force {bool} -- render all figures, also those with unchanged input
+        metrics {str} -- JSON file with timings and counters, None writes into folder 'logs'
+        prometheus_textfile {str} -- timings and counters in the Prometheus text format, None writes no textfile
     """
 
-    uol_bib_plotter = UOLBibliographyDataPlotter()
+    hlp.init_metrics('plotter', metrics, prometheus_textfile)
+
+    uol_bib_plotter = UOLBibliographyDataPlotter(workers=workers, columnar_cache=columnar_cache, force=force)
     uol_bib_plotter.plotter(f_input=input)
 
 if __name__ == '__main__':
@@ -176,8 +403,43 @@ if __name__ == '__main__':
         help='input with cleaned and unique data in CSV')
     parser.set_defaults(mergedata='uolbibliography-2008-2015-merged-cleaned-unique.csv')
 
+    # rendering
+    parser.add_argument(
+        '--workers',
+        dest='workers',
+        type=int,
+        help='amount of processes rendering figures, 1 renders in the main process (default 1)')
+    parser.set_defaults(workers=1)
+
+    parser.add_argument(
+        '--force',
+        dest='force',
+        action='store_true',
+        help='renders all figures, by default only figures with changed input are rendered (see "{0}/{1}")'.format(PLOTS_DIR, PLOTS_MANIFEST_NAME))
+    parser.set_defaults(force=False)
+
+    # columnar cache
+    parser.add_argument(
+        '--no-columnar-cache',
+        dest='columnar_cache',
+        action='store_false',
+        help='reads the CSV every time instead of the columnar cache "<input>{0}" next to it'.format(COLUMNAR_CACHE_SUFFIX))
+    parser.set_defaults(columnar_cache=True)
+
+    # instrumentation
+    parser.add_argument(
+        '--metrics',
+        dest='metrics',
+        help='JSON file with timings and counters of the run, written at exit (default "logs/metrics-plotter.json")')
+    parser.set_defaults(metrics=None)
+
+    parser.add_argument(
+        '--prometheus-textfile',
+        dest='prometheus_textfile',
+        help='additionally writes timings and counters in the Prometheus text format into this file')
+    parser.set_defaults(prometheus_textfile=None)
+
     # parse input parameters
     args = parser.parse_args()
 
-    main(args.input)
-
+    main(args.input, args.workers, args.columnar_cache, args.force, args.metrics, args.prometheus_textfile)